@@ -0,0 +1,250 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.types import FunctionInfo
+from agents.session import file_digest
+from core.defaults import DEFAULT_SELECTION_STRATEGY
+from core.engine import SummarizationEngine, run_sync
+from core.formatter import write_document
+from core.function_selector import select_key_functions
+from core.function_store import FunctionStore
+from core.incremental import MANIFEST_SUFFIX
+from core.index_file import INDEX_SUFFIX, is_index_file, open_index
+from core.input_loader import iter_functions, read_file_name
+
+logger = logging.getLogger(__name__)
+
+INPUT_SUFFIXES = (".json", ".jsonl", INDEX_SUFFIX)
+CHECKPOINT_FILE_NAME = ".checkpoint.jsonl"
+# Loaded files waiting for the API, per worker process
+FILES_IN_FLIGHT_PER_WORKER = 2
+
+
+def resolve_inputs(spec: str, output_dir: Optional[str] = None) -> List[str]:
+    """Expand a directory, glob pattern or list file into input paths.
+
+    A directory yields every JSON, JSON Lines and index file below it; a
+    ``.txt`` file lists one input path per line. An inventory whose index
+    was built next to it is read through the index only, since both would
+    be documented to the same output. Checkpoints, incremental manifests
+    and anything under ``output_dir`` are written by earlier runs, not
+    inputs, and are left out.
+    """
+    output_root = os.path.abspath(output_dir) if output_dir else None
+    if os.path.isdir(spec):
+        paths = []
+        for root, dirs, names in os.walk(spec):
+            if output_root:
+                dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != output_root]
+            paths.extend(os.path.join(root, name) for name in names if name.endswith(INPUT_SUFFIXES))
+    elif spec.endswith(".txt") and os.path.isfile(spec):
+        with open(spec, "r") as f:
+            paths = [line.strip() for line in f if line.strip()]
+    else:
+        paths = glob.glob(spec, recursive=True)
+    paths = [p for p in paths if not _is_run_output(p, output_root)]
+    indexed = {os.path.splitext(p)[0] for p in paths if p.endswith(INDEX_SUFFIX)}
+    return sorted(
+        p for p in paths if p.endswith(INDEX_SUFFIX) or os.path.splitext(p)[0] not in indexed
+    )
+
+
+def _is_run_output(path: str, output_root: Optional[str]) -> bool:
+    if path.endswith((CHECKPOINT_FILE_NAME, MANIFEST_SUFFIX)):
+        return True
+    if output_root is None:
+        return False
+    return os.path.commonpath([os.path.abspath(path), output_root]) == output_root
+
+
+def output_path_for(input_path: str, input_root: str, output_dir: str) -> str:
+    """Mirror the input's path below ``input_root`` into ``output_dir`` as markdown."""
+    relative = os.path.relpath(os.path.abspath(input_path), input_root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + ".md")
+
+
+def output_paths_for(inputs: List[str], input_root: str, output_dir: str) -> Dict[str, str]:
+    """Output path of every input; raises ValueError if two inputs would share one."""
+    outputs: Dict[str, str] = {}
+    claimed: Dict[str, str] = {}
+    for path in inputs:
+        output_path = output_path_for(path, input_root, output_dir)
+        other = claimed.setdefault(output_path, path)
+        if other != path:
+            raise ValueError(f"{other} and {path} would both be documented to {output_path}")
+        outputs[path] = output_path
+    return outputs
+
+
+def load_input(
+    path: str, top_n: Optional[int], strategy: str = DEFAULT_SELECTION_STRATEGY
+) -> Tuple[str, List[FunctionInfo]]:
+    """Load and select the functions to document; runs in a worker process."""
+    if is_index_file(path):
+        with open_index(path) as store:
+            selected = select_key_functions(store, top_n, strategy) if top_n else store
+            return store.file, [fn.to_dict() for fn in selected]
+
+    store = FunctionStore.from_records(iter_functions(path), file=read_file_name(path))
+    selected = select_key_functions(store, top_n, strategy) if top_n else store
+    return store.file, [fn.to_dict() for fn in selected]
+
+
+def write_output(path: str, file: str, summarized: List[Dict[str, str]]) -> None:
+    """Format and write one file's documentation; runs in a worker process."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        write_document(f, file, summarized)
+    os.replace(temp_path, path)
+
+
+class Checkpoint:
+    """Append-only record of finished inputs, so an interrupted batch can resume.
+
+    An input counts as done only while its content digest and output file
+    are unchanged.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash is simply redone
+                        continue
+                    self.done[entry["input"]] = entry
+        self._file = open(path, "a")
+
+    def is_done(self, input_path: str, digest: str) -> bool:
+        entry = self.done.get(input_path)
+        return (
+            entry is not None
+            and entry["digest"] == digest
+            and os.path.exists(entry["output"])
+        )
+
+    def record(self, input_path: str, digest: str, output_path: str, functions: int) -> None:
+        entry = {
+            "input": input_path,
+            "digest": digest,
+            "output": output_path,
+            "functions": functions,
+        }
+        self.done[input_path] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BatchRunner:
+    """Document many input files with one shared summarization engine.
+
+    Loading, scoring and formatting run in a process pool, while every
+    file's API calls go through ``engine``: one async client pool and one
+    concurrency limit for the whole batch, within the shared scheduler's
+    rate budget.
+    """
+
+    def __init__(
+        self,
+        engine: SummarizationEngine,
+        output_dir: str,
+        workers: Optional[int] = None,
+        top_n: Optional[int] = None,
+        selection: str = DEFAULT_SELECTION_STRATEGY,
+        resume: bool = True,
+    ):
+        self.engine = engine
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.top_n = top_n
+        self.selection = selection
+        self.resume = resume
+
+    def run(self, inputs: List[str]) -> Dict[str, Any]:
+        """Document every input and return a throughput report."""
+        return run_sync(self.arun(inputs))
+
+    async def arun(self, inputs: List[str]) -> Dict[str, Any]:
+        input_root = (
+            os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in inputs])
+            if inputs
+            else ""
+        )
+        # Checked before any work starts, so two workers never write one file
+        output_paths = output_paths_for(inputs, input_root, self.output_dir)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        checkpoint_path = os.path.join(self.output_dir, CHECKPOINT_FILE_NAME)
+        if not self.resume and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        checkpoint = Checkpoint(checkpoint_path)
+
+        report = {"files": 0, "skipped": 0, "failed": 0, "functions": 0}
+        requests_before = self.engine.requests_sent
+        started = time.monotonic()
+
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(self.workers * FILES_IN_FLIGHT_PER_WORKER)
+
+        async def process(path: str, pool: ProcessPoolExecutor) -> None:
+            async with in_flight:
+                try:
+                    digest = await loop.run_in_executor(pool, file_digest, path)
+                    if checkpoint.is_done(path, digest):
+                        report["skipped"] += 1
+                        return
+
+                    file, functions = await loop.run_in_executor(
+                        pool, load_input, path, self.top_n, self.selection
+                    )
+                    explanations = await self.engine.summarize_all(functions)
+                    summarized = [
+                        {"name": fn["name"], "code": fn["code"], "explanation": explanation}
+                        for fn, explanation in zip(functions, explanations)
+                    ]
+                    output_path = output_paths[path]
+                    await loop.run_in_executor(
+                        pool, write_output, output_path, file, summarized
+                    )
+                except Exception:
+                    logger.exception(f"Failed to document {path}")
+                    report["failed"] += 1
+                    return
+
+                checkpoint.record(path, digest, output_path, len(functions))
+                report["files"] += 1
+                report["functions"] += len(functions)
+                logger.info(f"Documented {path} -> {output_path}")
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                await asyncio.gather(*(process(path, pool) for path in inputs))
+        finally:
+            checkpoint.close()
+
+        elapsed = time.monotonic() - started
+        minutes = elapsed / 60 or 1e-9
+        requests = self.engine.requests_sent - requests_before
+        report.update(
+            {
+                "requests": requests,
+                "elapsed_seconds": round(elapsed, 3),
+                "files_per_minute": round(report["files"] / minutes, 1),
+                "requests_per_minute": round(requests / minutes, 1),
+            }
+        )
+        return report
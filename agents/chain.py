@@ -1,29 +1,77 @@
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import List, Dict, Any, Optional
 import os
+import queue
+import threading
+from typing import (
+    TYPE_CHECKING, List, Dict, Any, Callable, Generator, Iterable, Iterator, Optional, Tuple
+)
+from itertools import islice
 
-from openai import OpenAI
 from agents.types import FunctionInfo, ActionType
-from agents.prompt_templates import generate_overall_analysis_prompt
+from agents.prompt_templates import (
+    generate_overall_analysis_prompt,
+    group_analysis_prompt_template,
+    merge_analyses_prompt_template,
+    overall_analysis_from_parts_prompt_template,
+)
 
 # Import core functions that already exist
-from core.input_loader import load_dummy_input
+from core.input_loader import FunctionStream, load_dummy_input, iter_functions, read_file_name
+from core.function_store import FunctionStore
+from core.index_file import is_index_file, open_index
 from core.function_selector import select_key_functions
-from core.summarizer import summarize_function
+from core.summarizer import (
+    SUMMARY_TEMPERATURE,
+    estimate_prompt_tokens,
+    summarize_batch_async,
+    summarize_function_async,
+    summarize_function_stream,
+)
 from core.formatter import format_as_markdown
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+from core.incremental import build_manifest, diff_functions, summary_settings
+from core.dedup import CloneIndex, adapt_summary
+from core.extractor import SourceExtractor, tree_name
+from core.centrality import CallGraphIndex
+from core.engine import SummarizationEngine, run_sync
+from core.defaults import DEFAULT_CONCURRENCY, DEFAULT_MODEL, DEFAULT_SELECTION_STRATEGY
+from core.cache import SummaryCache, make_key, summary_key
+from core.scheduler import RequestScheduler, scheduler as shared_scheduler
+from core.clients import ClientProvider, clients as shared_clients
+from core.backends import ModelBackend, OpenAIBackend
+from core.analysis import (
+    DEFAULT_ANALYSIS_TOKEN_BUDGET,
+    MIN_ANALYSIS_TOKEN_BUDGET,
+    GroupPacker,
+    item_token_limit,
+    module_of,
+    pack_groups,
+    truncate_to_tokens,
 )
+from agents.session import AgentSession
+from agents.triage import LocalTriage, normalize_query
+from agents.prompt_templates import PROMPT_TEMPLATE_VERSION
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# Logging is configured by the entry point (main.py), not on import
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-DEFAULT_MODEL = "gpt-4o-mini"  # Default model
+SUMMARY_WINDOW = 256  # Functions held in memory per summarization round
+# JSON inventories larger than this are streamed on every query instead of
+# being held in the session, so memory stays bounded however big they are
+MAX_STORED_INPUT_BYTES = 64 * 1024 * 1024
+
+
+async def cancel_pending(*tasks: Optional["asyncio.Future"]) -> None:
+    """Cancel the tasks that have not finished and wait for them to wind down"""
+    pending = [task for task in tasks if task is not None and not task.done()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
 
 
 # Define possible actions for the agent
@@ -32,15 +80,111 @@ DEFAULT_MODEL = "gpt-4o-mini"  # Default model
 class CodeExplainerAgent:
     """An agent that analyzes code and explains what it does"""
 
-    def __init__(self, model: str = DEFAULT_MODEL):
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        cache: Optional[SummaryCache] = None,
+        batch_token_budget: Optional[int] = None,
+        session: Optional[AgentSession] = None,
+        speculative: bool = False,
+        analysis_token_budget: int = DEFAULT_ANALYSIS_TOKEN_BUDGET,
+        scheduler: Optional[RequestScheduler] = None,
+        clients: Optional[ClientProvider] = None,
+        backend: Optional[ModelBackend] = None,
+        dedup_threshold: Optional[float] = None,
+        extractor: Optional[SourceExtractor] = None,
+        selection: str = DEFAULT_SELECTION_STRATEGY,
+    ):
         self.model = model
-        self.client = client
-        logger.info(f"Initialized CodeExplainerAgent with model: {model}")
+        self.clients = clients or shared_clients
+        self.scheduler = scheduler or shared_scheduler
+        self.backend = backend or OpenAIBackend(self.clients, self.scheduler)
+        # Cache keys name the backend too, so a stand-in never serves real replies
+        self.model_key = self.backend.model_id(model)
+        self.cache = cache
+        self.session = session or AgentSession()
+        self.local_triage = LocalTriage()
+        self.speculative = speculative
+        if analysis_token_budget < MIN_ANALYSIS_TOKEN_BUDGET:
+            raise ValueError(f"analysis_token_budget must be at least {MIN_ANALYSIS_TOKEN_BUDGET}")
+        self.analysis_token_budget = analysis_token_budget
+        # Near-duplicate functions share one summary when a threshold is set
+        self.clones = CloneIndex(dedup_threshold) if dedup_threshold else None
+        # Parses source trees given as input
+        self.extractor = extractor or SourceExtractor()
+        self.max_stored_input_bytes = MAX_STORED_INPUT_BYTES
+        # Ranks from the call graph are updated in place as the input changes
+        self.selection = selection
+        self.call_graph = CallGraphIndex() if selection == "pagerank" else None
+        self.engine = SummarizationEngine(
+            concurrency=concurrency,
+            cache=cache,
+            batch_token_budget=batch_token_budget,
+            summarize=lambda fn: summarize_function_async(
+                fn, backend=self.backend, model=self.model
+            ),
+            summarize_batch=lambda batch: summarize_batch_async(
+                batch, backend=self.backend, model=self.model
+            ),
+            model=self.model_key,
+        )
+        logger.info(
+            f"Initialized CodeExplainerAgent with model: {model}, "
+            f"backend: {self.backend.name}, concurrency: {concurrency}"
+        )
+
+    @property
+    def client(self) -> "OpenAI":
+        """The provider's sync client, built on first use"""
+        return self.clients.client
 
     def triage_query(self, query: str, file_path: str) -> ActionType:
         """Determine what action to take based on the user query"""
         logger.info(f"Triaging query: {query}")
 
+        cache_key = self._triage_key(query, file_path)
+        action = self._remembered_triage(cache_key)
+        if action is None:
+            # Try the local rules before paying for a round trip
+            functions = self.open_functions(file_path)
+            action = self._resolve_triage_locally(
+                query, cache_key, functions if isinstance(functions, FunctionStore) else None
+            )
+        if action is None:
+            action = self._llm_triage(query, file_path, cache_key)
+        return action
+
+    def _triage_key(self, query: str, file_path: str) -> str:
+        return make_key(
+            "triage", self.model_key, PROMPT_TEMPLATE_VERSION, normalize_query(query), file_path
+        )
+
+    def _remembered_triage(self, cache_key: str) -> Optional[ActionType]:
+        """Return a triage decision made earlier for the same normalized query"""
+        action = self.session.triages.get(cache_key)
+        if action is None and self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                action = ActionType.model_validate_json(cached)
+                self.session.triages.put(cache_key, action)
+        if action is not None:
+            self.local_triage.stats["memo"] += 1
+        return action
+
+    def _resolve_triage_locally(
+        self, query: str, cache_key: str, functions: Optional[FunctionStore]
+    ) -> Optional[ActionType]:
+        action = self.local_triage.resolve(query, functions)
+        if action is not None:
+            logger.info(f"Triage resolved locally: {action.model_dump_json()}")
+            self.session.triages.put(cache_key, action)
+            self.local_triage.stats["rules"] += 1
+        return action
+
+    def _llm_triage(self, query: str, file_path: str, cache_key: str) -> ActionType:
+        self.local_triage.stats["llm"] += 1
+
         # Define the function calling for action determination
         triage_tool = {
             "type": "function",
@@ -69,165 +213,757 @@ Determine the action that best matches the user's intention.
 """
 
         # Call LLM for triage
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "system", "content": triage_prompt}],
-            tools=[triage_tool],
-            tool_choice={"type": "function", "function": {"name": "determine_action"}},
+        arguments = self.backend.complete(
+            [{"role": "system", "content": triage_prompt}], self.model, tool=triage_tool
         )
 
         # Parse response
-        tool_call = response.choices[0].message.tool_calls[0]
-        result = json.loads(tool_call.function.arguments)
+        result = json.loads(arguments)
+        action = ActionType(**result)
 
-        return ActionType(**result)
+        if self.cache is not None:
+            self.cache.set(cache_key, action.model_dump_json())
+        self.session.triages.put(cache_key, action)
+
+        return action
 
     def load_code_data(self, file_path: str) -> Dict[str, Any]:
         """Load code data from a file"""
         logger.info(f"Loading code data from: {file_path}")
         return load_dummy_input(file_path)
 
+    def iter_code_functions(self, file_path: str) -> Iterator[FunctionInfo]:
+        """Stream functions from a file without loading it whole"""
+        if os.path.isdir(file_path):
+            return self.extractor.extract(file_path)
+        return iter_functions(file_path)
+
+    def open_functions(self, file_path: str) -> Iterable[FunctionInfo]:
+        """The input for a query: the session's store, or a stream for large inventories.
+
+        Streamed inputs keep explain-all, top-N and lookup queries within a
+        window of functions, at the cost of re-reading the file per query and
+        of the triage rules that need the function names.
+        """
+        if (
+            not os.path.isdir(file_path)
+            and not is_index_file(file_path)
+            and os.path.getsize(file_path) > self.max_stored_input_bytes
+        ):
+            return FunctionStream(file_path)
+        return self.get_function_store(file_path)
+
+    def get_function_store(self, file_path: str) -> FunctionStore:
+        """Return the session's parsed input, reloading only if the file changed"""
+        return self.session.get_store(file_path, self.load_function_store)
+
+    def load_function_store(self, file_path: str) -> FunctionStore:
+        """Load functions into a compact columnar store with a name index"""
+        logger.info(f"Loading code data from: {file_path}")
+        if os.path.isdir(file_path):
+            # A source tree: functions are extracted from the code itself
+            return FunctionStore.from_records(
+                self.extractor.extract(file_path), file=tree_name(file_path)
+            )
+        if is_index_file(file_path):
+            # Pre-built binary index: memory-mapped, nothing is parsed up front
+            return open_index(file_path)
+        return FunctionStore.from_records(
+            iter_functions(file_path), file=read_file_name(file_path)
+        )
+
+    def find_function(
+        self, functions: Iterable[FunctionInfo], function_name: str
+    ) -> Optional[FunctionInfo]:
+        """Find a function by name, stopping at the first match"""
+        if isinstance(functions, FunctionStore):
+            return functions.get(function_name)
+        return next((fn for fn in functions if fn["name"] == function_name), None)
+
     def find_important_functions(
-        self, functions: List[FunctionInfo], top_n: int = 3
+        self, functions: Iterable[FunctionInfo], top_n: int = 3
     ) -> List[FunctionInfo]:
         """Find the most important functions using existing selector"""
-        logger.info(f"Finding {top_n} important functions from {len(functions)} total")
-        return select_key_functions(functions, top_n=top_n)
+        logger.info(f"Finding {top_n} important functions")
+        return select_key_functions(
+            functions, top_n=top_n, strategy=self.selection, graph=self.call_graph
+        )
 
     def summarize_specific_function(
-        self, functions: List[FunctionInfo], function_name: str
+        self, functions: Iterable[FunctionInfo], function_name: str
     ) -> Optional[str]:
         """Summarize a specific function by name"""
         logger.info(f"Summarizing specific function: {function_name}")
 
         # Find the function by name
-        function = next((fn for fn in functions if fn["name"] == function_name), None)
+        function = self.find_function(functions, function_name)
 
         if not function:
             logger.warning(f"Function not found: {function_name}")
             return None
 
-        # Use existing summarizer
-        return summarize_function(function)
+        return self.summarize_functions([function])[0]
+
+    def summarize_functions(self, functions: List[FunctionInfo]) -> List[str]:
+        """Summarize functions, reusing summaries already produced this session"""
+        return run_sync(self.asummarize_functions(functions))
+
+    async def asummarize_functions(self, functions: List[FunctionInfo]) -> List[str]:
+        keys = [summary_key(fn, self.model_key, SUMMARY_TEMPERATURE) for fn in functions]
+        explanations = [self.session.summaries.get(key) for key in keys]
+
+        missing = [i for i, explanation in enumerate(explanations) if explanation is None]
+        if missing:
+            pending = [functions[i] for i in missing]
+            if self.clones is None:
+                fresh = await self.engine.summarize_all(pending)
+            else:
+                fresh = await self._summarize_clones(pending)
+            for i, explanation in zip(missing, fresh):
+                explanations[i] = explanation
+                self.session.summaries.put(keys[i], explanation)
+
+        return explanations
+
+    async def _summarize_clones(self, functions: List[FunctionInfo]) -> List[str]:
+        """Summarize one function per cluster of near-duplicates and adapt the rest.
+
+        Functions with a summary in the persistent cache keep their own, and
+        lend it to their cluster if it has none yet.
+        """
+        explanations: List[Optional[str]] = [None] * len(functions)
+        clusters = {}
+        leaders = {}
+        for i, fn in enumerate(functions):
+            cluster = self.clones.add(fn)
+            if self.cache is not None:
+                explanations[i] = self.cache.get(
+                    summary_key(fn, self.model_key, SUMMARY_TEMPERATURE)
+                )
+            if explanations[i] is not None:
+                if cluster.summary is None:
+                    cluster.name, cluster.summary = fn["name"], explanations[i]
+                continue
+            clusters[i] = cluster
+            # Clusters without a summary yet get theirs from their first member
+            if cluster.summary is None:
+                leaders.setdefault(id(cluster), i)
+
+        if leaders:
+            fresh = await self.engine.summarize_all([functions[i] for i in leaders.values()])
+            for i, explanation in zip(leaders.values(), fresh):
+                clusters[i].name, clusters[i].summary = functions[i]["name"], explanation
+                explanations[i] = explanation
+
+        for i, cluster in clusters.items():
+            if explanations[i] is None:
+                explanations[i] = adapt_summary(
+                    cluster.summary, cluster.name, functions[i]["name"]
+                )
+                self.clones.stats["reused"] += 1
+        return explanations
 
     def explain_all_functions(
-        self, functions: List[FunctionInfo]
+        self, functions: Iterable[FunctionInfo]
     ) -> List[Dict[str, str]]:
         """Generate summaries for all functions"""
-        logger.info(f"Generating summaries for all {len(functions)} functions")
+        return run_sync(self.aexplain_all_functions(functions))
+
+    async def aexplain_all_functions(
+        self,
+        functions: Iterable[FunctionInfo],
+        on_window: Optional[Callable[[List[Dict[str, str]]], None]] = None,
+    ) -> List[Dict[str, str]]:
+        """Async explain_all_functions; ``on_window`` receives each finished window"""
+        logger.info("Generating summaries for all functions")
 
         results = []
-        for function in functions:
-            explanation = summarize_function(function)
-            results.append(
+        functions = iter(functions)
+        # Summarize in windows so only one window of input records is held at once
+        while True:
+            window = list(islice(functions, SUMMARY_WINDOW))
+            if not window:
+                break
+
+            explanations = await self.asummarize_functions(window)
+            rows = [
                 {
                     "name": function["name"],
                     "code": function["code"],
                     "explanation": explanation,
                 }
-            )
+                for function, explanation in zip(window, explanations)
+            ]
+            results.extend(rows)
+            if on_window is not None:
+                on_window(rows)
 
+        logger.info(f"Generated summaries for {len(results)} functions")
         return results
 
+    def _function_summaries(self, summarized_functions: List[Dict]) -> List[Dict]:
+        # Create a function summary objects for the template
+        return [
+            {
+                "name": func["name"],
+                "purpose": func["explanation"],
+                "key_features": [],  # We don't have this from the existing summarizer
+            }
+            for func in summarized_functions
+        ]
+
+    def _analysis_item(self, summary: Dict) -> Tuple[Dict, int]:
+        """A summary cut to the per-item limit, and its token cost in a group prompt"""
+        limit = item_token_limit(self.analysis_token_budget)
+        item = dict(summary, purpose=truncate_to_tokens(summary["purpose"], limit))
+        return item, estimate_prompt_tokens(f"Function: {item['name']}\nPurpose: {item['purpose']}\n\n")
+
+    def _overall_analysis_prompt(
+        self, summarized_functions: List[Dict], ready: Optional[Dict[str, str]] = None
+    ) -> str:
+        function_summaries = self._function_summaries(summarized_functions)
+        prompt = generate_overall_analysis_prompt(function_summaries)
+        if estimate_prompt_tokens(prompt) <= self.analysis_token_budget:
+            return prompt
+        return self._reduced_analysis_prompt(function_summaries, ready)
+
+    def _reduced_analysis_prompt(
+        self, function_summaries: List[Dict], ready: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Map-reduce the summaries into a final analysis prompt within the token budget.
+
+        Summaries are grouped by module and analyzed in parallel, then the
+        group analyses are merged round by round until they fit in one prompt.
+        Every intermediate analysis is cached by its prompt, so a re-run only
+        recomputes the groups whose summaries changed. ``ready`` holds group
+        analyses already written, by prompt.
+        """
+        budget = self.analysis_token_budget
+        limit = item_token_limit(budget)
+
+        items = [self._analysis_item(summary) for summary in function_summaries]
+        groups = pack_groups(
+            [cost for _, cost in items], budget, [module_of(item["name"]) for item, _ in items]
+        )
+        logger.info(
+            f"Analyzing {len(function_summaries)} function summaries in {len(groups)} groups"
+        )
+        analyses = self._complete_analyses(
+            [group_analysis_prompt_template([items[i][0] for i in group]) for group in groups],
+            ready,
+        )
+
+        while True:
+            analyses = [truncate_to_tokens(analysis, limit) for analysis in analyses]
+            prompt = overall_analysis_from_parts_prompt_template(analyses)
+            if estimate_prompt_tokens(prompt) <= budget:
+                return prompt
+
+            groups = pack_groups(
+                [estimate_prompt_tokens(f"Part 00:\n{analysis}\n\n") for analysis in analyses],
+                budget,
+            )
+            if len(groups) >= len(analyses):
+                # Merging one analysis at a time would never fit the budget
+                raise RuntimeError(
+                    f"Cannot merge {len(analyses)} partial analyses within {budget} tokens"
+                )
+            logger.info(f"Merging {len(analyses)} partial analyses into {len(groups)}")
+            analyses = self._complete_analyses(
+                [
+                    merge_analyses_prompt_template([analyses[i] for i in group])
+                    for group in groups
+                ]
+            )
+
+    def _complete_analyses(
+        self, prompts: List[str], ready: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Run independent analysis prompts in parallel, in order"""
+        analyses = dict(ready or {})
+        missing = [prompt for prompt in dict.fromkeys(prompts) if prompt not in analyses]
+        if len(missing) == 1:
+            analyses[missing[0]] = self._complete_analysis(missing[0])
+        elif missing:
+            workers = min(len(missing), self.engine.concurrency)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                analyses.update(zip(missing, pool.map(self._complete_analysis, missing)))
+        return [analyses[prompt] for prompt in prompts]
+
+    def _complete_analysis(self, prompt: str) -> str:
+        cache_key = make_key("analysis", self.model_key, prompt)
+        remembered = self._remembered_analysis(cache_key)
+        if remembered is not None:
+            return remembered
+
+        analysis = self.backend.complete([{"role": "system", "content": prompt}], self.model)
+
+        self._remember_analysis(cache_key, analysis)
+        return analysis
+
+    def _remembered_analysis(self, cache_key: str) -> Optional[str]:
+        analysis = self.session.analyses.get(cache_key)
+        if analysis is None and self.cache is not None:
+            analysis = self.cache.get(cache_key)
+            if analysis is not None:
+                self.session.analyses.put(cache_key, analysis)
+        return analysis
+
+    def _remember_analysis(self, cache_key: str, analysis: str) -> None:
+        if self.cache is not None:
+            self.cache.set(cache_key, analysis)
+        self.session.analyses.put(cache_key, analysis)
+
     def generate_overall_analysis(
-        self, functions: List[FunctionInfo], summarized_functions: List[Dict]
+        self,
+        functions: Iterable[FunctionInfo],
+        summarized_functions: List[Dict],
+        ready: Optional[Dict[str, str]] = None,
     ) -> str:
         """Generate an overall analysis of the code"""
         logger.info("Generating overall code analysis")
 
-        # Create a function summary objects for the template
-        function_summaries = []
-        for func in summarized_functions:
-            function_summaries.append(
-                {
-                    "name": func["name"],
-                    "purpose": func["explanation"],
-                    "key_features": [],  # We don't have this from the existing summarizer
-                }
-            )
-
         # Generate the analysis
-        prompt = generate_overall_analysis_prompt(function_summaries)
-
-        response = self.client.chat.completions.create(
-            model=self.model, messages=[{"role": "system", "content": prompt}]
+        prompt = self._overall_analysis_prompt(summarized_functions, ready)
+        return self._complete_analysis(prompt)
+
+    def generate_overall_analysis_stream(
+        self, functions: Iterable[FunctionInfo], summarized_functions: List[Dict]
+    ) -> Iterator[str]:
+        """Yield the overall analysis as it is generated"""
+        logger.info("Streaming overall code analysis")
+
+        prompt = self._overall_analysis_prompt(summarized_functions)
+
+        cache_key = make_key("analysis", self.model_key, prompt)
+        remembered = self._remembered_analysis(cache_key)
+        if remembered is not None:
+            yield remembered
+            return
+
+        parts = []
+        for text in self.backend.stream([{"role": "system", "content": prompt}], self.model):
+            parts.append(text)
+            yield text
+
+        self._remember_analysis(cache_key, "".join(parts))
+
+    def summarize_function_stream(self, function: FunctionInfo) -> Iterator[str]:
+        """Yield a function's summary as it is generated"""
+        key = summary_key(function, self.model_key, SUMMARY_TEMPERATURE)
+        remembered = self.session.summaries.get(key)
+        if remembered is not None:
+            yield remembered
+            return
+
+        parts = []
+        for text in summarize_function_stream(
+            function, cache=self.cache, backend=self.backend, model=self.model
+        ):
+            parts.append(text)
+            yield text
+        self.session.summaries.put(key, "".join(parts).strip())
+
+    def update_documentation(
+        self, file_path: str, previous: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Re-document only the functions added or changed since the previous run.
+
+        ``previous`` is a manifest from an earlier run (see core.incremental),
+        or None to document everything. Explanations of unchanged functions
+        are reused, and the result includes the new manifest.
+        """
+        functions = self.get_function_store(file_path)
+        diff, hashes = diff_functions(
+            previous, functions, summary_settings(self.model_key, self.model)
+        )
+        logger.info(
+            "Documentation diff: "
+            + ", ".join(f"{count} {kind}" for kind, count in diff.counts().items())
         )
 
-        return response.choices[0].message.content
+        stale = sorted(diff.added + diff.changed)
+        fresh = self.summarize_functions([functions[row] for row in stale])
+        explanations = dict(diff.reused)
+        explanations.update(zip(stale, fresh))
+
+        summarized = [
+            {
+                "name": function["name"],
+                "code": function["code"],
+                "explanation": explanations[row],
+            }
+            for row, function in enumerate(functions)
+        ]
+        return {
+            "file": functions.file,
+            "summarized_functions": summarized,
+            "markdown": format_as_markdown(functions.file, summarized),
+            "diff": diff.counts(),
+            "manifest": build_manifest(
+                functions.file,
+                [function["name"] for function in summarized],
+                hashes,
+                [function["explanation"] for function in summarized],
+            ),
+        }
 
-    def process_query(self, query: str, file_path: str) -> Dict[str, Any]:
-        """Process a user query and return appropriate results"""
-        logger.info(f"Processing query: {query} for file: {file_path}")
+    def stream_query(self, query: str, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Process a query, yielding progress events as text is generated.
+
+        Events are dicts with a ``type`` of ``start``, ``function_start``,
+        ``summary_delta``, ``function_end``, ``analysis_delta``, ``error`` or
+        ``done``. ``start`` names the result key the summarized functions
+        will be returned under (None if there are none) and whether they will
+        form a markdown document, and ``done`` carries the same result dict
+        as process_query.
+        Several functions are summarized at once, so their deltas interleave;
+        ``function_end`` events still follow the input order.
+        """
+        logger.info(f"Streaming query: {query} for file: {file_path}")
 
-        # Step 1: Triage the query to determine action
         action = self.triage_query(query, file_path)
+        functions = self.open_functions(file_path)
+        file_name = functions.file
+        result = {"file": file_name}
 
-        # Step 2: Load code data
-        data = self.load_code_data(file_path)
-        file_name = data.get("file", "")
-        functions = data.get("functions", [])
+        targets = None
+        result_key = None
+        with_markdown = True
+        if action.explain_code:
+            targets, result_key = functions, "summarized_functions"
+        elif action.find_important_functions:
+            targets = self.find_important_functions(functions, action.top_n)
+            result_key = "important_functions"
+        elif action.summarize_specific_function and action.function_name:
+            function = self.find_function(functions, action.function_name)
+            if function:
+                targets, result_key = [function], "function_summary"
+            else:
+                result["error"] = f"Function '{action.function_name}' not found"
+
+        if targets is None and action.overall_analysis:
+            # If no functions were summarized yet, summarize important ones first
+            targets = self.find_important_functions(functions, action.top_n)
+            result_key = "important_functions"
+            with_markdown = False
+
+        yield {
+            "type": "start",
+            "file": file_name,
+            "action": action,
+            "markdown": result_key is not None and with_markdown,
+            "result_key": result_key,
+        }
+        if "error" in result:
+            yield {"type": "error", "error": result["error"]}
+
+        summarized = yield from self._stream_summaries(targets or [])
 
-        # Step 3: Perform the appropriate action
+        if result_key is not None:
+            result[result_key] = summarized
+            if with_markdown:
+                result["markdown"] = format_as_markdown(file_name, summarized)
+
+        if action.overall_analysis:
+            parts = []
+            for text in self.generate_overall_analysis_stream(functions, summarized):
+                parts.append(text)
+                yield {"type": "analysis_delta", "text": text}
+            result["overall_analysis"] = "".join(parts)
+
+        yield {"type": "done", "result": result}
+
+    def _stream_summaries(
+        self, functions: Iterable[FunctionInfo]
+    ) -> Generator[Dict[str, Any], None, List[Dict[str, str]]]:
+        """Yield summary events for the functions and return their rows in order.
+
+        Up to the engine's concurrency limit of summaries stream at once, and
+        functions with the same summary key wait for the first one's summary
+        instead of requesting it again. Functions are read as earlier ones
+        finish, at most ``SUMMARY_WINDOW`` ahead of the output. With batching
+        enabled, the engine summarizes each window in batches and every
+        summary arrives whole.
+        """
+        if self.engine.batch_token_budget:
+            return (yield from self._batched_summary_events(functions))
+
+        # Workers report (index, event), (index, explanation) or (index, error)
+        events: "queue.Queue[Tuple[int, Any]]" = queue.Queue()
+        stopped = threading.Event()
+
+        def stream_one(index: int, function: FunctionInfo) -> None:
+            name = function["name"]
+            try:
+                events.put((index, {"type": "function_start", "name": name}))
+                parts = []
+                for text in self.summarize_function_stream(function):
+                    if stopped.is_set():
+                        return
+                    parts.append(text)
+                    events.put((index, {"type": "summary_delta", "name": name, "text": text}))
+                events.put((index, "".join(parts).strip()))
+            except Exception as e:
+                events.put((index, e))
+
+        source = iter(functions)
+        # Functions read but not yet emitted, with their summary keys
+        pending: Dict[int, Tuple[FunctionInfo, str]] = {}
+        waiting: Dict[str, List[int]] = {}
+        finished: Dict[int, str] = {}
+        summarized = []
+        pool = ThreadPoolExecutor(max_workers=self.engine.concurrency)
+
+        def admit() -> None:
+            while len(pending) < SUMMARY_WINDOW:
+                function = next(source, None)
+                if function is None:
+                    return
+                index = len(summarized) + len(pending)
+                key = summary_key(function, self.model_key, SUMMARY_TEMPERATURE)
+                pending[index] = (function, key)
+                if key in waiting:
+                    waiting[key].append(index)
+                else:
+                    waiting[key] = []
+                    pool.submit(stream_one, index, function)
+
+        try:
+            admit()
+            while pending:
+                index, item = events.get()
+                if isinstance(item, Exception):
+                    raise item
+                if isinstance(item, dict):
+                    yield item
+                    continue
+
+                finished[index] = item
+                # The summary is now in the session, so duplicates are served from memory
+                for duplicate in waiting.pop(pending[index][1], []):
+                    pool.submit(stream_one, duplicate, pending[duplicate][0])
+                while len(summarized) in finished:
+                    function, _ = pending.pop(len(summarized))
+                    row = {
+                        "name": function["name"],
+                        "code": function["code"],
+                        "explanation": finished.pop(len(summarized)),
+                    }
+                    summarized.append(row)
+                    yield {"type": "function_end", "function": row}
+                admit()
+            return summarized
+        finally:
+            stopped.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _batched_summary_events(
+        self, functions: Iterable[FunctionInfo]
+    ) -> Generator[Dict[str, Any], None, List[Dict[str, str]]]:
+        summarized = []
+        source = iter(functions)
+        while True:
+            window = list(islice(source, SUMMARY_WINDOW))
+            if not window:
+                return summarized
+            for function, explanation in zip(window, self.summarize_functions(window)):
+                row = {"name": function["name"], "code": function["code"], "explanation": explanation}
+                summarized.append(row)
+                yield {"type": "function_start", "name": function["name"]}
+                yield {"type": "summary_delta", "name": function["name"], "text": explanation}
+                yield {"type": "function_end", "function": row}
+
+    def process_query(
+        self, query: str, file_path: str, with_markdown: bool = True
+    ) -> Dict[str, Any]:
+        """Process a user query and return appropriate results.
+
+        ``with_markdown=False`` leaves out the rendered document, for callers
+        that stream the summaries to a file themselves.
+        """
+        return run_sync(self.aprocess_query(query, file_path, with_markdown))
+
+    async def _triage_concurrently(
+        self, query: str, file_path: str, loading: "asyncio.Future[Iterable[FunctionInfo]]"
+    ) -> Tuple[ActionType, Optional["asyncio.Task"]]:
+        """Triage while the input loads; returns the action and any speculation task"""
+        logger.info(f"Triaging query: {query}")
+
+        cache_key = self._triage_key(query, file_path)
+        action = self._remembered_triage(cache_key)
+        if action is not None:
+            return action, None
+
+        # Rules that do not depend on function names can run before loading ends
+        functions = await loading if self.local_triage.needs_names(query) else None
+        if not isinstance(functions, FunctionStore):
+            functions = None
+        action = self._resolve_triage_locally(query, cache_key, functions)
+        if action is not None:
+            return action, None
+
+        speculation = None
+        if self.speculative:
+            speculation = asyncio.ensure_future(self._speculate(loading))
+        try:
+            action = await asyncio.to_thread(self._llm_triage, query, file_path, cache_key)
+        except BaseException:
+            await cancel_pending(speculation)
+            raise
+        return action, speculation
+
+    async def _speculate(self, loading: "asyncio.Future[Iterable[FunctionInfo]]") -> None:
+        """Pre-summarize the likely important functions while triage is in flight"""
+        functions = await loading
+        candidates = self.find_important_functions(functions, ActionType().top_n)
+        logger.info(f"Speculatively summarizing {len(candidates)} functions")
+        await self.asummarize_functions(candidates)
+
+    async def _analysis_stage(
+        self, summaries: asyncio.Queue, functions: Iterable[FunctionInfo]
+    ) -> str:
+        """Write the overall analysis from summaries as they are produced.
+
+        Once the summaries received so far are too long for one prompt, the
+        analysis is map-reduced, and each group is analyzed as soon as it is
+        complete while later windows are still being summarized.
+        """
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=self.engine.concurrency)
+        summarized = []
+        items = []
+        packer = GroupPacker(self.analysis_token_budget)
+        completed: List[List[int]] = []
+        started: Dict[str, "asyncio.Future[str]"] = {}
+        # Set once the single prompt is over budget; it only grows from there,
+        # so it is estimated while it is still short and never again after
+        reduced = False
+        try:
+            while True:
+                window = await summaries.get()
+                if window is None:
+                    break
+                summarized.extend(window)
+                for summary in self._function_summaries(window):
+                    item, cost = self._analysis_item(summary)
+                    items.append(item)
+                    group = packer.add(len(items) - 1, cost, module_of(item["name"]))
+                    if group is not None:
+                        completed.append(group)
+
+                if not reduced:
+                    prompt = generate_overall_analysis_prompt(self._function_summaries(summarized))
+                    reduced = estimate_prompt_tokens(prompt) > self.analysis_token_budget
+                if reduced:
+                    for group in completed:
+                        prompt = group_analysis_prompt_template([items[i] for i in group])
+                        started[prompt] = loop.run_in_executor(
+                            pool, self._complete_analysis, prompt
+                        )
+                    completed = []
+
+            if started:
+                logger.info(f"Analyzed {len(started)} groups while summaries were produced")
+            ready = {prompt: await future for prompt, future in started.items()}
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return await asyncio.to_thread(
+            self.generate_overall_analysis, functions, summarized, ready
+        )
+
+    async def aprocess_query(
+        self, query: str, file_path: str, with_markdown: bool = True
+    ) -> Dict[str, Any]:
+        """Process a query as a pipeline.
+
+        Loading runs in a worker thread alongside triage, speculative
+        summaries may start while the LLM triage call is in flight, and
+        summaries are handed to the analysis stage as each window completes.
+        Tasks still running when a stage fails are cancelled before the error
+        propagates.
+        """
+        logger.info(f"Processing query: {query} for file: {file_path}")
+
+        # Step 1: Load code data (session-cached) and triage the query concurrently
+        loading = asyncio.ensure_future(
+            asyncio.to_thread(self.open_functions, file_path)
+        )
+        speculation = None
+        analysis_task = None
+        try:
+            action, speculation = await self._triage_concurrently(query, file_path, loading)
+            functions = await loading
+            if speculation is not None and not action.summarize_specific_function:
+                # Its summaries land in the session cache and are reused below
+                await speculation
+
+            # Step 2: Start the analysis stage so it receives summaries as they arrive
+            summaries: Optional[asyncio.Queue] = None
+            if action.overall_analysis:
+                summaries = asyncio.Queue()
+                analysis_task = asyncio.ensure_future(
+                    self._analysis_stage(summaries, functions)
+                )
+            on_window = summaries.put_nowait if summaries is not None else None
+
+            # Step 3: Perform the appropriate action
+            result = await self._perform_action(action, functions, on_window, with_markdown)
+            if analysis_task is not None:
+                summaries.put_nowait(None)
+                result["overall_analysis"] = await analysis_task
+            return result
+        finally:
+            await cancel_pending(loading, speculation, analysis_task)
+
+    async def _perform_action(
+        self,
+        action: ActionType,
+        functions: Iterable[FunctionInfo],
+        on_window: Optional[Callable[[List[Dict[str, str]]], None]],
+        with_markdown: bool,
+    ) -> Dict[str, Any]:
+        file_name = functions.file
         result = {"file": file_name}
 
         if action.explain_code:
             # Explain all functions
-            summarized = self.explain_all_functions(functions)
+            summarized = await self.aexplain_all_functions(functions, on_window)
             result["summarized_functions"] = summarized
-            result["markdown"] = format_as_markdown(file_name, summarized)
+            if with_markdown:
+                result["markdown"] = format_as_markdown(file_name, summarized)
 
         elif action.find_important_functions:
             # Find and explain important functions
             important_functions = self.find_important_functions(functions, action.top_n)
-            summarized = self.explain_all_functions(important_functions)
+            summarized = await self.aexplain_all_functions(important_functions, on_window)
             result["important_functions"] = summarized
-            result["markdown"] = format_as_markdown(file_name, summarized)
+            if with_markdown:
+                result["markdown"] = format_as_markdown(file_name, summarized)
 
         elif action.summarize_specific_function and action.function_name:
             # Summarize a specific function
-            explanation = self.summarize_specific_function(
-                functions, action.function_name
-            )
-            function = next(
-                (fn for fn in functions if fn["name"] == action.function_name), None
-            )
+            function = self.find_function(functions, action.function_name)
 
-            if function and explanation:
-                summarized = [
-                    {
-                        "name": function["name"],
-                        "code": function["code"],
-                        "explanation": explanation,
-                    }
-                ]
+            if function:
+                summarized = await self.aexplain_all_functions([function], on_window)
                 result["function_summary"] = summarized
-                result["markdown"] = format_as_markdown(file_name, summarized)
+                if with_markdown:
+                    result["markdown"] = format_as_markdown(file_name, summarized)
             else:
                 result["error"] = f"Function '{action.function_name}' not found"
 
         if action.overall_analysis:
-            # If we have summarized functions, generate an overall analysis
-            if "summarized_functions" in result:
-                analysis = self.generate_overall_analysis(
-                    functions, result["summarized_functions"]
-                )
-            elif "important_functions" in result:
-                analysis = self.generate_overall_analysis(
-                    functions, result["important_functions"]
-                )
-            elif "function_summary" in result:
-                analysis = self.generate_overall_analysis(
-                    functions, result["function_summary"]
-                )
-            else:
+            if not any(
+                key in result
+                for key in ("summarized_functions", "important_functions", "function_summary")
+            ):
                 # If no functions were summarized yet, summarize important ones first
                 important_functions = self.find_important_functions(
                     functions, action.top_n
                 )
-                summarized = self.explain_all_functions(important_functions)
-                analysis = self.generate_overall_analysis(functions, summarized)
-                result["important_functions"] = summarized
-
-            result["overall_analysis"] = analysis
+                result["important_functions"] = await self.aexplain_all_functions(
+                    important_functions, on_window
+                )
 
         return result
@@ -1,8 +1,31 @@
 from typing import List
 from agents.types import FunctionInfo
+from core.compaction import code_token_limit, compactor
+from core.defaults import DEFAULT_MODEL
+from core.function_store import field_value
+from core.tokens import base_model
 
+# Bump whenever a template's wording changes so cached responses are invalidated
+PROMPT_TEMPLATE_VERSION = 2
 
-def function_summary_prompt_template(fn: FunctionInfo) -> str:
+
+def prompt_code(fn: FunctionInfo, model: str = DEFAULT_MODEL) -> str:
+    """The function's code as it goes into a prompt, compacted to ``model``'s limit."""
+    model = base_model(model)
+    return compactor.compact(fn["code"], code_token_limit(model), model)
+
+
+def prompt_fields(fn: FunctionInfo) -> str:
+    """The metadata lines of a function's prompt, the same for dicts and store rows."""
+    return (
+        f"Docstring: {field_value(fn, 'docstring') or 'N/A'}\n"
+        f"Fan-in: {field_value(fn, 'fan_in')}\n"
+        f"Fan-out: {field_value(fn, 'fan_out')}\n"
+        f"Entry Point: {field_value(fn, 'is_entry_point')}"
+    )
+
+
+def function_summary_prompt_template(fn: FunctionInfo, model: str = DEFAULT_MODEL) -> str:
     return f"""
 You are an expert Python developer and technical writer.
 
@@ -12,13 +35,36 @@ Only write the explanation. Do not repeat the code.
 ---
 
 Function Name: {fn['name']}
-Docstring: {fn.get('docstring', 'N/A')}
-Fan-in: {fn.get('fan_in')}
-Fan-out: {fn.get('fan_out')}
-Entry Point: {fn.get('is_entry_point')}
+{prompt_fields(fn)}
 
 Code:
-{fn['code']}
+{prompt_code(fn, model)}
+"""
+
+
+def batch_summary_prompt_template(
+    functions: List[FunctionInfo], model: str = DEFAULT_MODEL
+) -> str:
+    """Generate a prompt that asks for explanations of several functions at once."""
+    sections = "\n\n".join(
+        f"""### Function Name: {fn['name']}
+{prompt_fields(fn)}
+
+Code:
+{prompt_code(fn, model)}"""
+        for fn in functions
+    )
+
+    return f"""
+You are an expert Python developer and technical writer.
+
+Your task is to analyze each of the following functions and explain its purpose in simple terms.
+Only write the explanations. Do not repeat the code.
+Return exactly one explanation per function, using the function name exactly as given.
+
+---
+
+{sections}
 """
 
 
@@ -50,3 +96,66 @@ Your analysis should be concise but insightful.
 Function Summaries:
 {summaries}
 """
+
+
+def group_analysis_prompt_template(function_summaries: List[dict]) -> str:
+    """Generate a prompt to analyze one group of functions in a large codebase."""
+    summaries = "\n\n".join(
+        f"Function: {summary['name']}\nPurpose: {summary['purpose']}"
+        for summary in function_summaries
+    )
+
+    return f"""
+You are an expert software architect and code reviewer.
+
+The functions below are one part of a larger codebase. Write concise notes on this part:
+- What it is responsible for
+- Architecture patterns used
+- Notable strengths or problems
+
+Your notes will be combined with notes on the other parts, so do not speculate about the rest of the code.
+
+---
+
+Function Summaries:
+{summaries}
+"""
+
+
+def merge_analyses_prompt_template(analyses: List[str]) -> str:
+    """Generate a prompt to merge notes on several parts of a codebase into one."""
+    notes = "\n\n".join(f"Part {i}:\n{analysis}" for i, analysis in enumerate(analyses, 1))
+
+    return f"""
+You are an expert software architect and code reviewer.
+
+Below are notes on several parts of a larger codebase. Merge them into one set of concise notes
+covering responsibilities, architecture patterns, and notable strengths or problems.
+Keep anything that matters for an overall review and drop repetition.
+
+---
+
+{notes}
+"""
+
+
+def overall_analysis_from_parts_prompt_template(analyses: List[str]) -> str:
+    """Generate a prompt to create an overall analysis from notes on each part of the code."""
+    notes = "\n\n".join(f"Part {i}:\n{analysis}" for i, analysis in enumerate(analyses, 1))
+
+    return f"""
+You are an expert software architect and code reviewer.
+
+Based on the notes below, each covering one part of the codebase, provide an overall analysis of this codebase.
+Consider:
+- The main purpose of the code
+- Architecture patterns used
+- Quality of the implementation
+- Potential areas for improvement
+
+Your analysis should be concise but insightful.
+
+---
+
+{notes}
+"""
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from agents.chain import CodeExplainerAgent
+from core.defaults import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_QUEUED,
+    DEFAULT_SERVER_HOST,
+    DEFAULT_SERVER_PORT,
+)
+from core.engine import run_sync
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 30.0
+# Suggested wait for clients turned away while the server is saturated
+RETRY_AFTER_SECONDS = 1
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+Response = Tuple[int, Dict[str, Any], Dict[str, str]]
+
+
+class HTTPError(Exception):
+    """An error answered with ``status`` and a JSON ``{"error": message}`` body"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class ExplainerServer:
+    """Serves CodeExplainerAgent queries over a small JSON/HTTP API.
+
+    One agent, and with it the parsed inputs, session caches, client pool and
+    rate budget, lives for the whole process, so repeated queries are answered
+    from memory. At most ``max_in_flight`` queries run at once and up to
+    ``max_queued`` more wait for a slot; beyond that requests are rejected
+    with 503 and a ``Retry-After`` header instead of piling up.
+
+    Endpoints:
+        GET /health  liveness plus load and cache statistics
+        POST /query  ``{"query": ..., "input": ...}`` -> the process_query result
+    """
+
+    def __init__(
+        self,
+        agent: CodeExplainerAgent,
+        host: str = DEFAULT_SERVER_HOST,
+        port: int = DEFAULT_SERVER_PORT,
+        unix_socket: Optional[str] = None,
+        default_input: Optional[str] = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.default_input = default_input
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.stats: Counter = Counter()
+        self._in_flight = 0
+        self._queued = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._started = time.monotonic()
+
+    @property
+    def address(self) -> str:
+        """Where the server listens, once started"""
+        if self.unix_socket:
+            return self.unix_socket
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def run(self) -> None:
+        """Serve until interrupted, on the agent's long-lived event loop"""
+        run_sync(self.serve())
+
+    async def serve(self) -> None:
+        await self.start()
+        logger.info(f"Serving on {self.address}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Start listening and warm the default input; returns the asyncio server"""
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._started = time.monotonic()
+        if self.default_input:
+            # Parse the inventory now so the first query does not pay for it
+            await asyncio.to_thread(self.agent.open_functions, self.default_input)
+
+        if self.unix_socket:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=self.unix_socket
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port
+            )
+        return self._server
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.monotonic() - self._started, 3),
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "requests": dict(self.stats),
+            "session": self.agent.session.stats(),
+        }
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), KEEPALIVE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as e:
+                    await self._write_response(
+                        writer, e.status, {"error": e.message}, e.headers, keep_alive=False
+                    )
+                    break
+                if request is None:
+                    break
+
+                method, path, keep_alive, body = request
+                status, payload, headers = await self._dispatch(method, path, body)
+                await self._write_response(writer, status, payload, headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # The client went away; nothing left to answer
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, bool, bytes]]:
+        """Read one HTTP/1.x request; None when the client closed the connection"""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" or (
+            version == "HTTP/1.1" and connection != "close"
+        )
+        return method.upper(), target.split("?", 1)[0], keep_alive, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Response:
+        try:
+            if path == "/health":
+                if method != "GET":
+                    raise HTTPError(405, "Use GET /health")
+                return 200, self.health(), {}
+            if path == "/query":
+                if method != "POST":
+                    raise HTTPError(405, "Use POST /query")
+                return 200, await self._query(body), {}
+            raise HTTPError(404, f"No such endpoint: {path}")
+        except HTTPError as e:
+            if e.status == 503:
+                self.stats["rejected"] += 1
+            return e.status, {"error": e.message}, e.headers
+
+    async def _query(self, body: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+        if not isinstance(request, dict) or not isinstance(request.get("query"), str):
+            raise HTTPError(400, 'Expected a JSON object with a "query" string')
+        input_path = request.get("input") or self.default_input
+        if not isinstance(input_path, str):
+            raise HTTPError(400, 'Expected an "input" path; the server has no default input')
+        if not os.path.exists(input_path):
+            # Checked up front so a typo never costs a triage request
+            raise HTTPError(400, f"Input not found: {input_path}")
+
+        # Backpressure: refuse work that would only wait behind a full queue
+        if self._in_flight + self._queued >= self.max_in_flight + self.max_queued:
+            raise HTTPError(
+                503,
+                "Server is busy, retry later",
+                {"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        self._in_flight += 1
+        started = time.monotonic()
+        try:
+            result = await self.agent.aprocess_query(request["query"], input_path)
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.exception(f"Query failed: {request['query']}")
+            raise HTTPError(500, str(e))
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+        self.stats["queries"] += 1
+        logger.info(
+            f"Answered query in {(time.monotonic() - started) * 1000:.1f}ms: {request['query']}"
+        )
+        return result
+
+    async def _write_response(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        keep_alive: bool,
+    ) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from agents.types import ActionType
+from core.extractor import tree_fingerprint
+from core.function_store import FunctionStore
+from core.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SUMMARIES = 10_000
+DEFAULT_MAX_ANALYSES = 64
+DEFAULT_MAX_TRIAGES = 256
+DEFAULT_MAX_INPUTS = 16
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def input_digest(path: str) -> str:
+    """Content digest of an input file, or of the source files below a directory."""
+    if os.path.isdir(path):
+        return tree_fingerprint(path)
+    return file_digest(path)
+
+
+class _LoadedInput:
+    __slots__ = ("mtime_ns", "size", "digest", "store")
+
+    def __init__(self, mtime_ns: int, size: int, digest: str, store: FunctionStore):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.store = store
+
+
+def close_store(store: FunctionStore) -> None:
+    """Release a store's file and mapping, if it holds any."""
+    close = getattr(store, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except BufferError:
+        # NumPy views of the mapping are still alive; it is released with them
+        logger.debug("Input store still in use; leaving it to be collected")
+
+
+class AgentSession:
+    """State kept by CodeExplainerAgent across queries in one session.
+
+    Holds up to ``max_inputs`` parsed inputs (reloaded only when the file
+    actually changes) and in-memory LRUs of triage decisions, function
+    summaries and overall analyses, so repeated or overlapping questions
+    need no API calls. Inputs that are replaced or evicted are closed;
+    ``close`` closes the rest.
+    """
+
+    def __init__(
+        self,
+        max_summaries: int = DEFAULT_MAX_SUMMARIES,
+        max_analyses: int = DEFAULT_MAX_ANALYSES,
+        max_triages: int = DEFAULT_MAX_TRIAGES,
+        max_inputs: int = DEFAULT_MAX_INPUTS,
+    ):
+        self.summaries: LRUCache[str] = LRUCache(max_summaries)
+        self.analyses: LRUCache[str] = LRUCache(max_analyses)
+        self.triages: LRUCache[ActionType] = LRUCache(max_triages)
+        self.max_inputs = max_inputs
+        self._inputs: "OrderedDict[str, _LoadedInput]" = OrderedDict()
+        self._inputs_lock = threading.Lock()
+
+    def get_store(
+        self, path: str, loader: Callable[[str], FunctionStore]
+    ) -> FunctionStore:
+        """Return the parsed input for ``path``, loading it only if it changed.
+
+        A matching mtime and size is trusted as-is; otherwise the content hash
+        decides, so touching a file without editing it does not force a reload.
+        Safe to call from several threads; concurrent callers share one load.
+        """
+        with self._inputs_lock:
+            return self._get_store(path, loader)
+
+    def _get_store(
+        self, path: str, loader: Callable[[str], FunctionStore]
+    ) -> FunctionStore:
+        stat = os.stat(path)
+        loaded = self._inputs.get(path)
+        if loaded is not None:
+            self._inputs.move_to_end(path)
+            # A directory's own mtime misses edits to the files below it
+            unchanged = (loaded.mtime_ns, loaded.size) == (stat.st_mtime_ns, stat.st_size)
+            if unchanged and not os.path.isdir(path):
+                return loaded.store
+            digest = input_digest(path)
+            if digest == loaded.digest:
+                loaded.mtime_ns, loaded.size = stat.st_mtime_ns, stat.st_size
+                return loaded.store
+            logger.info(f"Input changed, reloading: {path}")
+        else:
+            digest = input_digest(path)
+
+        store = loader(path)
+        if loaded is not None:
+            close_store(loaded.store)
+        self._inputs[path] = _LoadedInput(stat.st_mtime_ns, stat.st_size, digest, store)
+        self._inputs.move_to_end(path)
+        while len(self._inputs) > self.max_inputs:
+            _, evicted = self._inputs.popitem(last=False)
+            close_store(evicted.store)
+        return store
+
+    def close(self) -> None:
+        """Close every loaded input."""
+        with self._inputs_lock:
+            for loaded in self._inputs.values():
+                close_store(loaded.store)
+            self._inputs.clear()
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """(hits, misses) for each in-memory cache."""
+        return {
+            "summaries": (self.summaries.hits, self.summaries.misses),
+            "analyses": (self.analyses.hits, self.analyses.misses),
+            "triages": (self.triages.hits, self.triages.misses),
+        }
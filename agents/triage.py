@@ -0,0 +1,149 @@
+import difflib
+import re
+from collections import Counter
+from typing import List, Optional
+
+from agents.types import ActionType
+from core.function_store import FunctionStore
+
+# Fuzzy matching compares against every name, so it is skipped on huge inputs
+MAX_FUZZY_NAMES = 50_000
+DEFAULT_FUZZY_CUTOFF = 0.85
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_IMPORTANT = re.compile(r"\b(top|most important|key|main|important|critical|central)\b")
+_COUNT = re.compile(r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\b")
+_OVERALL = re.compile(
+    r"\b(overall|architecture|codebase|big picture|high[- ]level|analysis|analyze|review)\b"
+)
+_EXPLAIN_ALL = re.compile(
+    r"\b(explain|describe|document|summari[sz]e)\b.*\b(all|every|each|this code|the code|everything)\b"
+    r"|\bwhat does (this|the) code do\b"
+)
+_SPECIFIC_HINT = re.compile(r"\b(function|summari[sz]e|explain|what does|describe)\b")
+
+# Words that look like identifiers but never name a function in a query
+STOP_WORDS = {
+    "what", "does", "do", "the", "this", "that", "code", "function", "functions",
+    "summarize", "summarise", "explain", "describe", "me", "give", "a", "an",
+    "of", "in", "is", "are", "top", "most", "important", "key", "main", "all",
+    "overall", "analysis", "how", "work", "works", "tell", "about", "and",
+    "codebase", "which", "why", "can", "you", "please", "show", "list", "find",
+    "for", "to", "with", "on", "it", "its", "i", "want", "know", "there",
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return " ".join(query.lower().split()).strip(" ?.!")
+
+
+class LocalTriage:
+    """Rule-based triage that resolves obvious queries without an LLM call.
+
+    ``resolve`` returns None whenever the rules are not confident, in which
+    case the caller should fall back to the LLM. ``stats`` counts how each
+    query was decided: ``rules``, ``memo`` or ``llm``.
+    """
+
+    def __init__(self, fuzzy_cutoff: float = DEFAULT_FUZZY_CUTOFF):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.stats: Counter = Counter()
+
+    @property
+    def local_fraction(self) -> float:
+        total = sum(self.stats.values())
+        return (self.stats["rules"] + self.stats["memo"]) / total if total else 0.0
+
+    def candidate_words(self, query: str) -> List[str]:
+        """Words in the query that could be function names."""
+        return [
+            word for word in _IDENTIFIER.findall(query)
+            if word.lower() not in STOP_WORDS
+        ]
+
+    def needs_names(self, query: str) -> bool:
+        """Whether resolving this query depends on the inventory's function names."""
+        return bool(self.candidate_words(query))
+
+    def match_function_names(
+        self, query: str, store: Optional[FunctionStore]
+    ) -> List[str]:
+        """Names in the store that the query mentions, exactly or fuzzily."""
+        words = self.candidate_words(query)
+        if store is None or not words:
+            return []
+
+        exact = [word for word in words if word in store]
+        if exact:
+            return list(dict.fromkeys(exact))
+
+        if len(store) > MAX_FUZZY_NAMES:
+            return []
+
+        names = store.names()
+        lowered = {name.lower(): name for name in names}
+        matches = []
+        for word in words:
+            if word.lower() in lowered:
+                matches.append(lowered[word.lower()])
+                continue
+            # Only identifier-like words are worth a fuzzy comparison
+            if "_" not in word and not any(c.isupper() for c in word[1:]):
+                continue
+            close = difflib.get_close_matches(word, names, n=1, cutoff=self.fuzzy_cutoff)
+            matches.extend(close)
+        return list(dict.fromkeys(matches))
+
+    def resolve(
+        self, query: str, store: Optional[FunctionStore]
+    ) -> Optional[ActionType]:
+        """Resolve the query locally, or return None to defer to the LLM.
+
+        ``store`` may be None when ``needs_names(query)`` is False.
+        """
+        text = normalize_query(query)
+        names = self.match_function_names(query, store)
+        wants_overall = bool(_OVERALL.search(text))
+        wants_important = bool(_IMPORTANT.search(text))
+        wants_all = bool(_EXPLAIN_ALL.search(text))
+
+        if len(names) > 1:
+            return None
+
+        if names:
+            # A named function beats the other rules, unless they clearly compete
+            if wants_all or wants_important or not _SPECIFIC_HINT.search(text):
+                return None
+            return ActionType(
+                summarize_specific_function=True,
+                function_name=names[0],
+                overall_analysis=wants_overall,
+            )
+
+        if wants_important:
+            if wants_all:
+                return None
+            count = _COUNT.search(text)
+            top_n = 3
+            if count:
+                word = count.group(1)
+                top_n = int(word) if word.isdigit() else NUMBER_WORDS[word]
+            return ActionType(
+                find_important_functions=True,
+                top_n=top_n,
+                overall_analysis=wants_overall,
+            )
+
+        if wants_all:
+            return ActionType(explain_code=True, overall_analysis=wants_overall)
+
+        if wants_overall:
+            return ActionType(overall_analysis=True)
+
+        return None
@@ -49,3 +49,18 @@ class ActionType(BaseModel):
         description="Name of the function to summarize if summarize_specific_function is True",
     )
     top_n: int = Field(default=3, description="Number of important functions to find")
+
+
+class FunctionExplanation(BaseModel):
+    """Explanation of one function within a batched summary reply"""
+
+    name: str = Field(description="Function name exactly as given in the prompt")
+    explanation: str = Field(description="Explanation of the function's purpose")
+
+
+class BatchSummary(BaseModel):
+    """Structured reply for a batched summary request"""
+
+    summaries: List[FunctionExplanation] = Field(
+        description="One explanation per function in the batch"
+    )
@@ -0,0 +1,90 @@
+"""Micro-benchmark: PageRank over a synthetic call graph, cold and after a small update.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_centrality --functions 500000 --edges 2000000
+
+With ``--index``, the graph is also written to an inventory and compiled into
+a function index, and pagerank selection is timed on the mapped store.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from core.centrality import CallGraph, CallGraphIndex, pagerank
+from core.function_selector import select_key_functions
+from core.function_store import load_numpy
+from core.index_file import build_index, open_index
+
+np = load_numpy()
+
+
+def make_graph(functions: int, edges: int, seed: int = 0) -> CallGraph:
+    # Calls per function are Poisson distributed; a few callees (helpers,
+    # logging) are called from everywhere, like in real code
+    rng = np.random.default_rng(seed)
+    degree = rng.poisson(edges / functions, functions)
+    indptr = np.zeros(functions + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+    callees = (rng.zipf(1.6, int(indptr[-1])) * 7919 % functions).astype(np.int32)
+    return CallGraph(indptr, callees)
+
+
+def bench_index(graph: CallGraph, top_n: int = 5) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        inventory = os.path.join(workdir, "calls.jsonl")
+        with open(inventory, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"file": "calls.py"}) + "\n")
+            for node in range(graph.size):
+                calls = [f"fn_{callee}" for callee in graph.row(node).tolist()]
+                f.write(json.dumps({"name": f"fn_{node}", "code": "", "calls": calls}) + "\n")
+        started = time.perf_counter()
+        index_path = build_index(inventory)
+        print(f"   index: {(time.perf_counter() - started) * 1000:9.2f} ms to build")
+
+        ranks = CallGraphIndex()
+        with open_index(index_path) as store:
+            for label in ("cold", "same"):
+                started = time.perf_counter()
+                select_key_functions(store, top_n, "pagerank", ranks)
+                print(f"  select: {(time.perf_counter() - started) * 1000:9.2f} ms ({label})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--functions", type=int, default=500_000)
+    parser.add_argument("--edges", type=int, default=2_000_000)
+    parser.add_argument("--changed", type=int, default=10, help="Functions whose calls change")
+    parser.add_argument("--index", action="store_true", help="Also time selection on an index file")
+    args = parser.parse_args()
+    if np is None:
+        raise SystemExit("bench_centrality requires numpy")
+
+    graph = make_graph(args.functions, args.edges)
+    print(f"functions={graph.size} edges={graph.edges}")
+
+    started = time.perf_counter()
+    cold = pagerank(graph)
+    print(f"    cold: {(time.perf_counter() - started) * 1000:9.2f} ms, {cold.iterations} iterations")
+
+    rng = np.random.default_rng(1)
+    changed = {
+        int(row): rng.integers(0, graph.size, 3).tolist()
+        for row in rng.integers(0, graph.size, args.changed)
+    }
+    started = time.perf_counter()
+    graph.update(changed)
+    updated = time.perf_counter()
+    warm = pagerank(graph, start=cold.ranks)
+    finished = time.perf_counter()
+    print(f"  update: {(updated - started) * 1000:9.2f} ms")
+    print(f"    warm: {(finished - updated) * 1000:9.2f} ms, {warm.iterations} iterations")
+
+    if args.index:
+        bench_index(graph)
+
+
+if __name__ == "__main__":
+    main()
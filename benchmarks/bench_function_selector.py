@@ -0,0 +1,76 @@
+"""Micro-benchmark: sort-based vs heap-based vs NumPy top-N selection.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_function_selector --size 1000000 --top-n 10
+"""
+import argparse
+import random
+import timeit
+
+from core.function_selector import (
+    score_columns,
+    score_function,
+    select_key_functions,
+    select_key_functions_vectorized,
+    top_k_indices,
+)
+from core.function_store import load_numpy
+
+np = load_numpy()
+
+
+def make_functions(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"fn_{i}",
+            "code": "",
+            "docstring": "doc" if rng.random() < 0.3 else "",
+            "fan_in": rng.randint(0, 50),
+            "fan_out": rng.randint(0, 20),
+            "is_entry_point": rng.random() < 0.01,
+        }
+        for i in range(size)
+    ]
+
+
+def select_sorted(functions, top_n):
+    # The original implementation, kept here as the baseline
+    return sorted(functions, key=score_function, reverse=True)[:top_n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    functions = make_functions(args.size)
+    candidates = {"sorted": select_sorted, "heap": select_key_functions}
+    if np is not None:
+        candidates["numpy"] = select_key_functions_vectorized
+        # Columns prepared up front, as a columnar store would provide them
+        columns = (
+            np.array([fn["fan_in"] for fn in functions]),
+            np.array([fn["fan_out"] for fn in functions]),
+            np.array([fn["is_entry_point"] for fn in functions]),
+            np.array([bool(fn["docstring"]) for fn in functions]),
+        )
+        candidates["columns"] = lambda fns, top_n: [
+            fns[i] for i in top_k_indices(score_columns(*columns), top_n)
+        ]
+
+    expected = [fn["name"] for fn in select_sorted(functions, args.top_n)]
+    print(f"size={args.size} top_n={args.top_n} repeat={args.repeat}")
+    for name, select in candidates.items():
+        assert [fn["name"] for fn in select(functions, args.top_n)] == expected
+        best = min(
+            timeit.repeat(lambda: select(functions, args.top_n), number=1, repeat=args.repeat)
+        )
+        print(f"{name:>8}: {best * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
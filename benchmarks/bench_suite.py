@@ -0,0 +1,244 @@
+"""End-to-end benchmark suite over synthetic inventories.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite --sizes 1000 10000 100000 --output results.json
+    python -m benchmarks.bench_suite --sizes 1000 10000 --compare results.json
+
+For each inventory size this measures load time, select_key_functions time,
+format_as_markdown/format_as_json time, peak memory and process_query
+latency against the fake model backend. Every size runs in a fresh process,
+so peak memory is not inflated by the sizes before it. Results are written as
+JSON along with the commit they were measured at. --compare prints each
+metric's ratio against an earlier results file and exits with status 1 when
+one regressed by more than --threshold (and by more than timing noise).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.inventory import write_inventory
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_TOP_N = 10
+DEFAULT_LATENCY = 0.05
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 1.2
+RESULTS_VERSION = 1
+
+# Metrics compared by --compare; higher is worse for all of them
+METRICS = [
+    "load_seconds",
+    "select_seconds",
+    "markdown_seconds",
+    "json_seconds",
+    "peak_rss_mb",
+    "query_top_functions_cold_ms",
+    "query_top_functions_warm_ms",
+    "query_specific_function_ms",
+    "query_overall_analysis_ms",
+]
+# Differences below these, by metric unit, are noise and never a regression
+NOISE_FLOOR = {"_seconds": 0.005, "_ms": 5.0, "_mb": 5.0}
+
+
+def timed(fn: Callable[[], Any], repeat: int = 1) -> Tuple[Any, float]:
+    """Result of ``fn()`` and its best time over ``repeat`` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def queries(top_n: int, function_name: str) -> List[Tuple[str, str]]:
+    """Queries timed end to end; all are resolved by local triage"""
+    top = f"What are the {top_n} most important functions?"
+    return [
+        ("top_functions_cold", top),
+        # Same question again, answered from the session caches
+        ("top_functions_warm", top),
+        ("specific_function", f"Summarize {function_name}"),
+        ("overall_analysis", "Give me an overall analysis of this codebase"),
+    ]
+
+
+def run_size(
+    size: int,
+    top_n: int = DEFAULT_TOP_N,
+    latency: float = DEFAULT_LATENCY,
+    seed: int = 0,
+    workdir: Optional[str] = None,
+    repeat: int = DEFAULT_REPEAT,
+) -> Dict[str, Any]:
+    """Benchmark one inventory size; meant to run in a fresh process.
+
+    Local stages and the warm query report their best of ``repeat`` runs;
+    cold queries can only run once.
+    """
+    from agents.chain import CodeExplainerAgent
+    from core.backends import FakeBackend
+    from core.formatter import format_as_json, format_as_markdown
+    from core.function_selector import select_key_functions
+    from core.function_store import FunctionStore
+    from core.input_loader import iter_functions, read_file_name
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        path = os.path.join(tmp, f"synthetic_{size}.jsonl")
+        _, generate_seconds = timed(lambda: write_inventory(path, size, seed))
+        baseline_rss = peak_rss_mb()
+
+        store, load_seconds = timed(
+            lambda: FunctionStore.from_records(iter_functions(path), file=read_file_name(path)),
+            repeat,
+        )
+        _, select_seconds = timed(lambda: select_key_functions(store, top_n), repeat)
+
+        summarized = [
+            {"name": fn["name"], "code": fn["code"], "explanation": f"Explains {fn['name']}."}
+            for fn in store
+        ]
+        _, markdown_seconds = timed(lambda: format_as_markdown(store.file, summarized), repeat)
+        _, json_seconds = timed(lambda: format_as_json(store.file, summarized), repeat)
+        del summarized
+
+        result = {
+            "size": size,
+            "file_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+            "generate_seconds": round(generate_seconds, 4),
+            "load_seconds": round(load_seconds, 4),
+            "select_seconds": round(select_seconds, 4),
+            "markdown_seconds": round(markdown_seconds, 4),
+            "json_seconds": round(json_seconds, 4),
+        }
+
+        backend = FakeBackend(latency=latency, seed=seed)
+        agent = CodeExplainerAgent(backend=backend)
+        # A function outside the top N, so its summary is not cached yet
+        for name, query in queries(top_n, store[len(store) // 2]["name"]):
+            runs = repeat if name.endswith("_warm") else 1
+            _, seconds = timed(lambda: agent.process_query(query, path), runs)
+            result[f"query_{name}_ms"] = round(seconds * 1000, 2)
+        result["model_requests"] = backend.stats["requests"]
+
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    result["peak_rss_growth_mb"] = round(peak_rss_mb() - baseline_rss, 1)
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    sizes: List[int],
+    top_n: int = DEFAULT_TOP_N,
+    latency: float = DEFAULT_LATENCY,
+    seed: int = 0,
+    workdir: Optional[str] = None,
+    repeat: int = DEFAULT_REPEAT,
+) -> Dict[str, Any]:
+    # A fresh interpreter per size keeps each peak memory reading independent
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in sizes:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_size, (size, top_n, latency, seed, workdir, repeat))
+        print(
+            f"size={size:>9}: load {result['load_seconds']:.3f}s, "
+            f"select {result['select_seconds']:.3f}s, "
+            f"markdown {result['markdown_seconds']:.3f}s, json {result['json_seconds']:.3f}s, "
+            f"peak {result['peak_rss_mb']:.0f} MB, "
+            f"cold query {result['query_top_functions_cold_ms']:.0f} ms, "
+            f"warm query {result['query_top_functions_warm_ms']:.1f} ms"
+        )
+        results.append(result)
+
+    return {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"top_n": top_n, "latency": latency, "seed": seed, "repeat": repeat},
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print current/baseline ratios; returns the metrics that regressed"""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (threshold {threshold}x):")
+    previous = {result["size"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(result["size"])
+        if before is None:
+            continue
+        for metric in METRICS:
+            if not before.get(metric) or metric not in result:
+                continue
+            ratio = result[metric] / before[metric]
+            floor = next(value for unit, value in NOISE_FLOOR.items() if metric.endswith(unit))
+            flag = ""
+            if ratio > threshold and result[metric] - before[metric] > floor:
+                flag = "  REGRESSION"
+                regressions.append(f"{result['size']}:{metric}")
+            print(f"  size={result['size']:>9} {metric:<30} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY,
+                        help="Seconds per fake model request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Runs per local stage; the best time is kept")
+    parser.add_argument("--workdir", type=str, default=None,
+                        help="Where temporary inventories are written")
+    parser.add_argument("--output", type=str, default=None, help="Write results JSON here")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    report = run_suite(
+        args.sizes, args.top_n, args.latency, args.seed, args.workdir, args.repeat
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
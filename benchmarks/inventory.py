@@ -0,0 +1,100 @@
+"""Synthetic FunctionInfo inventories for benchmarks.
+
+Run from the repository root to write one to disk:
+
+    python -m benchmarks.inventory --size 100000 --output inventories/synthetic.jsonl
+
+Inventories are deterministic for a given size and seed. Code sizes follow a
+log-normal distribution (median around ten lines, with a long tail of
+several-hundred-line functions), fan-in follows a power law, so a few
+functions are called from many places, and calls mostly go to functions
+defined nearby.
+"""
+import argparse
+import json
+import math
+import random
+from typing import Iterator
+
+from agents.types import FunctionInfo
+
+MEDIAN_LINES = 10
+LINES_SIGMA = 0.8
+MAX_LINES = 400
+DOCSTRING_RATE = 0.4
+ENTRY_POINT_RATE = 0.01
+MAX_FAN_IN = 10_000
+CALLEE_WINDOW = 1000
+
+VERBS = ["get", "load", "parse", "build", "update", "validate", "render", "send", "compute", "handle"]
+NOUNS = ["user", "order", "config", "session", "report", "token", "record", "event", "cache", "request"]
+
+
+def function_name(index: int, rng: random.Random) -> str:
+    return f"{rng.choice(VERBS)}_{rng.choice(NOUNS)}_{index}"
+
+
+def function_code(name: str, lines: int, callees: list, docstring: str, rng: random.Random) -> str:
+    body = [f"def {name}(data, options=None):"]
+    if docstring:
+        body.append(f'    """{docstring}"""')
+    for line in range(max(1, lines - 1)):
+        if line < len(callees):
+            body.append(f"    value_{line} = {callees[line]}(data)")
+        elif rng.random() < 0.2:
+            body.append(f"    if value_{line % 7} is None:")
+            body.append(f"        return {rng.randint(0, 100)}")
+        else:
+            body.append(f"    result_{line} = data.get('field_{line}', {rng.randint(0, 9)}) * {line}")
+    body.append("    return data")
+    return "\n".join(body)
+
+
+def generate_inventory(size: int, seed: int = 0) -> Iterator[FunctionInfo]:
+    """Yield ``size`` synthetic functions; equal arguments give equal inventories."""
+    rng = random.Random(seed)
+    names = []
+    for index in range(size):
+        name = function_name(index, rng)
+        lines = int(rng.lognormvariate(math.log(MEDIAN_LINES), LINES_SIGMA))
+        lines = min(MAX_LINES, max(1, lines))
+        # Calls mostly go to functions defined nearby, as within a module
+        nearby = names[-CALLEE_WINDOW:]
+        callees = rng.sample(nearby, min(len(nearby), rng.randint(0, max(1, lines // 3))))
+        docstring = ""
+        if rng.random() < DOCSTRING_RATE:
+            action = name.rsplit("_", 1)[0]
+            docstring = f"{action.replace('_', ' ').capitalize()} for the caller."
+        names.append(name)
+        yield {
+            "name": name,
+            "code": function_code(name, lines, callees, docstring, rng),
+            "fan_in": min(MAX_FAN_IN, int(rng.paretovariate(1.2)) - 1),
+            "fan_out": len(callees),
+            "is_entry_point": rng.random() < ENTRY_POINT_RATE,
+            "docstring": docstring,
+        }
+
+
+def write_inventory(path: str, size: int, seed: int = 0) -> str:
+    """Write a synthetic inventory as JSON Lines, one function at a time."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"file": f"synthetic_{size}.py"}) + "\n")
+        for fn in generate_inventory(size, seed):
+            f.write(json.dumps(fn) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, required=True)
+    args = parser.parse_args()
+
+    write_inventory(args.output, args.size, args.seed)
+    print(f"Wrote {args.size} functions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from typing import Dict, List, Optional, Tuple
+
+from core.defaults import DEFAULT_ANALYSIS_TOKEN_BUDGET, MIN_ANALYSIS_TOKEN_BUDGET
+
+# Room left in every prompt for the template's own instructions
+PROMPT_OVERHEAD_TOKENS = 300
+# No single item may take more than this share of a prompt, so every group
+# holds several items and each reduce round shrinks the input
+MAX_ITEM_SHARE = 4
+
+
+def module_of(name: str) -> str:
+    """The dotted prefix of a qualified function name, or "" for a bare name."""
+    return name.rpartition(".")[0]
+
+
+def item_token_limit(token_budget: int) -> int:
+    return max(1, (token_budget - PROMPT_OVERHEAD_TOKENS) // MAX_ITEM_SHARE)
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text down to roughly ``tokens`` tokens, using the same estimate as the rate limiter."""
+    limit = tokens * 4
+    return text if len(text) <= limit else text[:limit].rstrip() + " …"
+
+
+class GroupPacker:
+    """pack_groups fed one item at a time, reporting each group once it is complete.
+
+    A group is complete when the next item with its key does not fit, so
+    work on it can start before the remaining items are known.
+    """
+
+    def __init__(self, token_budget: int):
+        self.budget = max(1, token_budget - PROMPT_OVERHEAD_TOKENS)
+        self._open: Dict[str, Tuple[List[int], int]] = {}
+        # Complete groups per key, keys in order of first appearance
+        self._groups: Dict[str, List[List[int]]] = {}
+
+    def add(self, index: int, cost: int, key: str = "") -> Optional[List[int]]:
+        """Add an item; returns the group it completed, if any."""
+        groups = self._groups.setdefault(key, [])
+        current, current_tokens = self._open.get(key, ([], 0))
+        completed = None
+        if current and current_tokens + cost > self.budget:
+            groups.append(current)
+            completed, current, current_tokens = current, [], 0
+        current.append(index)
+        self._open[key] = (current, current_tokens + cost)
+        return completed
+
+    def finish(self) -> List[List[int]]:
+        """Complete the open groups and return every group in packing order."""
+        for key, (current, _) in self._open.items():
+            self._groups[key].append(current)
+        self._open = {}
+        return [group for groups in self._groups.values() for group in groups]
+
+
+def pack_groups(
+    costs: List[int], token_budget: int, keys: Optional[List[str]] = None
+) -> List[List[int]]:
+    """Greedily pack items, in order, into groups of indexes within a token budget.
+
+    With ``keys``, items sharing a key are packed together and a group never
+    mixes keys; keys are visited in order of first appearance. Keeping the
+    grouping stable means an edit to one module only changes that module's
+    groups, so the other groups' cached analyses stay valid.
+    """
+    packer = GroupPacker(token_budget)
+    for index, cost in enumerate(costs):
+        packer.add(index, cost, keys[index] if keys else "")
+    return packer.finish()
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+from core.cache import make_key
+from core.defaults import DEFAULT_FAKE_LATENCY
+from core.clients import ClientProvider, clients as shared_clients
+from core.scheduler import (
+    RequestScheduler,
+    TransientBackendError,
+    BackendRateLimitError,
+    scheduler as shared_scheduler,
+)
+from core.tokens import estimate_messages_tokens, estimate_prompt_tokens
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+Messages = List[Dict[str, str]]
+Tool = Dict[str, Any]
+
+# Words per streamed chunk from the fake backend
+FAKE_STREAM_CHUNK_WORDS = 4
+
+_FUNCTION_NAME = re.compile(r"^### Function Name: (.+)$", re.MULTILINE)
+
+
+def iter_stream_text(stream) -> Iterator[str]:
+    """Text deltas from a streaming chat completion."""
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def tool_name(tool: Optional[Tool]) -> Optional[str]:
+    return tool["function"]["name"] if tool is not None else None
+
+
+class ModelBackend:
+    """Where the agent's chat requests go: summaries, triage and analyses.
+
+    Subclasses implement the raw requests; the public methods send every
+    request through the shared scheduler, so rate limits, retries and
+    coalescing of identical in-flight requests behave the same whatever the
+    backend. With ``tool`` set, the reply is the forced tool call's JSON
+    arguments instead of the message text.
+    """
+
+    name = "base"
+
+    def __init__(self, scheduler: Optional[RequestScheduler] = None):
+        self.scheduler = scheduler or shared_scheduler
+
+    def model_id(self, model: str) -> str:
+        """Name of ``model`` in cache keys, so backends never share cached replies"""
+        return model
+
+    def complete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: Optional[float] = None,
+        tool: Optional[Tool] = None,
+    ) -> str:
+        return self.scheduler.call(
+            lambda: self._complete(messages, model, temperature, tool),
+            tokens=estimate_messages_tokens(messages),
+            key=self._request_key(messages, model, temperature, tool),
+        )
+
+    async def acomplete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: Optional[float] = None,
+        tool: Optional[Tool] = None,
+    ) -> str:
+        return await self.scheduler.acall(
+            lambda: self._acomplete(messages, model, temperature, tool),
+            tokens=estimate_messages_tokens(messages),
+            key=self._request_key(messages, model, temperature, tool),
+        )
+
+    def stream(
+        self, messages: Messages, model: str, temperature: Optional[float] = None
+    ) -> Iterator[str]:
+        """Yield the reply text as it is generated"""
+        # A stream can only be read once, so streamed requests are never coalesced
+        return self.scheduler.call(
+            lambda: self._open_stream(messages, model, temperature),
+            tokens=estimate_messages_tokens(messages),
+        )
+
+    def _request_key(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: Optional[float],
+        tool: Optional[Tool],
+    ) -> str:
+        return make_key("chat", self.model_id(model), temperature, tool_name(tool), messages)
+
+    def _complete(
+        self, messages: Messages, model: str, temperature: Optional[float], tool: Optional[Tool]
+    ) -> str:
+        raise NotImplementedError
+
+    async def _acomplete(
+        self, messages: Messages, model: str, temperature: Optional[float], tool: Optional[Tool]
+    ) -> str:
+        raise NotImplementedError
+
+    def _open_stream(
+        self, messages: Messages, model: str, temperature: Optional[float]
+    ) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class OpenAIBackend(ModelBackend):
+    """Chat completions from the OpenAI API, over the provider's shared clients"""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        clients: Optional[ClientProvider] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
+        super().__init__(scheduler)
+        self.clients = clients or shared_clients
+
+    @classmethod
+    def for_client(
+        cls,
+        client: Optional["OpenAI"] = None,
+        async_client: Optional["AsyncOpenAI"] = None,
+    ) -> "OpenAIBackend":
+        """A backend over given clients; the shared provider when both are None"""
+        if client is None and async_client is None:
+            return cls()
+        return cls(ClientProvider(client=client, async_client=async_client))
+
+    def _request(
+        self, messages: Messages, model: str, temperature: Optional[float], tool: Optional[Tool]
+    ) -> Dict[str, Any]:
+        request: Dict[str, Any] = {"model": model, "messages": messages}
+        if temperature is not None:
+            request["temperature"] = temperature
+        if tool is not None:
+            request["tools"] = [tool]
+            request["tool_choice"] = {"type": "function", "function": {"name": tool_name(tool)}}
+        return request
+
+    @staticmethod
+    def _reply(response, tool: Optional[Tool]) -> str:
+        message = response.choices[0].message
+        if tool is None:
+            return message.content
+        if not message.tool_calls:
+            raise ValueError("Reply did not contain a tool call")
+        return message.tool_calls[0].function.arguments
+
+    def _complete(self, messages, model, temperature, tool) -> str:
+        response = self.clients.client.chat.completions.create(
+            **self._request(messages, model, temperature, tool)
+        )
+        return self._reply(response, tool)
+
+    async def _acomplete(self, messages, model, temperature, tool) -> str:
+        response = await self.clients.async_client.chat.completions.create(
+            **self._request(messages, model, temperature, tool)
+        )
+        return self._reply(response, tool)
+
+    def _open_stream(self, messages, model, temperature) -> Iterator[str]:
+        stream = self.clients.client.chat.completions.create(
+            stream=True, **self._request(messages, model, temperature, None)
+        )
+        return iter_stream_text(stream)
+
+
+class FakeBackend(ModelBackend):
+    """Local, deterministic stand-in for load tests; no network and no quota.
+
+    Every reply is derived from a hash of the request, and so are its latency
+    (``latency`` seconds, give or take up to ``jitter``) and its failures:
+    ``error_rate`` of attempts fail with a retryable error and
+    ``rate_limit_rate`` with a rate-limit error. A retried request gets a
+    fresh draw, so runs with the same ``seed`` behave identically however the
+    requests interleave. Tool calls are answered for the agent's own tools:
+    batched summaries name every function in the prompt, and triage asks to
+    explain the code.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = DEFAULT_FAKE_LATENCY,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+        scheduler: Optional[RequestScheduler] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__(scheduler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.stats: Counter = Counter()
+        self._sleep = sleep
+        self._attempts: Counter = Counter()
+
+    def model_id(self, model: str) -> str:
+        return f"{self.name}:{model}"
+
+    def _draw(self, messages: Messages, model: str, tool: Optional[Tool]):
+        """Delay and outcome of this attempt at the request"""
+        digest = make_key(model, tool_name(tool), messages)
+        attempt = self._attempts[digest]
+        self._attempts[digest] += 1
+        rng = random.Random(f"{self.seed}:{digest}:{attempt}")
+        delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        roll = rng.random()
+        self.stats["requests"] += 1
+        return digest, delay, roll
+
+    def _check(self, roll: float) -> None:
+        if roll < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            raise BackendRateLimitError("Fake backend rate limit")
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            raise TransientBackendError("Fake backend error")
+
+    def _reply(self, digest: str, messages: Messages, tool: Optional[Tool]) -> str:
+        if tool is None:
+            return (
+                f"Stand-in reply {digest[:12]} to a {estimate_messages_tokens(messages)}"
+                "-token prompt."
+            )
+        if tool_name(tool) == "record_summaries":
+            names = _FUNCTION_NAME.findall(messages[-1]["content"])
+            return json.dumps(
+                {
+                    "summaries": [
+                        {"name": name, "explanation": f"Stand-in summary of {name}."}
+                        for name in names
+                    ]
+                }
+            )
+        if tool_name(tool) == "determine_action":
+            return json.dumps({"explain_code": True})
+        return "{}"
+
+    def _complete(self, messages, model, temperature, tool) -> str:
+        digest, delay, roll = self._draw(messages, model, tool)
+        self._sleep(delay)
+        self._check(roll)
+        return self._reply(digest, messages, tool)
+
+    async def _acomplete(self, messages, model, temperature, tool) -> str:
+        digest, delay, roll = self._draw(messages, model, tool)
+        await asyncio.sleep(delay)
+        self._check(roll)
+        return self._reply(digest, messages, tool)
+
+    def _open_stream(self, messages, model, temperature) -> Iterator[str]:
+        digest, delay, roll = self._draw(messages, model, None)
+        # Latency is time to first token; the rest arrives at once
+        self._sleep(delay)
+        self._check(roll)
+        words = self._reply(digest, messages, None).split(" ")
+        return iter(
+            [
+                " ".join(words[i : i + FAKE_STREAM_CHUNK_WORDS])
+                + (" " if i + FAKE_STREAM_CHUNK_WORDS < len(words) else "")
+                for i in range(0, len(words), FAKE_STREAM_CHUNK_WORDS)
+            ]
+        )
+
+
+BACKENDS = {
+    OpenAIBackend.name: OpenAIBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def create_backend(name: str, **options: Any) -> ModelBackend:
+    """Build a backend by name (see BACKENDS)"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend: {name} (choose from {', '.join(BACKENDS)})")
+    return backend_class(**options)
@@ -0,0 +1,63 @@
+from typing import Callable, Dict, List
+
+from agents.types import FunctionInfo, BatchSummary
+
+DEFAULT_BATCH_TOKEN_BUDGET = 3000
+MAX_BATCH_SIZE = 25
+
+
+def pack_batches(
+    functions: List[FunctionInfo],
+    cost: Callable[[FunctionInfo], int],
+    token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> List[List[int]]:
+    """Greedily pack functions, in order, into batches of indexes.
+
+    A batch never exceeds ``token_budget`` (except a single oversized function,
+    which gets a batch of its own), never holds more than ``max_batch_size``
+    functions, and never contains the same function name twice, since replies
+    are keyed by name.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    current_names = set()
+
+    for index, fn in enumerate(functions):
+        tokens = cost(fn)
+        if current and (
+            current_tokens + tokens > token_budget
+            or len(current) >= max_batch_size
+            or fn["name"] in current_names
+        ):
+            batches.append(current)
+            current, current_tokens, current_names = [], 0, set()
+
+        current.append(index)
+        current_tokens += tokens
+        current_names.add(fn["name"])
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def parse_batch_reply(arguments: str, names: List[str]) -> Dict[str, str]:
+    """Parse a batched tool-call reply into a name -> explanation mapping.
+
+    Raises ValueError if the reply is not valid JSON for the BatchSummary
+    schema. Entries for names that were not requested are dropped, and empty
+    explanations are treated as missing.
+    """
+    reply = BatchSummary.model_validate_json(arguments)
+
+    wanted = set(names)
+    explanations = {}
+    for item in reply.summaries:
+        explanation = item.explanation.strip()
+        if item.name in wanted and explanation:
+            explanations[item.name] = explanation
+
+    return explanations
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from agents.types import FunctionInfo
+from agents.prompt_templates import PROMPT_TEMPLATE_VERSION
+from core.compaction import code_token_limit
+from core.defaults import DEFAULT_CACHE_DIR
+from core.function_store import field_value
+
+CACHE_FILE_NAME = "summaries.sqlite3"
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+# Hits whose access times are held back before being written in one transaction
+ACCESS_FLUSH_SIZE = 1024
+
+# FunctionInfo fields that feed function_summary_prompt_template
+PROMPT_FIELDS = ("name", "code", "docstring", "fan_in", "fan_out", "is_entry_point")
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable content hash from JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def function_fingerprint(fn: FunctionInfo) -> Dict[str, Any]:
+    return {field: field_value(fn, field) for field in PROMPT_FIELDS}
+
+
+def summary_key(fn: FunctionInfo, model: str, temperature: float) -> str:
+    """Cache key for a single-function summary."""
+    parts = ["summary", model, temperature, PROMPT_TEMPLATE_VERSION, function_fingerprint(fn)]
+    # Code that may be compacted is summarized from what fits the model's
+    # limit, so a different limit is a different prompt
+    limit = code_token_limit(model)
+    if limit and len(fn.get("code") or "") > limit:
+        parts.append(limit)
+    return make_key(*parts)
+
+
+class SummaryCache:
+    """Content-addressed on-disk cache of model responses backed by SQLite.
+
+    Entries expire after ``ttl_seconds`` and the least recently used ones are
+    evicted once the store exceeds ``max_entries`` or ``max_bytes``. A hit
+    does not write to disk: access times are collected and written together
+    before the next eviction check, every ``ACCESS_FLUSH_SIZE`` hits and on
+    ``close``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+    ):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILE_NAME)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Commits append to the write-ahead log without waiting for an fsync
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+        )
+        self._conn.commit()
+        self._count, self._total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._delete(key)
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+                self._flush_accessed()
+                self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._flush_accessed()
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._count += 1
+            self._total += size
+            self._evict()
+            self._conn.commit()
+
+    def _flush_accessed(self) -> None:
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            self._accessed = {}
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute(
+            "SELECT size FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count -= 1
+            self._total -= row[0]
+
+    def _over_limit(self) -> bool:
+        return self._count > self.max_entries or self._total > self.max_bytes
+
+    def _evict(self) -> None:
+        if not self._over_limit():
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at ASC"
+        )
+        doomed = []
+        for key, size in rows:
+            if not self._over_limit():
+                break
+            doomed.append((key,))
+            self._count -= 1
+            self._total -= size
+        rows.close()
+
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._accessed = {}
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._count = 0
+            self._total = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": self._count,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_accessed()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,270 @@
+import threading
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from agents.types import FunctionInfo
+from core.function_store import FunctionStore, load_numpy
+
+DEFAULT_DAMPING = 0.85
+# Iteration stops once the ranks move less than this in total (L1)
+DEFAULT_TOLERANCE = 1e-6
+DEFAULT_MAX_ITERATIONS = 100
+
+
+def _require_numpy():
+    np = load_numpy()
+    if np is None:
+        raise ImportError("call graph centrality requires numpy")
+    return np
+
+
+class CallGraph:
+    """Directed call graph in compressed sparse row (CSR) form.
+
+    Nodes are function rows; row ``u`` lists the rows ``u`` calls as
+    ``callees[indptr[u]:indptr[u + 1]]``. A function's calls are replaced
+    as one slice, so ``update`` only copies the arrays once however many
+    rows changed.
+    """
+
+    __slots__ = ("indptr", "callees")
+
+    def __init__(self, indptr, callees):
+        self.indptr = indptr
+        self.callees = callees
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[int]]) -> "CallGraph":
+        """Graph whose row ``u`` calls ``rows[u]``."""
+        np = _require_numpy()
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, rows), dtype=np.int64, count=len(rows)), out=indptr[1:])
+        callees = np.fromiter(chain.from_iterable(rows), dtype=np.int32, count=int(indptr[-1]))
+        return cls(indptr, callees)
+
+    @property
+    def size(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def edges(self) -> int:
+        return len(self.callees)
+
+    def row(self, node: int):
+        return self.callees[self.indptr[node]:self.indptr[node + 1]]
+
+    def out_degree(self):
+        return self.indptr[1:] - self.indptr[:-1]
+
+    def update(self, changed: Mapping[int, Sequence[int]], size: Optional[int] = None) -> None:
+        """Replace the calls of the ``changed`` rows, growing the graph to ``size`` rows.
+
+        New rows that are not in ``changed`` call nothing.
+        """
+        np = _require_numpy()
+        old_size = self.size
+        size = max(old_size, size or 0, max(changed, default=-1) + 1)
+        lengths = np.zeros(size, dtype=np.int64)
+        lengths[:old_size] = self.out_degree()
+
+        pieces = []
+        start = 0
+        for node in sorted(changed):
+            if node < old_size:
+                pieces.append(self.callees[start:self.indptr[node]])
+                start = self.indptr[node + 1]
+            else:
+                pieces.append(self.callees[start:])
+                start = self.edges
+            pieces.append(np.asarray(changed[node], dtype=np.int32))
+            lengths[node] = len(changed[node])
+        pieces.append(self.callees[start:])
+
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        self.callees = np.concatenate(pieces).astype(np.int32, copy=False)
+
+
+class PageRank(NamedTuple):
+    ranks: Any
+    iterations: int
+
+
+def pagerank(
+    graph: CallGraph,
+    damping: float = DEFAULT_DAMPING,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+    start=None,
+) -> PageRank:
+    """PageRank of every node by vectorized power iteration.
+
+    A function ranks high when it is called by many functions or by other
+    high-ranking ones. Functions that call nothing spread their rank evenly.
+    ``start`` seeds the iteration, typically with the ranks from before a
+    small change, which then converge in a few iterations.
+    """
+    np = _require_numpy()
+    size = graph.size
+    if size == 0:
+        return PageRank(np.zeros(0), 0)
+
+    degree = graph.out_degree()
+    dangling = np.flatnonzero(degree == 0)
+    inverse = np.zeros(size)
+    np.divide(1.0, degree, out=inverse, where=degree > 0)
+
+    if start is None:
+        ranks = np.full(size, 1.0 / size)
+    else:
+        ranks = np.asarray(start, dtype=np.float64)
+        total = ranks.sum()
+        ranks = ranks / total if total > 0 else np.full(size, 1.0 / size)
+
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        # Each caller's rank split over its calls, scattered onto the callees
+        shares = np.repeat(ranks * inverse, degree)
+        updated = np.bincount(graph.callees, weights=shares, minlength=size)
+        # Without edges bincount returns integers
+        updated = updated.astype(np.float64, copy=False)
+        updated *= damping
+        updated += (1.0 - damping + damping * ranks[dangling].sum()) / size
+        change = np.abs(updated - ranks).sum()
+        ranks = updated
+        if change < tolerance:
+            break
+    return PageRank(ranks, iterations)
+
+
+class CallGraphIndex:
+    """PageRank of an inventory's call graph, kept up to date as it changes.
+
+    Edges come from each function's ``calls`` (callee names, as written by
+    the source extractor). ``rank`` compares the functions with the ones it
+    saw last: when functions were only appended or had their calls changed,
+    just those rows of the graph are replaced and the previous ranks seed
+    the iteration; otherwise the graph is rebuilt, still seeded by name.
+    A store ranked last time and not grown since is not read again, and an
+    index file's call graph is used as stored instead of decoding each
+    row's ``calls``. ``stats`` counts builds, updates and iterations.
+    """
+
+    def __init__(
+        self,
+        damping: float = DEFAULT_DAMPING,
+        tolerance: float = DEFAULT_TOLERANCE,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS,
+    ):
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.names: List[str] = []
+        self.graph: Optional[CallGraph] = None
+        self.ranks = None
+        self.stats: Counter = Counter()
+        self._calls: List[Tuple[str, ...]] = []
+        self._rows: Dict[str, int] = {}
+        # Called names without a function, which a new function could resolve
+        self._missing: Set[str] = set()
+        # The store the ranks are for, and its size then; stores only grow
+        self._store: Optional[FunctionStore] = None
+        self._store_size = 0
+        self._lock = threading.Lock()
+
+    def _resolve(self, calls: Tuple[str, ...]) -> List[int]:
+        rows = []
+        for name in calls:
+            row = self._rows.get(name)
+            if row is None:
+                self._missing.add(name)
+            else:
+                rows.append(row)
+        return rows
+
+    def _rebuild(self, names: List[str], calls: List[Tuple[str, ...]]):
+        np = _require_numpy()
+        previous = dict(zip(self.names, self.ranks.tolist())) if self.ranks is not None else {}
+        self._rows = {}
+        for row, name in enumerate(names):
+            # Like FunctionStore, a name refers to its first function
+            self._rows.setdefault(name, row)
+        self._missing = set()
+        self.graph = CallGraph.from_rows([self._resolve(row_calls) for row_calls in calls])
+        self.stats["builds"] += 1
+        if not previous or not names:
+            return None
+        default = 1.0 / len(names)
+        return np.fromiter(
+            (previous.get(name, default) for name in names), dtype=np.float64, count=len(names)
+        )
+
+    def _update(self, names: List[str], calls: List[Tuple[str, ...]]):
+        np = _require_numpy()
+        old_size = len(self.names)
+        for row in range(old_size, len(names)):
+            self._rows.setdefault(names[row], row)
+        changed = {
+            row: self._resolve(calls[row])
+            for row in range(len(names))
+            if row >= old_size or calls[row] != self._calls[row]
+        }
+        self.graph.update(changed, len(names))
+        self.stats["updates"] += 1
+        start = np.full(len(names), 1.0 / len(names))
+        start[:old_size] = self.ranks
+        return start
+
+    def rank(self, functions: Iterable[FunctionInfo]):
+        """PageRank of each function, in the order given.
+
+        ``functions`` is read once, so a stream is fine.
+        """
+        if isinstance(functions, FunctionStore):
+            with self._lock:
+                if functions is self._store and len(functions) == self._store_size:
+                    return self.ranks
+            edges = functions.call_edges()
+            if edges is not None:
+                with self._lock:
+                    return self._rank_stored(functions, CallGraph(*edges))
+            names = functions.names()
+            calls = [tuple(fn.get("calls") or ()) for fn in functions]
+        else:
+            names, calls = [], []
+            for fn in functions:
+                names.append(fn["name"])
+                calls.append(tuple(fn.get("calls") or ()))
+        with self._lock:
+            ranks = self._rank(names, calls)
+            store = functions if isinstance(functions, FunctionStore) else None
+            self._store, self._store_size = store, len(names)
+            return ranks
+
+    def _rank_stored(self, store: FunctionStore, graph: CallGraph):
+        result = pagerank(graph, self.damping, self.tolerance, self.max_iterations)
+        self.stats["builds"] += 1
+        self.stats["iterations"] += result.iterations
+        # Rows are not tracked by name here, so the next list is ranked from scratch
+        self.graph, self.ranks = graph, result.ranks
+        self.names, self._calls, self._rows, self._missing = [], [], {}, set()
+        self._store, self._store_size = store, len(store)
+        return self.ranks
+
+    def _rank(self, names: List[str], calls: List[Tuple[str, ...]]):
+        appended = names[:len(self.names)] == self.names and not self._missing.intersection(
+            names[len(self.names):]
+        )
+        if self.graph is None or self.graph.size != len(self.names) or not appended:
+            start = self._rebuild(names, calls)
+        elif len(names) == len(self.names) and calls == self._calls:
+            return self.ranks
+        else:
+            start = self._update(names, calls)
+
+        result = pagerank(self.graph, self.damping, self.tolerance, self.max_iterations, start)
+        self.stats["iterations"] += result.iterations
+        self.names, self._calls, self.ranks = names, calls, result.ranks
+        return self.ranks
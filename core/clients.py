@@ -0,0 +1,121 @@
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from core.defaults import DEFAULT_MAX_CONNECTIONS
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 60.0
+
+
+class ClientProvider:
+    """Builds the OpenAI clients on first use and shares them.
+
+    The sync and async clients each own one HTTP connection pool, configured
+    here, so every caller holding the same provider reuses the same
+    keep-alive connections. Prebuilt ``client``/``async_client`` instances
+    (e.g. test doubles) are returned as they are. ``base_url`` points the
+    clients at another server, such as a local stand-in.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+        timeout: float = DEFAULT_TIMEOUT,
+        client: Optional["OpenAI"] = None,
+        async_client: Optional["AsyncOpenAI"] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.timeout = timeout
+        self._client = client
+        self._async_client = async_client
+        self._lock = threading.Lock()
+
+    def configure(self, **settings: Any) -> None:
+        """Change pool settings; only clients built after the call use them."""
+        for name, value in settings.items():
+            if not hasattr(self, name) or name.startswith("_"):
+                raise TypeError(f"Unknown client setting: {name}")
+            setattr(self, name, value)
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        # Read .env only when a client is actually built
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        return {
+            "api_key": self.api_key,
+            "base_url": self.base_url,
+            "timeout": self.timeout,
+            # Retries are left to the shared request scheduler
+            "max_retries": 0,
+        }
+
+    def _limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def client(self) -> "OpenAI":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import DefaultHttpxClient, OpenAI
+
+                    self._client = OpenAI(
+                        http_client=DefaultHttpxClient(limits=self._limits(), http2=self.http2),
+                        **self._client_kwargs(),
+                    )
+        return self._client
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+                    self._async_client = AsyncOpenAI(
+                        http_client=DefaultAsyncHttpxClient(
+                            limits=self._limits(), http2=self.http2
+                        ),
+                        **self._client_kwargs(),
+                    )
+        return self._async_client
+
+    def close(self) -> None:
+        """Close the sync client's pool; the async pool closes with its event loop."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+
+
+# Shared by every call site that is not handed a provider of its own
+clients = ClientProvider()
+
+
+def get_client() -> "OpenAI":
+    return clients.client
+
+
+def get_async_client() -> "AsyncOpenAI":
+    return clients.async_client
@@ -0,0 +1,347 @@
+import ast
+import io
+import re
+import textwrap
+import threading
+import tokenize
+from collections import Counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from core.lru import LRUCache
+from core.tokens import base_model, count_tokens
+
+# Strings and collection literals longer than this are cut down to a prefix
+MAX_LITERAL_CHARS = 80
+KEPT_LITERAL_CHARS = 32
+MAX_LITERAL_ITEMS = 8
+KEPT_LITERAL_ITEMS = 3
+# Compacted code bodies remembered per process
+DEFAULT_MEMO_SIZE = 4096
+
+_COMMENT_LINE = re.compile(r"^\s*(#.*)?$")
+_COLLECTIONS = (ast.List, ast.Tuple, ast.Set, ast.Dict)
+# Statements that only compute values; runs of them are elided first, while
+# returns, raises and the headers of compound statements are kept
+_PLAIN_STATEMENTS = (
+    ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Expr, ast.Pass, ast.Delete,
+    ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal, ast.Assert,
+)
+
+
+class ModelLimits(NamedTuple):
+    """Token limits that decide how much code goes into one prompt for a model."""
+
+    context_tokens: int
+    # Code tokens per function before it is compacted
+    max_code_tokens: int
+
+
+# Keyed by model name prefix; the longest matching prefix wins
+MODEL_LIMITS: Dict[str, ModelLimits] = {
+    "gpt-3.5-turbo": ModelLimits(16_385, 1_500),
+    "gpt-4o": ModelLimits(128_000, 4_000),
+    "gpt-4o-mini": ModelLimits(128_000, 2_000),
+    "gpt-4.1": ModelLimits(1_047_576, 8_000),
+    "gpt-4.1-mini": ModelLimits(1_047_576, 4_000),
+    "gpt-4.1-nano": ModelLimits(1_047_576, 2_000),
+}
+DEFAULT_LIMITS = ModelLimits(16_000, 2_000)
+
+
+def model_limits(model: str) -> ModelLimits:
+    name = base_model(model)
+    matches = [prefix for prefix in MODEL_LIMITS if name.startswith(prefix)]
+    return MODEL_LIMITS[max(matches, key=len)] if matches else DEFAULT_LIMITS
+
+
+def set_model_limits(
+    model: str, max_code_tokens: Optional[int] = None, context_tokens: Optional[int] = None
+) -> ModelLimits:
+    """Override the limits of ``model``; unset values keep their current ones."""
+    limits = model_limits(model)
+    limits = ModelLimits(
+        context_tokens if context_tokens is not None else limits.context_tokens,
+        max_code_tokens if max_code_tokens is not None else limits.max_code_tokens,
+    )
+    MODEL_LIMITS[base_model(model)] = limits
+    return limits
+
+
+def code_token_limit(model: str) -> int:
+    """Code tokens allowed per function in a prompt for ``model``; 0 disables compaction."""
+    limits = model_limits(model)
+    # The code must leave room for the rest of the prompt and the reply
+    return min(limits.max_code_tokens, limits.context_tokens // 2)
+
+
+def strip_comments_and_blank_lines(code: str) -> str:
+    """Drop comments and blank lines, leaving the contents of strings alone."""
+    lines = code.split("\n")
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return "\n".join(line for line in lines if not _COMMENT_LINE.match(line))
+
+    inside_strings = set()
+    for token in tokens:
+        if token.type == tokenize.COMMENT:
+            row, col = token.start
+            lines[row - 1] = lines[row - 1][:col].rstrip()
+        elif token.start[0] < token.end[0]:
+            # Lines a multi-line string continues onto are part of its value
+            inside_strings.update(range(token.start[0] + 1, token.end[0] + 1))
+    return "\n".join(
+        line for row, line in enumerate(lines, 1) if line.strip() or row in inside_strings
+    )
+
+
+def _parse(code: str) -> Optional[ast.Module]:
+    try:
+        return ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+
+def _is_constant(node: ast.AST) -> bool:
+    if isinstance(node, ast.UnaryOp):
+        node = node.operand
+    if isinstance(node, ast.Dict):
+        return all(key is not None and _is_constant(key) for key in node.keys) and all(
+            _is_constant(value) for value in node.values
+        )
+    if isinstance(node, _COLLECTIONS):
+        return all(_is_constant(element) for element in node.elts)
+    return isinstance(node, ast.Constant)
+
+
+def _collapsed_literal(code: str, node: ast.AST) -> Optional[str]:
+    """Shorter source for a long literal, or None to keep ``node`` as it is."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes)):
+        if len(node.value) <= MAX_LITERAL_CHARS:
+            return None
+        ellipsis = "..." if isinstance(node.value, str) else b"..."
+        return repr(node.value[:KEPT_LITERAL_CHARS] + ellipsis)
+
+    if not isinstance(node, _COLLECTIONS) or not _is_constant(node):
+        return None
+    source = ast.get_source_segment(code, node) or ""
+    if isinstance(node, ast.Dict):
+        items = [
+            f"{ast.get_source_segment(code, key)}: {ast.get_source_segment(code, value)}"
+            for key, value in zip(node.keys, node.values)
+        ]
+        elided = "...: ..."
+    else:
+        items = [ast.get_source_segment(code, element) for element in node.elts]
+        elided = "..."
+    # Unparenthesized tuples have no brackets to keep
+    if len(items) <= MAX_LITERAL_ITEMS or source[:1] not in "([{" or None in items:
+        return None
+    return source[0] + ", ".join(items[:KEPT_LITERAL_ITEMS] + [elided]) + source[-1]
+
+
+def _literal_replacements(code: str, node: ast.AST) -> Iterator[Tuple[ast.AST, str]]:
+    replacement = _collapsed_literal(code, node)
+    if replacement is not None:
+        yield node, replacement
+    elif not isinstance(node, ast.JoinedStr):
+        # f-string parts have no positions of their own on older Pythons
+        for child in ast.iter_child_nodes(node):
+            yield from _literal_replacements(code, child)
+
+
+def collapse_literals(code: str) -> str:
+    """Cut long string and collection literals down to their first part."""
+    tree = _parse(code)
+    if tree is None:
+        return code
+
+    # AST columns are UTF-8 byte offsets into each line
+    lines = code.encode("utf-8").split(b"\n")
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line) + 1)
+    encoded = code.encode("utf-8")
+    for node, replacement in sorted(
+        _literal_replacements(code, tree),
+        key=lambda item: (item[0].lineno, item[0].col_offset),
+        reverse=True,
+    ):
+        start = starts[node.lineno - 1] + node.col_offset
+        end = starts[node.end_lineno - 1] + node.end_col_offset
+        encoded = encoded[:start] + replacement.encode("utf-8") + encoded[end:]
+    return encoded.decode("utf-8")
+
+
+def _first_line(node: ast.stmt) -> int:
+    decorators = getattr(node, "decorator_list", None)
+    return min([node.lineno] + [d.lineno for d in decorators]) if decorators else node.lineno
+
+
+def _blocks(node: ast.stmt) -> Iterator[List[ast.stmt]]:
+    """The statement lists nested directly in a compound statement."""
+    if (
+        isinstance(node, ast.If)
+        and len(node.orelse) == 1
+        and isinstance(node.orelse[0], ast.If)
+        and node.orelse[0].col_offset == node.col_offset
+    ):
+        # An elif chain: each branch is a block of this statement
+        yield node.body
+        yield from _blocks(node.orelse[0])
+        return
+    for field in ("body", "orelse", "finalbody"):
+        block = getattr(node, field, None)
+        if isinstance(block, list) and block and isinstance(block[0], ast.stmt):
+            yield block
+    for child in getattr(node, "handlers", []) + getattr(node, "cases", []):
+        yield child.body
+
+
+def _elided_regions(block: List[ast.stmt], depth: int, max_depth: int) -> Iterator[Tuple[int, int]]:
+    """Line ranges to elide from ``block``, keeping control flow down to ``max_depth``.
+
+    Bodies nested deeper than ``max_depth`` are elided whole; above it, runs
+    of plain statements are.
+    """
+    if depth > max_depth:
+        yield _first_line(block[0]), block[-1].end_lineno
+        return
+    run: List[ast.stmt] = []
+    for node in block + [None]:
+        if node is not None and isinstance(node, _PLAIN_STATEMENTS) and not isinstance(
+            getattr(node, "value", None), (ast.Yield, ast.YieldFrom, ast.Await)
+        ):
+            run.append(node)
+            continue
+        if run and (len(run) > 1 or run[0].end_lineno > run[0].lineno):
+            yield _first_line(run[0]), run[-1].end_lineno
+        run = []
+        if node is not None:
+            for nested in _blocks(node):
+                yield from _elided_regions(nested, depth + 1, max_depth)
+
+
+def _nesting_depth(block: List[ast.stmt]) -> int:
+    return 1 + max(
+        (_nesting_depth(nested) for node in block for nested in _blocks(node)), default=0
+    )
+
+
+def _elide(code: str, regions: List[Tuple[int, int]]) -> str:
+    lines = code.split("\n")
+    out: List[str] = []
+    row = 1
+    for start, end in sorted(regions):
+        out.extend(lines[row - 1:start - 1])
+        indent = lines[start - 1][: len(lines[start - 1]) - len(lines[start - 1].lstrip())]
+        out.append(f"{indent}...  # {end - start + 1} lines elided")
+        row = end + 1
+    out.extend(lines[row - 1:])
+    return "\n".join(out)
+
+
+def elide_bodies(code: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Replace statements with ``...`` markers until ``code`` fits ``max_tokens``.
+
+    Signatures, returns, raises and the headers of compound statements are
+    kept longest: runs of plain statements go first, largest first, then
+    whole bodies from the innermost level out.
+    """
+    tree = _parse(code)
+    if tree is None:
+        return code
+    for max_depth in range(_nesting_depth(tree.body), -1, -1):
+        regions = sorted(
+            _elided_regions(tree.body, 0, max_depth),
+            key=lambda region: region[1] - region[0],
+            reverse=True,
+        )
+        if count_tokens(_elide(code, regions), model) > max_tokens:
+            continue
+        # Elide only as many of the largest regions as it takes to fit
+        low, high = 0, len(regions)
+        while low < high:
+            middle = (low + high) // 2
+            if count_tokens(_elide(code, regions[:middle]), model) <= max_tokens:
+                high = middle
+            else:
+                low = middle + 1
+        return _elide(code, regions[:low])
+    return _elide(code, regions)
+
+
+def truncate_code(code: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Keep whole leading lines of ``code`` within ``max_tokens``."""
+    lines = code.split("\n")
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        used += count_tokens(line + "\n", model)
+        if used > max_tokens and kept:
+            break
+        kept.append(line)
+    if len(kept) < len(lines):
+        kept.append(f"# ... {len(lines) - len(kept)} more lines")
+    return "\n".join(kept)
+
+
+def compact_code(code: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Shrink ``code`` to about ``max_tokens``, returning it unchanged if it fits.
+
+    Stages run in order until the code fits: stripping comments and blank
+    lines, collapsing long literals, eliding bodies and finally truncating.
+    """
+    if count_tokens(code, model) <= max_tokens:
+        return code
+    code = textwrap.dedent(code)
+    for stage in (strip_comments_and_blank_lines, collapse_literals):
+        code = stage(code)
+        if count_tokens(code, model) <= max_tokens:
+            return code
+    code = elide_bodies(code, max_tokens, model)
+    if count_tokens(code, model) <= max_tokens:
+        return code
+    return truncate_code(code, max_tokens, model)
+
+
+class PromptCompactor:
+    """Compacts function code for prompts and counts the tokens it saves.
+
+    Results are memoized, since the same code is rendered into a prompt
+    several times on its way to the model (budgeting, batching, sending),
+    and ``stats`` counts each distinct compaction once.
+    """
+
+    def __init__(self, memo_size: int = DEFAULT_MEMO_SIZE):
+        self.stats: Counter = Counter()
+        self._memo: LRUCache[str] = LRUCache(memo_size)
+        self._lock = threading.Lock()
+
+    def compact(self, code: str, max_tokens: int, model: Optional[str] = None) -> str:
+        # Every token is at least one character, so shorter code always fits
+        if not max_tokens or len(code) <= max_tokens:
+            return code
+        key = (code, max_tokens, model)
+        with self._lock:
+            compacted = self._memo.get(key)
+        if compacted is not None:
+            return compacted
+
+        before = count_tokens(code, model)
+        compacted = compact_code(code, max_tokens, model) if before > max_tokens else code
+        with self._lock:
+            self._memo.put(key, compacted)
+            if compacted is not code:
+                self.stats["functions"] += 1
+                self.stats["tokens_before"] += before
+                self.stats["tokens_after"] += count_tokens(compacted, model)
+        return compacted
+
+    def saved_fraction(self) -> float:
+        before = self.stats["tokens_before"]
+        return 1 - self.stats["tokens_after"] / before if before else 0.0
+
+
+# Shared by every prompt built in this process
+compactor = PromptCompactor()
@@ -0,0 +1,207 @@
+import random
+import re
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from agents.types import FunctionInfo
+from core.function_store import load_numpy
+
+DEFAULT_DEDUP_THRESHOLD = 0.85
+DEFAULT_NUM_PERM = 64
+# Consecutive tokens per shingle
+SHINGLE_SIZE = 3
+# Clusters kept in the index; once full, new functions are only matched
+DEFAULT_MAX_CLUSTERS = 100_000
+# Name parts shorter than this ("id", "db") are too common to normalize away
+MIN_NAME_PART = 3
+
+# Mersenne prime for the universal hashes (a * x + b) % p; with 32-bit
+# shingle hashes every intermediate value fits in 64 bits
+_PRIME = (1 << 31) - 1
+# Strings and comments come first so their contents are not split up; comments
+# are then dropped
+_TOKEN = re.compile(
+    r"""[rbuRBU]{0,2}(?:'{3}[\s\S]*?'{3}|"{3}[\s\S]*?"{3}|'[^'\n]*'|"[^"\n]*")"""
+    r"|#[^\n]*|[A-Za-z_][A-Za-z0-9_]*|\d+|\S"
+)
+_NAME_PART = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def name_parts(name: str) -> List[str]:
+    """Lower-cased words of a snake_case or camelCase name."""
+    return [part.lower() for part in _NAME_PART.findall(name.rsplit(".", 1)[-1])]
+
+
+def normalized_tokens(fn: FunctionInfo) -> List[str]:
+    """Tokens of a function's code without comments, with its own name parts masked.
+
+    Clones that differ only in the entity they handle (``get_user`` and
+    ``get_order`` reading ``User`` and ``Order``) normalize alike.
+    """
+    parts = [part for part in name_parts(fn["name"]) if len(part) >= MIN_NAME_PART]
+    tokens = []
+    for token in _TOKEN.findall(fn.get("code") or ""):
+        if token[0] == "#":
+            continue
+        # Identifiers and strings; docstrings name the entity too
+        if parts and (token[0].isalpha() or token[0] in "_'\""):
+            token = token.lower()
+            for part in parts:
+                token = token.replace(part, "#")
+        tokens.append(token)
+    return tokens
+
+
+def shingles(tokens: List[str]) -> Set[int]:
+    """32-bit hashes of the overlapping token n-grams."""
+    size = min(SHINGLE_SIZE, len(tokens)) or 1
+    return {
+        zlib.crc32(" ".join(tokens[i:i + size]).encode("utf-8"))
+        for i in range(max(1, len(tokens) - size + 1))
+    }
+
+
+def lsh_shape(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Bands and rows whose LSH candidate threshold is closest below ``threshold``.
+
+    Candidates are then checked against the estimated similarity, so the
+    banding leans towards recall.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class CloneCluster:
+    """Functions whose code is near-identical, sharing one summary."""
+
+    __slots__ = ("name", "summary", "signature")
+
+    def __init__(self, name: str, signature: array):
+        # The function the summary was written for, once there is one
+        self.name = name
+        self.summary: Optional[str] = None
+        self.signature = signature
+
+
+class CloneIndex:
+    """MinHash/LSH index of function bodies for reusing summaries across clones.
+
+    Each function is added in a single pass: it joins the most similar
+    existing cluster whose estimated Jaccard similarity (over shingles of
+    normalized tokens) is at least ``threshold``, or starts a new one.
+    ``stats`` counts functions seen, clusters started and summaries reused.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_DEDUP_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        max_clusters: int = DEFAULT_MAX_CLUSTERS,
+        seed: int = 0,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.max_clusters = max_clusters
+        self.bands, self.rows = lsh_shape(threshold, num_perm)
+        rng = random.Random(seed)
+        self._a = array("Q", (rng.randrange(1, _PRIME) for _ in range(num_perm)))
+        self._b = array("Q", (rng.randrange(0, _PRIME) for _ in range(num_perm)))
+        self._buckets: Dict[Tuple[int, int], List[CloneCluster]] = defaultdict(list)
+        self.clusters = 0
+        self.stats: Counter = Counter()
+
+    def signature(self, fn: FunctionInfo) -> array:
+        hashes = sorted(shingles(normalized_tokens(fn)))
+        numpy = load_numpy()
+        if numpy is not None:
+            values = numpy.array(hashes, dtype=numpy.uint64)
+            a = numpy.frombuffer(self._a, dtype=numpy.uint64)
+            b = numpy.frombuffer(self._b, dtype=numpy.uint64)
+            mixed = (numpy.outer(a, values) + b[:, None]) % numpy.uint64(_PRIME)
+            return array("Q", mixed.min(axis=1).tolist())
+        return array(
+            "Q",
+            (
+                min((a * value + b) % _PRIME for value in hashes)
+                for a, b in zip(self._a.tolist(), self._b.tolist())
+            ),
+        )
+
+    def _band_keys(self, signature: array) -> Iterable[Tuple[int, int]]:
+        for band in range(self.bands):
+            yield band, hash(tuple(signature[band * self.rows:(band + 1) * self.rows]))
+
+    def similarity(self, first: array, second: array) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(x == y for x, y in zip(first, second)) / self.num_perm
+
+    def add(self, fn: FunctionInfo) -> CloneCluster:
+        """The cluster ``fn`` belongs to, starting a new one if none is close enough."""
+        self.stats["functions"] += 1
+        signature = self.signature(fn)
+        keys = list(self._band_keys(signature))
+
+        best, best_similarity = None, 0.0
+        seen = set()
+        for key in keys:
+            for cluster in self._buckets.get(key, ()):
+                if id(cluster) in seen:
+                    continue
+                seen.add(id(cluster))
+                similarity = self.similarity(signature, cluster.signature)
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best, best_similarity = cluster, similarity
+        if best is not None:
+            return best
+
+        cluster = CloneCluster(fn["name"], signature)
+        self.stats["clusters"] += 1
+        if self.clusters < self.max_clusters:
+            self.clusters += 1
+            for key in keys:
+                self._buckets[key].append(cluster)
+        return cluster
+
+
+def _match_case(word: str, like: str) -> str:
+    if like.isupper() and len(like) > 1:
+        return word.upper()
+    if like[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+def adapt_summary(summary: str, source: str, target: str) -> str:
+    """Rewrite a summary of function ``source`` to describe its clone ``target``.
+
+    The name itself is substituted, and so are the words the two names
+    differ in (``get_user`` -> ``get_order`` also turns "users" into
+    "orders"), matching the case they appear in.
+    """
+    if source == target:
+        return summary
+    replacements = {re.escape(source): lambda match: target}
+    source_parts, target_parts = name_parts(source), name_parts(target)
+    if len(source_parts) == len(target_parts):
+        for old, new in zip(source_parts, target_parts):
+            if old != new and len(old) >= MIN_NAME_PART:
+                replacements[rf"(?i:{re.escape(old)})(?=(?:e?s)?\b)"] = (
+                    lambda match, new=new: _match_case(new, match.group(0))
+                )
+    patterns = list(replacements)
+    combined = re.compile("|".join(rf"\b({pattern})" for pattern in patterns))
+
+    def substitute(match: "re.Match") -> str:
+        return replacements[patterns[match.lastindex - 1]](match)
+
+    return combined.sub(substitute, summary)
@@ -0,0 +1,19 @@
+import os
+
+# Defaults the CLI shows in --help. They live in this import-free module so
+# that parsing arguments does not load the modules that use them.
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_CACHE_DIR = os.path.join(".cache", "code_explainer")
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_ANALYSIS_TOKEN_BUDGET = 12000
+# Smallest analysis budget whose group prompts still hold several summaries
+MIN_ANALYSIS_TOKEN_BUDGET = 1000
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 8765
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_QUEUED = 16
+DEFAULT_FAKE_LATENCY = 0.2
+# Ways select_key_functions can rank functions
+SELECTION_STRATEGIES = ("score", "pagerank")
+DEFAULT_SELECTION_STRATEGY = "score"
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from agents.types import FunctionInfo
+from agents.prompt_templates import function_summary_prompt_template
+from core.batching import pack_batches
+from core.defaults import DEFAULT_CONCURRENCY
+from core.cache import SummaryCache, summary_key
+from core.summarizer import (
+    SUMMARY_MODEL,
+    SUMMARY_TEMPERATURE,
+    estimate_prompt_tokens,
+    summarize_function_async,
+    summarize_batch_async,
+)
+
+logger = logging.getLogger(__name__)
+
+SummarizeFn = Callable[[FunctionInfo], Awaitable[str]]
+SummarizeBatchFn = Callable[[List[FunctionInfo]], Awaitable[Dict[str, str]]]
+
+
+class SummarizationEngine:
+    """Summarizes many functions concurrently with bounded parallelism.
+
+    Results are always returned in the same order as the input functions.
+    When a cache is given, cached summaries are served without a request.
+    When ``batch_token_budget`` is set, functions are packed into multi-function
+    requests up to that many prompt tokens; functions missing from a batched
+    reply fall back to single-function requests. ``model`` names the
+    summaries' model in cache keys.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        summarize: SummarizeFn = summarize_function_async,
+        cache: Optional[SummaryCache] = None,
+        batch_token_budget: Optional[int] = None,
+        summarize_batch: SummarizeBatchFn = summarize_batch_async,
+        model: str = SUMMARY_MODEL,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.cache = cache
+        self.batch_token_budget = batch_token_budget
+        self.model = model
+        self.requests_sent = 0
+        self._summarize = summarize
+        self._summarize_batch = summarize_batch
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # One semaphore per event loop, shared by concurrent summarize_all calls
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _request_one(self, semaphore: asyncio.Semaphore, fn: FunctionInfo) -> str:
+        async with semaphore:
+            self.requests_sent += 1
+            return await self._summarize(fn)
+
+    async def _request_batch(
+        self, semaphore: asyncio.Semaphore, batch: List[FunctionInfo]
+    ) -> List[str]:
+        if len(batch) == 1:
+            return [await self._request_one(semaphore, batch[0])]
+
+        async with semaphore:
+            self.requests_sent += 1
+            try:
+                replies = await self._summarize_batch(batch)
+            except ValueError as e:
+                logger.warning(f"Malformed batch reply, falling back to single calls: {e}")
+                replies = {}
+
+        missing = [fn for fn in batch if fn["name"] not in replies]
+        if missing:
+            fallback = await asyncio.gather(
+                *(self._request_one(semaphore, fn) for fn in missing)
+            )
+            replies = dict(replies)
+            replies.update(zip((fn["name"] for fn in missing), fallback))
+
+        return [replies[fn["name"]] for fn in batch]
+
+    async def summarize_all(self, functions: Iterable[FunctionInfo]) -> List[str]:
+        """Summarize every function, returning explanations in input order."""
+        functions = list(functions)
+        results: List[Optional[str]] = [None] * len(functions)
+        keys: List[Optional[str]] = [None] * len(functions)
+
+        pending = []
+        for index, fn in enumerate(functions):
+            if self.cache is not None:
+                keys[index] = summary_key(fn, self.model, SUMMARY_TEMPERATURE)
+                cached = self.cache.get(keys[index])
+                if cached is not None:
+                    results[index] = cached
+                    continue
+            pending.append(index)
+
+        if self.batch_token_budget:
+            pending_fns = [functions[i] for i in pending]
+            batches = [
+                [pending[i] for i in batch]
+                for batch in pack_batches(
+                    pending_fns,
+                    lambda fn: estimate_prompt_tokens(
+                        function_summary_prompt_template(fn, self.model)
+                    ),
+                    self.batch_token_budget,
+                )
+            ]
+        else:
+            batches = [[index] for index in pending]
+
+        semaphore = self._get_semaphore()
+
+        async def complete(batch: List[int]) -> None:
+            summaries = await self._request_batch(semaphore, [functions[i] for i in batch])
+            # Cached as each batch arrives, so a later failure keeps what was paid for
+            for index, summary in zip(batch, summaries):
+                results[index] = summary
+                if keys[index] is not None:
+                    self.cache.set(keys[index], summary)
+
+        tasks = [asyncio.ensure_future(complete(batch)) for batch in batches]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # One failed request fails the call; the others are not left running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return results
+
+    def run(self, functions: Iterable[FunctionInfo]) -> List[str]:
+        """Synchronous wrapper around :meth:`summarize_all`."""
+        return run_sync(self.summarize_all(functions))
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_sync(coro: Awaitable):
+    """Run a coroutine to completion on a long-lived private event loop.
+
+    Reusing one loop keeps the async client's connection pool valid across
+    calls, which ``asyncio.run`` would otherwise close after every call.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
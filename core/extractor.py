@@ -0,0 +1,542 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import textwrap
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from agents.types import FunctionInfo
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_CACHE_FILE_NAME = "extract.sqlite3"
+# Bump whenever parse results change shape so cached files are parsed again
+EXTRACT_VERSION = 1
+SOURCE_SUFFIXES = (".py",)
+SKIPPED_DIRS = frozenset({
+    "__pycache__", "node_modules", "site-packages", "venv", "env", "build", "dist",
+})
+# Trees with fewer files than this are parsed in-process; a pool costs more
+MIN_PARALLEL_FILES = 64
+FILES_PER_TASK = 16
+
+# Decorators that register a function to be called from outside the code:
+# web routes, CLI commands, task queues and event handlers
+ENTRY_POINT_DECORATORS = frozenset({
+    "route", "get", "post", "put", "patch", "delete", "websocket", "api_view",
+    "command", "group", "task", "shared_task", "handler", "callback", "listener",
+    "receiver", "on_event", "on",
+})
+# Method names so common on builtins and library objects that a call on an
+# unknown object is not taken to mean the one function of that name
+COMMON_METHODS = frozenset({
+    "get", "set", "add", "pop", "append", "extend", "insert", "remove", "clear",
+    "copy", "update", "items", "keys", "values", "index", "count", "sort",
+    "join", "split", "strip", "format", "encode", "decode", "replace", "lower",
+    "upper", "startswith", "endswith", "read", "write", "close", "open", "send",
+    "run", "start", "stop", "wait", "put", "load", "loads", "dump", "dumps",
+    "call", "filter", "map", "sum", "min", "max", "info", "debug", "warning",
+    "error", "exception", "log",
+})
+
+
+class SourceFile:
+    """A source file found by ``iter_source_files``, with its stat fields."""
+
+    __slots__ = ("path", "mtime_ns", "size")
+
+    def __init__(self, path: str, mtime_ns: int, size: int):
+        # Relative to the tree root, with "/" separators
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+
+def iter_source_files(root: str, prefix: str = "") -> Iterator[SourceFile]:
+    """Source files below ``root`` in a stable order, skipping hidden, build
+    and virtualenv directories."""
+    try:
+        entries = sorted(os.scandir(os.path.join(root, prefix)), key=lambda e: e.name)
+    except OSError as e:
+        logger.warning(f"Skipping unreadable directory {os.path.join(root, prefix)}: {e}")
+        return
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        path = prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in SKIPPED_DIRS:
+                yield from iter_source_files(root, path + "/")
+        elif entry.name.endswith(SOURCE_SUFFIXES) and entry.is_file():
+            stat = entry.stat()
+            yield SourceFile(path, stat.st_mtime_ns, stat.st_size)
+
+
+def tree_fingerprint(root: str) -> str:
+    """Digest of every source file's path, mtime and size below ``root``.
+
+    Stats only, so a tree can be checked for changes without reading it.
+    """
+    sha = hashlib.sha256()
+    for source in iter_source_files(root):
+        sha.update(f"{source.path}\0{source.mtime_ns}\0{source.size}\n".encode("utf-8"))
+    return sha.hexdigest()
+
+
+def module_name(path: str) -> str:
+    """Dotted module name of a source file path relative to the tree root."""
+    parts = os.path.splitext(path)[0].split("/")
+    if parts[-1] == "__init__" and len(parts) > 1:
+        parts.pop()
+    return ".".join(parts)
+
+
+def _dotted(node: ast.AST) -> Optional[str]:
+    """``a.b.c`` for a chain of names and attributes, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _call_ref(func: ast.AST) -> Optional[str]:
+    """How a call names its target: ``name``, ``a.b.name`` or ``?.name``
+    when called on an expression such as another call's result."""
+    dotted = _dotted(func)
+    if dotted is not None:
+        return dotted
+    if isinstance(func, ast.Attribute):
+        return "?." + func.attr
+    return None
+
+
+def _is_main_guard(node: ast.If) -> bool:
+    test = node.test
+    return (
+        isinstance(test, ast.Compare)
+        and isinstance(test.left, ast.Name)
+        and test.left.id == "__name__"
+        and len(test.comparators) == 1
+        and isinstance(test.comparators[0], ast.Constant)
+        and test.comparators[0].value == "__main__"
+    )
+
+
+def _decorator_name(node: ast.AST) -> str:
+    if isinstance(node, ast.Call):
+        node = node.func
+    dotted = _dotted(node) or ""
+    return dotted.rsplit(".", 1)[-1]
+
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+# (line, column, end line, end column, reference) of a call
+CallSite = Tuple[int, int, int, int, str]
+# Leaf nodes that never contain a call
+_LEAVES = (ast.Name, ast.Constant, ast.expr_context, ast.operator, ast.cmpop, ast.unaryop, ast.boolop)
+
+
+class _Collector:
+    """Collects functions, their calls, imports and main-guard calls of one module.
+
+    Walks each scope with an explicit stack instead of ast.NodeVisitor, which
+    is several times slower on large trees.
+    """
+
+    def __init__(self, module: str, is_package: bool, lines: List[str]):
+        self.module = module
+        self.package = module if is_package else module.rpartition(".")[0]
+        self.lines = lines
+        self.functions: List[List[Any]] = []
+        self.imports: Dict[str, str] = {}
+        self.main_calls: List[str] = []
+        self.classes: Set[str] = set()
+
+    def _import(self, node: ast.AST) -> None:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    self.imports[alias.asname] = alias.name
+                else:
+                    head = alias.name.split(".", 1)[0]
+                    self.imports[head] = head
+            return
+        base = node.module or ""
+        if node.level:
+            package = self.package.split(".") if self.package else []
+            package = package[: len(package) - (node.level - 1)] if node.level > 1 else package
+            base = ".".join(part for part in package + [base] if part)
+        for alias in node.names:
+            if alias.name != "*":
+                self.imports[alias.asname or alias.name] = f"{base}.{alias.name}" if base else alias.name
+
+    def _scan(self, nodes: List[ast.AST], calls: Optional[List[CallSite]]) -> List[ast.stmt]:
+        """Record calls and imports under ``nodes``, stopping at nested definitions.
+
+        Returns the nested definitions; their decorators, defaults and base
+        classes run in this scope, so they are scanned here.
+        """
+        nested = []
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, _LEAVES):
+                continue
+            if isinstance(node, _DEFINITIONS):
+                nested.append(node)
+                stack.extend(node.decorator_list)
+                if isinstance(node, ast.ClassDef):
+                    stack.extend(node.bases)
+                    stack.extend(keyword.value for keyword in node.keywords)
+                else:
+                    stack.extend(node.args.defaults)
+                    stack.extend(d for d in node.args.kw_defaults if d is not None)
+                continue
+            if isinstance(node, ast.Call) and calls is not None:
+                ref = _call_ref(node.func)
+                if ref is not None:
+                    # Calls starting at the same place are nested (``a().b()``);
+                    # the one ending first runs first
+                    calls.append((node.lineno, node.col_offset, node.end_lineno, node.end_col_offset, ref))
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                self._import(node)
+                continue
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    stack.extend(item for item in value if isinstance(item, ast.AST))
+                elif isinstance(value, ast.AST):
+                    stack.append(value)
+        nested.sort(key=lambda node: node.lineno)
+        return nested
+
+    def _definitions(self, nodes: List[ast.stmt], scope: List[str], in_class: bool) -> None:
+        for node in nodes:
+            qualname = ".".join(scope + [node.name])
+            if isinstance(node, ast.ClassDef):
+                self.classes.add(qualname)
+                self._definitions(self._scan(node.body, None), scope + [node.name], True)
+                continue
+
+            calls: List[CallSite] = []
+            nested = self._scan(node.body, calls)
+            first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            entry = any(_decorator_name(d) in ENTRY_POINT_DECORATORS for d in node.decorator_list)
+            self.functions.append([
+                qualname,
+                node.lineno,
+                textwrap.dedent("\n".join(self.lines[first - 1:node.end_lineno])),
+                ast.get_docstring(node) or "",
+                ".".join(scope) if in_class else "",
+                entry or (not scope and node.name == "main"),
+                list(dict.fromkeys(call[-1] for call in sorted(calls))),
+            ])
+            self._definitions(nested, scope + [node.name], False)
+
+    def collect(self, tree: ast.Module, main_module: bool) -> None:
+        nested = []
+        main_calls: List[CallSite] = []
+        for node in tree.body:
+            if isinstance(node, ast.If) and _is_main_guard(node):
+                nested += self._scan(node.body, main_calls)
+                nested += self._scan(node.orelse, None)
+            else:
+                # Module-level calls in __main__.py run when the package is executed
+                nested += self._scan([node], main_calls if main_module else None)
+        self.main_calls = [call[-1] for call in sorted(main_calls)]
+        self._definitions(nested, [], False)
+
+
+def parse_source(path: str, source: str) -> Dict[str, Any]:
+    """Functions, imports and main-guard calls of one file, as plain JSON data.
+
+    ``path`` is relative to the tree root and names the module. Each
+    function is ``[qualname, line, code, docstring, owning class, entry
+    point, call references]``.
+    """
+    module = module_name(path)
+    # Line numbers count the same line breaks ast does
+    source = source.replace("\r\n", "\n").replace("\r", "\n")
+    collector = _Collector(
+        module, path.endswith("/__init__.py") or path == "__init__.py", source.split("\n")
+    )
+    collector.collect(ast.parse(source, filename=path), main_module=path.endswith("__main__.py"))
+    return {
+        "module": module,
+        "functions": collector.functions,
+        "imports": collector.imports,
+        "classes": sorted(collector.classes),
+        "main_calls": collector.main_calls,
+    }
+
+
+def _parse_file(root: str, path: str, known_digest: Optional[str]) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    """(path, digest, parsed) for one file; parsed is None when the content
+    still matches ``known_digest``. Runs in a worker process."""
+    with open(os.path.join(root, path), "rb") as f:
+        data = f.read()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if digest == known_digest:
+        return path, digest, None
+    try:
+        parsed = parse_source(path, data.decode("utf-8", errors="replace"))
+    except (SyntaxError, ValueError, RecursionError) as e:
+        logger.warning(f"Skipping unparsable file {path}: {e}")
+        parsed = {"module": module_name(path), "functions": [], "imports": {},
+                  "classes": [], "main_calls": []}
+    return path, digest, parsed
+
+
+def _parse_files(root: str, tasks: Sequence[Tuple[str, Optional[str]]]) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
+    return [_parse_file(root, path, digest) for path, digest in tasks]
+
+
+class ExtractCache:
+    """SQLite cache of parsed files, keyed by path below one tree root."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " root TEXT, path TEXT, mtime_ns INTEGER, size INTEGER, digest TEXT,"
+            " version INTEGER, parsed TEXT, PRIMARY KEY (root, path))"
+        )
+
+    def load(self, root: str) -> Dict[str, Tuple[int, int, str, str]]:
+        """path -> (mtime_ns, size, digest, parsed JSON) for one tree."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, size, digest, parsed FROM files"
+                " WHERE root = ? AND version = ?",
+                (root, EXTRACT_VERSION),
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def store(self, root: str, rows: List[Tuple[str, int, int, str, str]], live: Set[str]) -> None:
+        """Save re-parsed files and forget ones no longer in the tree."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(root, path, mtime_ns, size, digest, EXTRACT_VERSION, parsed)
+                 for path, mtime_ns, size, digest, parsed in rows],
+            )
+            stale = [
+                (root, path) for (path,) in self._conn.execute(
+                    "SELECT path FROM files WHERE root = ?", (root,)
+                ) if path not in live
+            ]
+            self._conn.executemany("DELETE FROM files WHERE root = ? AND path = ?", stale)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Resolver:
+    """Resolves call references to the functions extracted from a tree."""
+
+    def __init__(self, files: List[Tuple[str, Dict[str, Any]]]):
+        self.files = files
+        # Function ids are positions in this flat list of (file index, function)
+        self.functions: List[Tuple[int, List[Any]]] = []
+        self.qualified: Dict[str, int] = {}
+        self.local: Dict[Tuple[int, str], int] = {}
+        self.by_name: Dict[str, List[int]] = defaultdict(list)
+        for file_index, (_, parsed) in enumerate(files):
+            for fn in parsed["functions"]:
+                fid = len(self.functions)
+                self.functions.append((file_index, fn))
+                qualname = fn[0]
+                self.qualified.setdefault(f"{parsed['module']}.{qualname}", fid)
+                self.local.setdefault((file_index, qualname), fid)
+                self.by_name[qualname.rsplit(".", 1)[-1]].append(fid)
+        self.classes = {
+            f"{parsed['module']}.{name}" for _, parsed in files for name in parsed["classes"]
+        }
+
+    def _constructor(self, qualified: str) -> Optional[int]:
+        if qualified in self.classes:
+            return self.qualified.get(qualified + ".__init__")
+        return None
+
+    def _by_unique_name(self, name: str) -> Optional[int]:
+        candidates = self.by_name.get(name, ())
+        return candidates[0] if len(candidates) == 1 else None
+
+    def resolve(self, file_index: int, owner: str, ref: str) -> Optional[int]:
+        parsed = self.files[file_index][1]
+        head, _, rest = ref.partition(".")
+        name = ref.rsplit(".", 1)[-1]
+
+        if head in ("self", "cls") and owner and rest and "." not in rest:
+            fid = self.local.get((file_index, f"{owner}.{rest}"))
+            return fid if fid is not None else self._by_unique_name(rest)
+
+        if not rest:
+            # A bare name: this module, then imports, then a unique name
+            fid = self.local.get((file_index, ref))
+            if fid is None:
+                fid = self._constructor(f"{parsed['module']}.{ref}")
+            if fid is None and ref in parsed["imports"]:
+                target = parsed["imports"][ref]
+                fid = self.qualified.get(target)
+                if fid is None:
+                    fid = self._constructor(target)
+            return fid if fid is not None else self._by_unique_name(ref)
+
+        if head in parsed["imports"]:
+            target = f"{parsed['imports'][head]}.{rest}"
+            fid = self.qualified.get(target)
+            if fid is None:
+                fid = self._constructor(target)
+            if fid is not None:
+                return fid
+        # Class.method() within the module
+        fid = self.local.get((file_index, ref))
+        if fid is not None:
+            return fid
+        if name in COMMON_METHODS or name.startswith("__"):
+            return None
+        return self._by_unique_name(name)
+
+    def records(self) -> Iterator["FunctionInfo"]:
+        callees: List[List[int]] = []
+        callers: List[Set[int]] = [set() for _ in self.functions]
+        entry = [bool(fn[5]) for _, fn in self.functions]
+        for fid, (file_index, fn) in enumerate(self.functions):
+            resolved = {}
+            for ref in fn[6]:
+                target = self.resolve(file_index, fn[4], ref)
+                if target is not None and target != fid:
+                    resolved[target] = None
+            callees.append(list(resolved))
+            for target in resolved:
+                callers[target].add(fid)
+        for file_index, (_, parsed) in enumerate(self.files):
+            for ref in parsed["main_calls"]:
+                target = self.resolve(file_index, "", ref)
+                if target is not None:
+                    entry[target] = True
+
+        # Qualified names repeated across files are prefixed with their module
+        counts = Counter(fn[0] for _, fn in self.functions)
+        names = [
+            fn[0] if counts[fn[0]] == 1 else f"{self.files[file_index][1]['module']}.{fn[0]}"
+            for file_index, fn in self.functions
+        ]
+        for fid, (file_index, fn) in enumerate(self.functions):
+            yield {
+                "name": names[fid],
+                "code": fn[2],
+                "docstring": fn[3],
+                "fan_in": len(callers[fid]),
+                "fan_out": len(callees[fid]),
+                "is_entry_point": entry[fid],
+                "file": self.files[file_index][0],
+                "line": fn[1],
+                "calls": [names[target] for target in callees[fid]],
+            }
+
+
+class SourceExtractor:
+    """Walks a source tree and extracts FunctionInfo records from it.
+
+    Files are parsed across ``workers`` processes (all CPUs by default).
+    With ``cache_path`` set, parse results are kept in SQLite and a file is
+    only parsed again when its mtime or size changed and its content hash
+    no longer matches. ``stats`` counts files parsed and reused.
+    """
+
+    def __init__(self, workers: Optional[int] = None, cache_path: Optional[str] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = ExtractCache(cache_path) if cache_path else None
+        self.stats: Counter = Counter()
+
+    def _parse(self, root: str, tasks: List[Tuple[str, Optional[str]]]) -> Iterator[Tuple[str, str, Optional[Dict[str, Any]]]]:
+        if self.workers == 1 or len(tasks) < MIN_PARALLEL_FILES:
+            yield from _parse_files(root, tasks)
+            return
+        chunks = [tasks[i:i + FILES_PER_TASK] for i in range(0, len(tasks), FILES_PER_TASK)]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+            for results in pool.map(_parse_files, [root] * len(chunks), chunks):
+                yield from results
+
+    def parse_tree(self, root: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(path, parsed) for every source file below ``root``, in path order."""
+        root = os.path.abspath(root)
+        sources = list(iter_source_files(root))
+        cached = self.cache.load(root) if self.cache is not None else {}
+
+        parsed: Dict[str, Dict[str, Any]] = {}
+        tasks = []
+        for source in sources:
+            entry = cached.get(source.path)
+            if entry is not None and entry[:2] == (source.mtime_ns, source.size):
+                parsed[source.path] = json.loads(entry[3])
+            else:
+                tasks.append((source.path, entry[2] if entry is not None else None))
+
+        stat = {source.path: source for source in sources}
+        updates = []
+        for path, digest, result in self._parse(root, tasks):
+            if result is None:
+                # Touched but unchanged: reuse the parse, remember the new stat
+                result = json.loads(cached[path][3])
+                self.stats["unchanged"] += 1
+            else:
+                self.stats["parsed"] += 1
+            parsed[path] = result
+            if self.cache is not None:
+                updates.append((path, stat[path].mtime_ns, stat[path].size, digest, json.dumps(result)))
+        self.stats["reused"] += len(sources) - len(tasks)
+
+        if self.cache is not None:
+            self.cache.store(root, updates, set(stat))
+        return [(source.path, parsed[source.path]) for source in sources]
+
+    def extract(self, root: str) -> Iterator["FunctionInfo"]:
+        """FunctionInfo records for every function and method below ``root``.
+
+        Besides the usual fields, each record has the ``file`` and ``line``
+        it was defined at and the names of the functions it ``calls``.
+        """
+        files = self.parse_tree(root)
+        yield from _Resolver(files).records()
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+
+
+def write_inventory(out_path: str, root: str, extractor: Optional[SourceExtractor] = None) -> int:
+    """Extract ``root`` into a JSON Lines inventory; returns the number of functions."""
+    from core.formatter import DocumentWriter
+
+    extractor = extractor or SourceExtractor()
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    temp_path = out_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        writer = DocumentWriter(f, tree_name(root), "jsonl")
+        for fn in extractor.extract(root):
+            writer.write(fn)
+        writer.close()
+    os.replace(temp_path, out_path)
+    return writer.count
+
+
+def tree_name(root: str) -> str:
+    """The ``file`` name an inventory extracted from ``root`` is given."""
+    return os.path.basename(os.path.abspath(root))
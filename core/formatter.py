@@ -1,20 +1,127 @@
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, TextIO
 import json
 from agents.types import FunctionInfo
 
+JSON_ITEM_INDENT = " " * 4
 
-def format_as_json(file: str, summarized: List[FunctionInfo]) -> str:
-    output = {"file": file, "summarized_functions": summarized}
-    return json.dumps(output, indent=2)
 
+class DocumentFormat(NamedTuple):
+    """The pieces of one output format, so documents can be written section by section."""
+
+    header: Callable[[str], str]
+    # Called with the function and whether it is the first section
+    section: Callable[[FunctionInfo, bool], str]
+    # Called with the number of sections written
+    footer: Callable[[int], str]
+
+
+def markdown_header(file: str) -> str:
+    return f"# 📄 Documentation for `{file}`\n\n"
+
+
+def markdown_section(fn: FunctionInfo) -> str:
+    return (
+        f"## 🔹 Function: `{fn['name']}`\n\n"
+        f"```python\n{fn['code']}\n```\n\n"
+        f"**Explanation:**\n\n{fn['explanation']}\n\n"
+        "---\n\n"
+    )
+
+
+def json_header(file: str) -> str:
+    return '{\n  "file": ' + json.dumps(file) + ',\n  "summarized_functions": ['
+
+
+def json_section(fn: FunctionInfo, first: bool) -> str:
+    # Same layout as json.dumps(..., indent=2) of the whole document
+    item = json.dumps(fn, indent=2).replace("\n", "\n" + JSON_ITEM_INDENT)
+    return ("\n" if first else ",\n") + JSON_ITEM_INDENT + item
+
+
+def json_footer(count: int) -> str:
+    return ("]" if count == 0 else "\n  ]") + "\n}"
+
+
+def jsonl_header(file: str) -> str:
+    # The same header line the JSON Lines input format accepts
+    return json.dumps({"file": file}) + "\n"
+
+
+def jsonl_section(fn: FunctionInfo, first: bool) -> str:
+    return json.dumps(fn) + "\n"
+
+
+FORMATS: Dict[str, DocumentFormat] = {
+    "markdown": DocumentFormat(
+        markdown_header, lambda fn, first: markdown_section(fn), lambda count: ""
+    ),
+    "json": DocumentFormat(json_header, json_section, json_footer),
+    "jsonl": DocumentFormat(jsonl_header, jsonl_section, lambda count: ""),
+}
 
-def format_as_markdown(file: str, summarized: List[FunctionInfo]) -> str:
-    md = f"# 📄 Documentation for `{file}`\n\n"
 
+def output_format(path: str) -> str:
+    """The format an output path asks for: JSON, JSON Lines or markdown."""
+    if path.endswith(".jsonl"):
+        return "jsonl"
+    if path.endswith(".json"):
+        return "json"
+    return "markdown"
+
+
+class DocumentWriter:
+    """Writes a document to a text stream one function at a time.
+
+    Nothing but the current section is held in memory, so sections can be
+    written as their summaries complete. Call ``close`` to finish the
+    document; it does not close the stream.
+    """
+
+    def __init__(self, out: TextIO, file: str, fmt: str = "markdown"):
+        self.out = out
+        self.count = 0
+        self._format = FORMATS[fmt]
+        out.write(self._format.header(file))
+
+    def write(self, fn: FunctionInfo) -> None:
+        self.out.write(self._format.section(fn, self.count == 0))
+        self.count += 1
+
+    def close(self) -> None:
+        self.out.write(self._format.footer(self.count))
+
+
+def iter_document(
+    file: str, summarized: Iterable[FunctionInfo], fmt: str = "markdown"
+) -> Iterator[str]:
+    """Yield a document piece by piece, consuming ``summarized`` lazily."""
+    document = FORMATS[fmt]
+    yield document.header(file)
+    count = 0
+    for fn in summarized:
+        yield document.section(fn, count == 0)
+        count += 1
+    yield document.footer(count)
+
+
+def write_document(
+    out: TextIO, file: str, summarized: Iterable[FunctionInfo], fmt: str = "markdown"
+) -> int:
+    """Stream a document to ``out``; returns the number of functions written."""
+    writer = DocumentWriter(out, file, fmt)
     for fn in summarized:
-        md += f"## 🔹 Function: `{fn['name']}`\n\n"
-        md += f"```python\n{fn['code']}\n```\n\n"
-        md += f"**Explanation:**\n\n{fn['explanation']}\n\n"
-        md += "---\n\n"
+        writer.write(fn)
+    writer.close()
+    return writer.count
+
+
+def format_as_json(file: str, summarized: List[FunctionInfo]) -> str:
+    return "".join(iter_document(file, summarized, "json"))
 
-    return md
+
+def format_as_jsonl(file: str, summarized: List[FunctionInfo]) -> str:
+    return "".join(iter_document(file, summarized, "jsonl"))
+
+
+def format_as_markdown(file: str, summarized: List[FunctionInfo]) -> str:
+    return "".join(iter_document(file, summarized, "markdown"))
@@ -1,5 +1,14 @@
-from typing import List
+import heapq
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence
 from agents.types import FunctionInfo
+from core.defaults import DEFAULT_SELECTION_STRATEGY, SELECTION_STRATEGIES
+from core.function_store import FunctionStore, load_numpy
+
+if TYPE_CHECKING:
+    from core.centrality import CallGraphIndex
+
+# Below this size the heap is already fast, so NumPy is not worth importing
+VECTORIZE_MIN_FUNCTIONS = 4096
 
 
 def score_function(fn: FunctionInfo) -> int:
@@ -22,6 +31,116 @@ def score_function(fn: FunctionInfo) -> int:
     return score
 
 
-def select_key_functions(functions: List[FunctionInfo], top_n: int = 3) -> List[FunctionInfo]:
-    sorted_fns = sorted(functions, key=score_function, reverse=True)
-    return sorted_fns[:top_n]
+def select_key_functions(
+    functions: Iterable[FunctionInfo],
+    top_n: int = 3,
+    strategy: str = DEFAULT_SELECTION_STRATEGY,
+    graph: Optional["CallGraphIndex"] = None,
+) -> List[FunctionInfo]:
+    if strategy not in SELECTION_STRATEGIES:
+        raise ValueError(f"unknown selection strategy: {strategy}")
+    if strategy == "pagerank" and load_numpy() is not None:
+        # Re-iterable inputs, such as streams of large files, are read twice
+        # instead of held in memory: once to rank, once to pick the winners
+        if isinstance(functions, Iterator):
+            functions = list(functions)
+        selected = select_central_functions(functions, top_n, graph)
+        if selected is not None:
+            return selected
+
+    # Sütunsal depoda puanlar tek seferde vektörel hesaplanır
+    if (
+        isinstance(functions, FunctionStore)
+        and len(functions) >= VECTORIZE_MIN_FUNCTIONS
+        and load_numpy() is not None
+    ):
+        scores = score_columns(*functions.columns())
+        return [functions[int(i)] for i in top_k_indices(scores, top_n)]
+
+    # Sınırlı bir yığın (heap) ile O(n log k); eşit puanlarda girdi sırası korunur,
+    # yani sonuç sorted(..., reverse=True)[:top_n] ile birebir aynıdır
+    return heapq.nlargest(top_n, functions, key=score_function)
+
+
+def score_columns(fan_in, fan_out, is_entry_point, has_docstring):
+    """Vectorized score_function over NumPy columns of equal length."""
+    np = load_numpy()
+    return (
+        np.asarray(fan_in, dtype=np.int64) * 2
+        + np.asarray(fan_out, dtype=np.int64)
+        + np.asarray(is_entry_point, dtype=bool) * 5
+        + np.asarray(has_docstring, dtype=bool) * 2
+    )
+
+
+def top_k_indices(scores, k: int):
+    """Indexes of the ``k`` highest scores, highest first, ties in index order.
+
+    Runs in O(n + k log k) using a partition instead of a full sort.
+    """
+    np = load_numpy()
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.lexsort((np.arange(n), -scores))
+
+    threshold = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: k - len(above)]
+    candidates = np.concatenate((above, ties))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def select_key_functions_vectorized(
+    functions: Sequence[FunctionInfo], top_n: int = 3
+) -> List[FunctionInfo]:
+    """NumPy variant of select_key_functions for very large inputs.
+
+    Most of the cost is extracting columns from the records; callers that
+    already hold columns should use score_columns and top_k_indices directly.
+    """
+    np = load_numpy()
+    if np is None:
+        raise ImportError("select_key_functions_vectorized requires numpy")
+
+    n = len(functions)
+    scores = score_columns(
+        np.fromiter((fn.get("fan_in", 0) for fn in functions), dtype=np.int64, count=n),
+        np.fromiter((fn.get("fan_out", 0) for fn in functions), dtype=np.int64, count=n),
+        np.fromiter((bool(fn.get("is_entry_point")) for fn in functions), dtype=bool, count=n),
+        np.fromiter((bool(fn.get("docstring")) for fn in functions), dtype=bool, count=n),
+    )
+    return [functions[i] for i in top_k_indices(scores, top_n)]
+
+
+def select_central_functions(
+    functions: Iterable[FunctionInfo],
+    top_n: int = 3,
+    graph: Optional["CallGraphIndex"] = None,
+) -> Optional[List[FunctionInfo]]:
+    """The ``top_n`` functions by PageRank over their ``calls``, ties in input order.
+
+    Pass the same ``graph`` index across calls to update the ranks
+    incrementally as the inventory changes. Returns None when there are no
+    call edges to rank by, e.g. for inventories without ``calls``. Inputs
+    that are neither stores nor sequences are iterated twice.
+    """
+    from core.centrality import CallGraphIndex
+
+    graph = graph if graph is not None else CallGraphIndex()
+    ranks = graph.rank(functions)
+    if not graph.graph.edges:
+        return None
+    top = [int(i) for i in top_k_indices(ranks, top_n)]
+    if isinstance(functions, (FunctionStore, Sequence)):
+        return [functions[row] for row in top]
+
+    positions = {row: position for position, row in enumerate(top)}
+    selected: List[Optional[FunctionInfo]] = [None] * len(top)
+    for row, fn in enumerate(functions):
+        if row in positions:
+            selected[positions[row]] = fn
+    return selected
@@ -0,0 +1,197 @@
+from array import array
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    # Only needed for annotations; agents.types pulls in pydantic
+    from agents.types import FunctionInfo
+
+_numpy = None
+_numpy_checked = False
+
+
+def load_numpy():
+    """Import NumPy on first use, or return None if it is not installed.
+
+    NumPy is optional, and importing it is slow enough to matter at startup,
+    so only the code paths that need it pay for it.
+    """
+    global _numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy, _numpy_checked = numpy, True
+    return _numpy
+
+
+FIELDS = ("name", "code", "docstring", "fan_in", "fan_out", "is_entry_point")
+# What a missing or null field reads as, in a store and in a plain dict alike
+FIELD_DEFAULTS = {
+    "name": "", "code": "", "docstring": "", "fan_in": 0, "fan_out": 0, "is_entry_point": False,
+}
+
+
+def field_value(fn: "FunctionInfo", field: str) -> Any:
+    """``fn[field]`` the way a FunctionStore holds it, so every input path agrees."""
+    if field == "is_entry_point":
+        return bool(fn.get(field))
+    return fn.get(field) or FIELD_DEFAULTS[field]
+
+
+class FunctionRecord(Mapping):
+    """Read-only, dict-compatible view of one function in a FunctionStore.
+
+    Holds only a reference to the store and a row number; field values are
+    read from the store's columns on access.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "FunctionStore", row: int):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        return self._store._value(self._row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from FIELDS
+        yield from self._store._extra_fields(self._row)
+
+    def __len__(self) -> int:
+        return len(FIELDS) + len(self._store._extra_fields(self._row))
+
+    def to_dict(self) -> "FunctionInfo":
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"FunctionRecord({self.to_dict()!r})"
+
+
+class FunctionStore:
+    """Columnar store of FunctionInfo records with a name index.
+
+    Numeric fields live in typed arrays, code bodies are UTF-8 slices of a
+    single shared buffer addressed by offsets, and names map to row numbers
+    through a hash index. Rows are exposed as FunctionRecord views, so code
+    written against FunctionInfo dicts keeps working.
+    """
+
+    def __init__(self, file: str = ""):
+        self.file = file
+        self._names: List[str] = []
+        self._docstrings: List[str] = []
+        self._fan_in = array("q")
+        self._fan_out = array("q")
+        self._entry_points = bytearray()
+        self._has_docstring = bytearray()
+        self._code = bytearray()
+        self._offsets = array("q", [0])
+        self._index: Dict[str, int] = {}
+        # Fields outside FunctionInfo are rare, so they are stored sparsely
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_records(
+        cls, functions: Iterable["FunctionInfo"], file: str = ""
+    ) -> "FunctionStore":
+        store = cls(file)
+        for fn in functions:
+            store.append(fn)
+        return store
+
+    def append(self, fn: "FunctionInfo") -> int:
+        row = len(self._names)
+        name = fn["name"]
+        docstring = field_value(fn, "docstring")
+
+        self._names.append(name)
+        self._docstrings.append(docstring)
+        self._fan_in.append(field_value(fn, "fan_in"))
+        self._fan_out.append(field_value(fn, "fan_out"))
+        self._entry_points.append(1 if field_value(fn, "is_entry_point") else 0)
+        self._has_docstring.append(1 if docstring else 0)
+        self._code += field_value(fn, "code").encode("utf-8")
+        self._offsets.append(len(self._code))
+        # Like a linear scan, lookups return the first function with a name
+        self._index.setdefault(name, row)
+
+        extra = {key: value for key, value in fn.items() if key not in FIELDS}
+        if extra:
+            self._extras[row] = extra
+        return row
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[FunctionRecord]:
+        for row in range(len(self)):
+            yield FunctionRecord(self, row)
+
+    def __getitem__(self, row: int) -> FunctionRecord:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return FunctionRecord(self, row)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.index_of(name) is not None
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def index_of(self, name: str) -> Optional[int]:
+        return self._index.get(name)
+
+    def get(self, name: str) -> Optional[FunctionRecord]:
+        """Return the first function with this name in O(1), or None."""
+        row = self.index_of(name)
+        return None if row is None else FunctionRecord(self, row)
+
+    def code(self, row: int) -> str:
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return self._code[start:end].decode("utf-8")
+
+    def _value(self, row: int, key: str) -> Any:
+        if key == "name":
+            return self._names[row]
+        if key == "code":
+            return self.code(row)
+        if key == "docstring":
+            return self._docstrings[row]
+        if key == "fan_in":
+            return self._fan_in[row]
+        if key == "fan_out":
+            return self._fan_out[row]
+        if key == "is_entry_point":
+            return bool(self._entry_points[row])
+        extra = self._extras.get(row)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def _extra_fields(self, row: int) -> Dict[str, Any]:
+        return self._extras.get(row, {})
+
+    def columns(self):
+        """Zero-copy NumPy views of (fan_in, fan_out, is_entry_point, has_docstring).
+
+        The store cannot grow while the returned arrays are alive, since they
+        share memory with its columns.
+        """
+        np = load_numpy()
+        if np is None:
+            raise ImportError("FunctionStore.columns requires numpy")
+        return (
+            np.frombuffer(self._fan_in, dtype=np.int64),
+            np.frombuffer(self._fan_out, dtype=np.int64),
+            np.frombuffer(self._entry_points, dtype=np.bool_),
+            np.frombuffer(self._has_docstring, dtype=np.bool_),
+        )
+
+    def call_edges(self):
+        """Precomputed call graph as (indptr, callees) arrays, or None to read ``calls``."""
+        return None
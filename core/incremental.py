@@ -0,0 +1,154 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from agents.types import FunctionInfo
+from agents.prompt_templates import PROMPT_TEMPLATE_VERSION
+from core.cache import function_fingerprint, make_key
+from core.compaction import code_token_limit
+from core.summarizer import SUMMARY_TEMPERATURE
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+class FunctionDiff(NamedTuple):
+    """Row-level differences between a previous run and a new inventory.
+
+    ``added``, ``changed`` and ``unchanged`` hold rows of the new inventory;
+    ``removed`` holds names from the previous run. ``reused`` maps each
+    unchanged row to its previous explanation.
+    """
+
+    added: List[int]
+    changed: List[int]
+    removed: List[str]
+    unchanged: List[int]
+    reused: Dict[int, str]
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+            "unchanged": len(self.unchanged),
+        }
+
+
+def default_manifest_path(output_path: str) -> str:
+    return os.path.splitext(output_path)[0] + MANIFEST_SUFFIX
+
+
+def summary_settings(model_id: str, model: str) -> str:
+    """Key of what shapes every summary besides the function: model, temperature and code limit."""
+    return make_key("settings", model_id, SUMMARY_TEMPERATURE, code_token_limit(model))
+
+
+def function_hash(fn: FunctionInfo, settings: str = "") -> str:
+    """Hash of everything that feeds a function's summary prompt, under ``settings``."""
+    return make_key("function", PROMPT_TEMPLATE_VERSION, settings, function_fingerprint(fn))
+
+
+def _occurrence_keys(names: Iterable[str]) -> Iterable[Tuple[str, int]]:
+    # Duplicate names are told apart by how many times they appeared before
+    seen: Dict[str, int] = {}
+    for name in names:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        yield name, count
+
+
+def load_previous_run(path: str) -> Optional[Dict[str, Any]]:
+    """Load a manifest, or a JSON output from format_as_json, as a manifest.
+
+    Returns None when the file does not exist. JSON outputs carry no hashes,
+    so their entries keep their code and are matched on it instead.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    if "summarized_functions" in data:
+        return {
+            "version": MANIFEST_VERSION,
+            "file": data.get("file", ""),
+            "functions": [
+                {"name": fn["name"], "code": fn["code"], "explanation": fn["explanation"]}
+                for fn in data["summarized_functions"]
+            ],
+        }
+
+    if data.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {path}: {data.get('version')}")
+    return data
+
+
+def diff_functions(
+    previous: Optional[Dict[str, Any]], functions: Iterable[FunctionInfo], settings: str = ""
+) -> Tuple[FunctionDiff, List[str]]:
+    """Compare a new inventory with the previous run.
+
+    Hashes include ``settings`` (see summary_settings), so a run with another
+    model or code limit finds every function changed. Returns the diff and
+    the hash of every new function, in row order.
+    """
+    entries = {}
+    if previous is not None:
+        entries = dict(
+            zip(
+                _occurrence_keys(entry["name"] for entry in previous["functions"]),
+                previous["functions"],
+            )
+        )
+
+    diff = FunctionDiff([], [], [], [], {})
+    hashes = []
+    matched = set()
+    seen: Dict[str, int] = {}
+    for row, fn in enumerate(functions):
+        digest = function_hash(fn, settings)
+        hashes.append(digest)
+
+        key = (fn["name"], seen.get(fn["name"], 0))
+        seen[fn["name"]] = key[1] + 1
+        entry = entries.get(key)
+        if entry is None:
+            diff.added.append(row)
+            continue
+
+        matched.add(key)
+        if "hash" in entry:
+            same = entry["hash"] == digest
+        else:
+            same = entry["code"] == fn["code"]
+        if same:
+            diff.unchanged.append(row)
+            diff.reused[row] = entry["explanation"]
+        else:
+            diff.changed.append(row)
+
+    diff.removed.extend(key[0] for key in entries if key not in matched)
+    return diff, hashes
+
+
+def build_manifest(
+    file: str, names: List[str], hashes: List[str], explanations: List[str]
+) -> Dict[str, Any]:
+    return {
+        "version": MANIFEST_VERSION,
+        "file": file,
+        "functions": [
+            {"name": name, "hash": digest, "explanation": explanation}
+            for name, digest, explanation in zip(names, hashes, explanations)
+        ],
+    }
+
+
+def save_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    # Write to a temporary file first so a failed run never leaves half a manifest
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, path)
@@ -0,0 +1,332 @@
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from core.function_store import FIELDS, FunctionStore, field_value, load_numpy
+from core.input_loader import iter_functions, read_file_name
+
+# Binary index layout (all integers little-endian):
+#
+#   header | file name | code blob | string blob | row table | name hash table
+#   | call graph
+#
+# Each row-table entry is a fixed-width ROW record pointing into the code and
+# string blobs. The name hash table uses open addressing with linear probing;
+# each slot holds row + 1, or 0 when empty. The call graph is each function's
+# ``calls`` resolved to rows, in CSR form: ``count + 1`` int64 offsets followed
+# by the int32 rows called, so ranking never decodes the rows' extras.
+MAGIC = b"FIDX"
+VERSION = 2
+INDEX_SUFFIX = ".fidx"
+
+HEADER = struct.Struct("<4sIQQQQQQQQ")
+ROW = struct.Struct("<qqBBQIQIQQQI")
+SLOT = struct.Struct("<Q")
+
+FLAG_ENTRY_POINT = 1
+FLAG_HAS_DOCSTRING = 2
+
+# NumPy view of the row table, matching ROW field for field
+ROW_FIELDS = [
+    ("fan_in", "<i8"),
+    ("fan_out", "<i8"),
+    ("flags", "u1"),
+    ("reserved", "u1"),
+    ("name_offset", "<u8"),
+    ("name_length", "<u4"),
+    ("docstring_offset", "<u8"),
+    ("docstring_length", "<u4"),
+    ("code_offset", "<u8"),
+    ("code_length", "<u8"),
+    ("extras_offset", "<u8"),
+    ("extras_length", "<u4"),
+]
+
+
+def default_index_path(input_path: str) -> str:
+    return os.path.splitext(input_path)[0] + INDEX_SUFFIX
+
+
+def is_index_file(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _name_hash(name: bytes) -> int:
+    """64-bit FNV-1a; unlike hash() it is stable across processes."""
+    h = 0xCBF29CE484222325
+    for byte in name:
+        h = ((h ^ byte) * 0x100000001B3) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+def _table_size(count: int) -> int:
+    size = 8
+    while size < count * 2:
+        size *= 2
+    return size
+
+
+def build_index(input_path: str, index_path: Optional[str] = None) -> str:
+    """Compile a JSON/JSON Lines inventory into a binary index file.
+
+    The input is streamed, and code bodies go straight to the output file, so
+    memory use is bounded by the metadata, not by the size of the code. The
+    index is written beside its destination and moved into place, so stores
+    that still map the old index never see a partial file.
+    """
+    index_path = index_path or default_index_path(input_path)
+    if os.path.abspath(index_path) == os.path.abspath(input_path):
+        raise ValueError(f"Index path is the input itself: {index_path}")
+    file_name = read_file_name(input_path).encode("utf-8")
+
+    rows = bytearray()
+    first_row: Dict[bytes, int] = {}
+    calls: List[List[bytes]] = []
+    count = 0
+
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "wb") as out, tempfile.TemporaryFile() as strings:
+        out.write(b"\0" * HEADER.size)
+        out.write(file_name)
+
+        code_offset = out.tell()
+        code_size = 0
+        strings_size = 0
+
+        def add_string(data: bytes) -> int:
+            nonlocal strings_size
+            offset = strings_size
+            strings.write(data)
+            strings_size += len(data)
+            return offset
+
+        for fn in iter_functions(input_path):
+            name = fn["name"].encode("utf-8")
+            docstring = field_value(fn, "docstring").encode("utf-8")
+            code = field_value(fn, "code").encode("utf-8")
+            extras = {key: value for key, value in fn.items() if key not in FIELDS}
+            extras_data = json.dumps(extras).encode("utf-8") if extras else b""
+
+            out.write(code)
+            flags = (FLAG_ENTRY_POINT if field_value(fn, "is_entry_point") else 0) | (
+                FLAG_HAS_DOCSTRING if docstring else 0
+            )
+            rows += ROW.pack(
+                field_value(fn, "fan_in"),
+                field_value(fn, "fan_out"),
+                flags,
+                0,
+                add_string(name),
+                len(name),
+                add_string(docstring),
+                len(docstring),
+                code_size,
+                len(code),
+                add_string(extras_data),
+                len(extras_data),
+            )
+            code_size += len(code)
+            first_row.setdefault(name, count)
+            calls.append([callee.encode("utf-8") for callee in fn.get("calls") or ()])
+            count += 1
+
+        strings_offset = out.tell()
+        strings.seek(0)
+        shutil.copyfileobj(strings, out)
+
+        table_offset = out.tell()
+        out.write(rows)
+
+        slots_offset = out.tell()
+        table_size = _table_size(len(first_row))
+        slots = [0] * table_size
+        mask = table_size - 1
+        for name, row in first_row.items():
+            slot = _name_hash(name) & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = row + 1
+        out.write(struct.pack(f"<{table_size}Q", *slots))
+
+        # Like FunctionStore, a called name refers to its first function
+        calls_offset = out.tell()
+        indptr = [0]
+        callees: List[int] = []
+        for row_calls in calls:
+            callees.extend(first_row[name] for name in row_calls if name in first_row)
+            indptr.append(len(callees))
+        out.write(struct.pack(f"<{count + 1}q", *indptr))
+        out.write(struct.pack(f"<{len(callees)}i", *callees))
+
+        out.seek(0)
+        out.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                count,
+                len(file_name),
+                code_offset,
+                strings_offset,
+                table_offset,
+                slots_offset,
+                table_size,
+                calls_offset,
+            )
+        )
+
+    os.replace(temp_path, index_path)
+    return index_path
+
+
+class MappedFunctionStore(FunctionStore):
+    """FunctionStore backed by a memory-mapped binary index file.
+
+    Opening the index reads only the header; rows, code bodies and name
+    lookups touch just the pages they need.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            version,
+            self._count,
+            file_name_length,
+            self._code_offset,
+            self._strings_offset,
+            self._table_offset,
+            self._slots_offset,
+            self._table_size,
+            self._calls_offset,
+        ) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a version {VERSION} function index: {path}")
+
+        start = HEADER.size
+        self.file = self._map[start:start + file_name_length].decode("utf-8")
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "MappedFunctionStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, fn) -> int:
+        raise TypeError("MappedFunctionStore is read-only")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _row(self, row: int):
+        return ROW.unpack_from(self._map, self._table_offset + row * ROW.size)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def name(self, row: int) -> str:
+        entry = self._row(row)
+        return self._string(entry[4], entry[5])
+
+    def names(self) -> List[str]:
+        return [self.name(row) for row in range(self._count)]
+
+    def index_of(self, name: str) -> Optional[int]:
+        encoded = name.encode("utf-8")
+        mask = self._table_size - 1
+        slot = _name_hash(encoded) & mask
+        while True:
+            (value,) = SLOT.unpack_from(self._map, self._slots_offset + slot * SLOT.size)
+            if value == 0:
+                return None
+            entry = self._row(value - 1)
+            start = self._strings_offset + entry[4]
+            if self._map[start:start + entry[5]] == encoded:
+                return value - 1
+            slot = (slot + 1) & mask
+
+    def code(self, row: int) -> str:
+        entry = self._row(row)
+        start = self._code_offset + entry[8]
+        return self._map[start:start + entry[9]].decode("utf-8")
+
+    def _value(self, row: int, key: str) -> Any:
+        entry = self._row(row)
+        if key == "name":
+            return self._string(entry[4], entry[5])
+        if key == "code":
+            start = self._code_offset + entry[8]
+            return self._map[start:start + entry[9]].decode("utf-8")
+        if key == "docstring":
+            return self._string(entry[6], entry[7])
+        if key == "fan_in":
+            return entry[0]
+        if key == "fan_out":
+            return entry[1]
+        if key == "is_entry_point":
+            return bool(entry[2] & FLAG_ENTRY_POINT)
+        extras = self._extra_fields(row)
+        if key in extras:
+            return extras[key]
+        raise KeyError(key)
+
+    def _extra_fields(self, row: int) -> Dict[str, Any]:
+        entry = self._row(row)
+        if not entry[11]:
+            return {}
+        return json.loads(self._string(entry[10], entry[11]))
+
+    def columns(self):
+        """Zero-copy NumPy views of the row table's scoring columns."""
+        np = load_numpy()
+        if np is None:
+            raise ImportError("MappedFunctionStore.columns requires numpy")
+        table = np.frombuffer(
+            self._map, dtype=np.dtype(ROW_FIELDS), count=self._count, offset=self._table_offset
+        )
+        flags = table["flags"]
+        return (
+            table["fan_in"],
+            table["fan_out"],
+            (flags & FLAG_ENTRY_POINT).astype(bool),
+            (flags & FLAG_HAS_DOCSTRING).astype(bool),
+        )
+
+    def call_edges(self):
+        """The index's call graph as NumPy (indptr, callees) arrays, in CSR form.
+
+        The arrays are copies, so they outlive the store.
+        """
+        np = load_numpy()
+        if np is None:
+            return None
+        indptr = np.frombuffer(
+            self._map, dtype="<i8", count=self._count + 1, offset=self._calls_offset
+        ).astype(np.int64)
+        callees = np.frombuffer(
+            self._map,
+            dtype="<i4",
+            count=int(indptr[-1]),
+            offset=self._calls_offset + (self._count + 1) * 8,
+        ).astype(np.int32)
+        return indptr, callees
+
+
+def open_index(path: str) -> MappedFunctionStore:
+    return MappedFunctionStore(path)
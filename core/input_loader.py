@@ -1,7 +1,180 @@
 import json
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Iterator, TextIO
+
+if TYPE_CHECKING:
+    # Only needed for annotations; agents.types pulls in pydantic
+    from agents.types import FunctionInfo
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith(".jsonl")
 
 
 def load_dummy_input(path: str = "examples/dummy_input.json") -> Dict[str, Any]:
+    if is_jsonl(path):
+        return {"file": read_file_name(path), "functions": list(iter_functions(path))}
+
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+class _JsonStream:
+    """Incremental reader for a top-level JSON object.
+
+    Only one value is held in memory at a time; the ``functions`` array is
+    walked element by element instead of being decoded as a whole.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._f.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop the consumed prefix so the buffer only holds unread text
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(self._chunk_size):
+                raise ValueError("Unexpected end of JSON input")
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos} of buffer")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self._peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # Grow reads geometrically so a large value is not re-decoded too often
+            self._fill(size)
+            size *= 2
+
+    def members(self) -> Iterator[str]:
+        """Yield top-level keys; the caller must consume each member's value."""
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            char = self._peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or '}}' but found '{char}'")
+
+    def array_items(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self._peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' but found '{char}'")
+
+    def skip_value(self) -> None:
+        if self._peek() == "[":
+            for _ in self.array_items():
+                pass
+        else:
+            self.value()
+
+
+def _is_header(record: Dict[str, Any]) -> bool:
+    return "name" not in record and "code" not in record
+
+
+def iter_functions(path: str) -> Iterator["FunctionInfo"]:
+    """Yield FunctionInfo records from a JSON or JSON Lines inventory one at a time.
+
+    JSON inputs have the same shape as ``examples/dummy_input.json``. JSON Lines
+    inputs hold one function per line, optionally preceded by a header line
+    such as ``{"file": "user_service.py"}``.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if is_jsonl(path):
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not _is_header(record):
+                    yield record
+            return
+
+        stream = _JsonStream(f)
+        for key in stream.members():
+            if key == "functions":
+                yield from stream.array_items()
+            else:
+                stream.skip_value()
+
+
+def read_file_name(path: str) -> str:
+    """Return the inventory's ``file`` field without loading its functions."""
+    with open(path, "r", encoding="utf-8") as f:
+        if is_jsonl(path):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    return record.get("file", "") if _is_header(record) else ""
+            return ""
+
+        stream = _JsonStream(f)
+        for key in stream.members():
+            if key == "file":
+                return stream.value()
+            stream.skip_value()
+    return ""
+
+
+class FunctionStream:
+    """Re-iterable view of an inventory that reads the file again on every pass.
+
+    Stands in for a FunctionStore where only sequential access is needed, so
+    the functions are never all held in memory at once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = read_file_name(path)
+
+    def __iter__(self) -> Iterator["FunctionInfo"]:
+        return iter_functions(self.path)
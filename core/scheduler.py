@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Deque, Dict, Mapping, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+
+# Budgets are expressed per minute
+WINDOW_SECONDS = 60.0
+# Upper bound on a single wait so freed capacity is noticed promptly
+MAX_WAIT_SECONDS = 0.5
+SLOT_POLL_SECONDS = 0.01
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class TransientBackendError(Exception):
+    """A failed request worth retrying, raised by backends other than OpenAI"""
+
+
+class BackendRateLimitError(TransientBackendError):
+    """A backend other than OpenAI refused a request for exceeding its rate limit"""
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    if isinstance(error, BackendRateLimitError):
+        return True
+    # Deferred so that importing the scheduler does not load openai
+    from openai import RateLimitError
+
+    return isinstance(error, RateLimitError)
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, TransientBackendError):
+        return True
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+    return isinstance(
+        error, (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+    )
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse OpenAI reset durations such as ``"20ms"``, ``"1s"`` or ``"6m0s"``."""
+    parts = _DURATION_PART.findall(value or "")
+    if not parts:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """How long the server asked us to wait, from rate-limit response headers."""
+    if headers.get("retry-after-ms"):
+        return parse_duration(headers["retry-after-ms"] + "ms")
+    if headers.get("retry-after"):
+        return parse_duration(headers["retry-after"])
+
+    resets = [
+        parse_duration(headers[name])
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if headers.get(name)
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+class RequestScheduler:
+    """Shared gate for every OpenAI request, from sync and async code alike.
+
+    Requests wait for room in the per-minute request and token budgets and
+    for a concurrency slot. The concurrency limit adapts: it halves on every
+    429 and grows by one after a full limit's worth of successes. Retryable
+    errors are retried with jittered exponential backoff, or after the delay
+    the server's rate-limit headers ask for, during which every caller is
+    paused. Calls that pass the same ``key`` while one is in flight share
+    its result instead of sending a duplicate request.
+
+    Budgets missing from the configuration are learned from the
+    ``x-ratelimit-limit-*`` headers of rate-limited responses.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats: Counter = Counter()
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+        self._lock = threading.Lock()
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._tokens_in_window = 0
+        self._limit = max_concurrency
+        self._active = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._inflight: Dict[str, Future] = {}
+        self._async_inflight: Dict[str, asyncio.Future] = {}
+        self.configure(requests_per_minute, tokens_per_minute)
+
+    def configure(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ) -> None:
+        """Set the per-minute budgets; None leaves a budget to be learned."""
+        with self._lock:
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+
+    @property
+    def concurrency_limit(self) -> int:
+        return self._limit
+
+    def _prune(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= WINDOW_SECONDS:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _reserve(self, tokens: int) -> float:
+        """Take a slot and budget for one request, or return how long to wait."""
+        with self._lock:
+            now = self._clock()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._active >= self._limit:
+                return SLOT_POLL_SECONDS
+
+            self._prune(now)
+            window_wait = WINDOW_SECONDS - (now - self._events[0][0]) if self._events else 0.0
+            if (
+                self.requests_per_minute is not None
+                and len(self._events) >= self.requests_per_minute
+            ):
+                return max(window_wait, SLOT_POLL_SECONDS)
+            # A single oversized request is still allowed into an empty window
+            if (
+                self.tokens_per_minute is not None
+                and self._events
+                and self._tokens_in_window + tokens > self.tokens_per_minute
+            ):
+                return max(window_wait, SLOT_POLL_SECONDS)
+
+            self._events.append((now, tokens))
+            self._tokens_in_window += tokens
+            self._active += 1
+            self.stats["requests"] += 1
+            return 0.0
+
+    def _release(self, succeeded: bool) -> None:
+        with self._lock:
+            self._active -= 1
+            if succeeded:
+                self._successes += 1
+                if self._successes >= self._limit and self._limit < self.max_concurrency:
+                    self._limit += 1
+                    self._successes = 0
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Back off after a failed attempt, adapting to rate-limit headers."""
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else {}
+        backoff = self._jitter() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+        if not _is_rate_limit(error):
+            return backoff
+
+        requested = retry_after_seconds(headers)
+        with self._lock:
+            self.stats["rate_limited"] += 1
+            self._limit = max(1, self._limit // 2)
+            self._successes = 0
+            if self.requests_per_minute is None and headers.get("x-ratelimit-limit-requests"):
+                self.requests_per_minute = int(headers["x-ratelimit-limit-requests"])
+            if self.tokens_per_minute is None and headers.get("x-ratelimit-limit-tokens"):
+                self.tokens_per_minute = int(headers["x-ratelimit-limit-tokens"])
+
+            delay = backoff if requested is None else requested * (1 + 0.1 * self._jitter())
+            # Every caller waits out the server's delay, not just this one
+            self._paused_until = max(self._paused_until, self._clock() + delay)
+        return delay
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        return attempt < self.max_retries and _is_retryable(error)
+
+    def call(self, request: Callable[[], T], tokens: int = 0, key: Optional[str] = None) -> T:
+        """Send ``request()`` through the scheduler from synchronous code."""
+        if key is None:
+            return self._call(request, tokens)
+
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if shared is not None:
+            return shared.result()
+
+        try:
+            result = self._call(request, tokens)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _call(self, request: Callable[[], T], tokens: int) -> T:
+        attempt = 0
+        while True:
+            wait = self._reserve(tokens)
+            while wait > 0:
+                self._sleep(min(wait, MAX_WAIT_SECONDS))
+                wait = self._reserve(tokens)
+
+            try:
+                result = request()
+            except Exception as e:
+                self._release(False)
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(f"Retrying model request in {delay:.2f}s ({type(e).__name__})")
+                self._sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled requests give their slot back too
+                self._release(False)
+                raise
+
+            self._release(True)
+            return result
+
+    async def acall(
+        self,
+        request: Callable[[], Awaitable[T]],
+        tokens: int = 0,
+        key: Optional[str] = None,
+    ) -> T:
+        """Await ``request()`` through the scheduler; the async twin of :meth:`call`."""
+        if key is None:
+            return await self._acall(request, tokens)
+
+        shared = self._async_inflight.get(key)
+        if shared is not None and shared.get_loop() is asyncio.get_running_loop():
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(shared)
+
+        future = self._async_inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._acall(request, tokens)
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve it so an exception nobody else awaited is not reported
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._async_inflight.get(key) is future:
+                del self._async_inflight[key]
+
+    async def _acall(self, request: Callable[[], Awaitable[T]], tokens: int) -> T:
+        attempt = 0
+        while True:
+            wait = self._reserve(tokens)
+            while wait > 0:
+                await asyncio.sleep(min(wait, MAX_WAIT_SECONDS))
+                wait = self._reserve(tokens)
+
+            try:
+                result = await request()
+            except Exception as e:
+                self._release(False)
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(f"Retrying model request in {delay:.2f}s ({type(e).__name__})")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled requests give their slot back too
+                self._release(False)
+                raise
+
+            self._release(True)
+            return result
+
+
+# Shared by every OpenAI call site so they draw from one budget
+scheduler = RequestScheduler()
+
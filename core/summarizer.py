@@ -1,25 +1,130 @@
-import os
-from typing import Dict
-from openai import OpenAI
-from dotenv import load_dotenv
-from agents.types import FunctionInfo
-from agents.prompt_templates import function_summary_prompt_template
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+from agents.types import FunctionInfo, BatchSummary
+from agents.prompt_templates import (
+    function_summary_prompt_template,
+    batch_summary_prompt_template,
+)
+from core.cache import SummaryCache, summary_key
+from core.batching import parse_batch_reply
+from core.backends import ModelBackend, OpenAIBackend
+from core.tokens import estimate_messages_tokens, estimate_prompt_tokens
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
-client = OpenAI()
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_TEMPERATURE = 0.2
 
+SYSTEM_PROMPT = "You are a helpful code summarizer."
 
-def summarize_function(fn: FunctionInfo) -> str:
-    prompt = function_summary_prompt_template(fn)
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a helpful code summarizer."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
+@lru_cache(maxsize=None)
+def batch_summary_tool() -> Dict:
+    # Built on first use; generating the JSON schema is slow at import time
+    return {
+        "type": "function",
+        "function": {
+            "name": "record_summaries",
+            "description": "Record the explanation of every function in the batch",
+            "parameters": BatchSummary.model_json_schema(),
+        },
+    }
+
+
+def build_summary_messages(fn: FunctionInfo, model: str = SUMMARY_MODEL) -> List[Dict[str, str]]:
+    prompt = function_summary_prompt_template(fn, model)
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def summarize_function(
+    fn: FunctionInfo,
+    cache: Optional[SummaryCache] = None,
+    client: Optional["OpenAI"] = None,
+    backend: Optional[ModelBackend] = None,
+    model: str = SUMMARY_MODEL,
+) -> str:
+    """Summarize one function with ``backend``, or OpenAI through ``client``."""
+    backend = backend or OpenAIBackend.for_client(client=client)
+    if cache is not None:
+        key = summary_key(fn, backend.model_id(model), SUMMARY_TEMPERATURE)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    summary = backend.complete(
+        build_summary_messages(fn, model), model, temperature=SUMMARY_TEMPERATURE
+    ).strip()
+
+    if cache is not None:
+        cache.set(key, summary)
+
+    return summary
+
+
+def summarize_function_stream(
+    fn: FunctionInfo,
+    cache: Optional[SummaryCache] = None,
+    client: Optional["OpenAI"] = None,
+    backend: Optional[ModelBackend] = None,
+    model: str = SUMMARY_MODEL,
+) -> Iterator[str]:
+    """Yield the summary as it is generated; a cached summary is yielded whole."""
+    backend = backend or OpenAIBackend.for_client(client=client)
+    if cache is not None:
+        key = summary_key(fn, backend.model_id(model), SUMMARY_TEMPERATURE)
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    stream = backend.stream(
+        build_summary_messages(fn, model), model, temperature=SUMMARY_TEMPERATURE
+    )
+    parts = []
+    for text in stream:
+        # Leading whitespace is dropped to match the stripped non-streaming summary
+        if not parts:
+            text = text.lstrip()
+            if not text:
+                continue
+        parts.append(text)
+        yield text
+
+    if cache is not None:
+        cache.set(key, "".join(parts).strip())
+
+
+async def summarize_function_async(
+    fn: FunctionInfo,
+    client: Optional["AsyncOpenAI"] = None,
+    backend: Optional[ModelBackend] = None,
+    model: str = SUMMARY_MODEL,
+) -> str:
+    backend = backend or OpenAIBackend.for_client(async_client=client)
+    summary = await backend.acomplete(
+        build_summary_messages(fn, model), model, temperature=SUMMARY_TEMPERATURE
     )
+    return summary.strip()
 
-    return response.choices[0].message.content.strip()
+
+async def summarize_batch_async(
+    functions: List[FunctionInfo],
+    client: Optional["AsyncOpenAI"] = None,
+    backend: Optional[ModelBackend] = None,
+    model: str = SUMMARY_MODEL,
+) -> Dict[str, str]:
+    """Summarize several functions in one request, keyed by function name."""
+    backend = backend or OpenAIBackend.for_client(async_client=client)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": batch_summary_prompt_template(functions, model)},
+    ]
+    arguments = await backend.acomplete(
+        messages, model, temperature=SUMMARY_TEMPERATURE, tool=batch_summary_tool()
+    )
+    return parse_batch_reply(arguments, [fn["name"] for fn in functions])
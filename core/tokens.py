@@ -0,0 +1,75 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Pieces the local tokenizer estimate counts: letter runs, digit runs, runs of
+# whitespace and single punctuation characters, roughly as BPE splits code
+_TOKEN_PIECE = re.compile(r"[A-Za-z_]+|\d+|\s+|[^\sA-Za-z_\d]")
+# BPE vocabularies cover common words whole and split longer identifiers and
+# numbers into pieces of about this many characters
+LETTERS_PER_TOKEN = 6
+DIGITS_PER_TOKEN = 3
+
+
+def estimate_prompt_tokens(prompt: str) -> int:
+    """Rough token estimate for a prompt (~4 characters per token).
+
+    Cheap enough to run on every request, so it is what rate-limit budgets
+    reserve; use ``count_tokens`` where accuracy matters more than speed.
+    """
+    return len(prompt) // 4 + 1
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(estimate_prompt_tokens(message["content"]) for message in messages)
+
+
+def base_model(model: str) -> str:
+    """``model`` without a backend prefix such as "fake:"."""
+    return model.rsplit(":", 1)[-1]
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: Optional[str]):
+    """The model's tiktoken encoding, or None when tiktoken is not installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model or "")
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def heuristic_token_count(text: str) -> int:
+    """Token count estimated from the shape of the text, without a vocabulary.
+
+    Closer than a characters-per-token rule for code, where punctuation and
+    indentation make up a large share of the tokens.
+    """
+    count = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        first = piece[0]
+        if first.isspace():
+            # A single space merges into the next word; longer runs and
+            # line breaks are tokens of their own
+            count += piece != " "
+        elif first.isdigit():
+            count += -(-len(piece) // DIGITS_PER_TOKEN)
+        elif first.isalpha() or first == "_":
+            count += -(-len(piece) // LETTERS_PER_TOKEN)
+        else:
+            count += 1
+    return count
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Tokens ``text`` takes up for ``model``.
+
+    Exact when tiktoken is installed, otherwise a local estimate.
+    """
+    encoding = _encoding(base_model(model) if model else None)
+    if encoding is None:
+        return heuristic_token_count(text)
+    return len(encoding.encode(text, disallowed_special=()))
@@ -1,22 +1,42 @@
 import argparse
 import logging
 import os
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.prompt import Prompt
 
-from agents.chain import CodeExplainerAgent
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+# Only import-free modules are loaded up front; everything heavier (the
+# agent, openai, pydantic, Rich) is imported on the code path that needs it,
+# so --help and local-only commands start quickly
+from core.defaults import (
+    DEFAULT_ANALYSIS_TOKEN_BUDGET,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_FAKE_LATENCY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_QUEUED,
+    DEFAULT_MODEL,
+    DEFAULT_SELECTION_STRATEGY,
+    DEFAULT_SERVER_HOST,
+    DEFAULT_SERVER_PORT,
+    MIN_ANALYSIS_TOKEN_BUDGET,
+    SELECTION_STRATEGIES,
 )
+
 logger = logging.getLogger(__name__)
 
-# Initialize Rich console for prettier output
-console = Console()
+# Result keys holding documented functions, as returned by process_query
+RESULT_ROW_KEYS = ("summarized_functions", "important_functions", "function_summary")
+
+_console = None
+
+
+def get_console():
+    """Rich console for prettier output, created on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
 
 
 def main():
@@ -28,19 +48,248 @@ def main():
         "--input",
         type=str,
         default="examples/dummy_input.json",
-        help="Path to input JSON file containing code functions"
+        help="Path to input JSON file containing code functions, or a Python source tree"
     )
     parser.add_argument(
         "--model",
         type=str,
-        default="gpt-4o-mini",
-        help="OpenAI model to use (default: gpt-4o-mini)"
+        default=DEFAULT_MODEL,
+        help=f"OpenAI model to use (default: {DEFAULT_MODEL})"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["openai", "fake"],
+        default="openai",
+        help="Where model requests go: the OpenAI API, or a local deterministic "
+             "stand-in for offline load tests (default: openai)"
+    )
+    parser.add_argument(
+        "--fake-latency",
+        type=float,
+        default=DEFAULT_FAKE_LATENCY,
+        help=f"Seconds per request with --backend fake (default: {DEFAULT_FAKE_LATENCY})"
+    )
+    parser.add_argument(
+        "--fake-jitter",
+        type=float,
+        default=0.0,
+        help="Random variation in seconds around --fake-latency (default: 0)"
+    )
+    parser.add_argument(
+        "--fake-error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of fake requests failing with a retryable error (default: 0)"
+    )
+    parser.add_argument(
+        "--fake-rate-limit-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of fake requests rejected as rate limited (default: 0)"
     )
     parser.add_argument(
         "--output",
         type=str,
         default="outputs/analysis.md",
-        help="Path to save output markdown file"
+        help="Path to save the output: .json for JSON, .jsonl for JSON Lines, else markdown"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximum number of concurrent summary requests (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=None,
+        help="Maximum OpenAI requests per minute (default: learned from rate-limit responses)"
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=None,
+        help="Maximum OpenAI prompt tokens per minute (default: learned from rate-limit responses)"
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=None,
+        help="Pack several functions into one summary request up to this many "
+             "prompt tokens (default: one request per function)"
+    )
+    parser.add_argument(
+        "--analysis-tokens",
+        type=int,
+        default=DEFAULT_ANALYSIS_TOKEN_BUDGET,
+        help="Largest overall analysis prompt in tokens; bigger inputs are analyzed "
+             f"group by group and merged (default: {DEFAULT_ANALYSIS_TOKEN_BUDGET}, "
+             f"at least {MIN_ANALYSIS_TOKEN_BUDGET})"
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=None,
+        help="Summarize one function per group of near-duplicates at least this similar "
+             "(0-1, e.g. 0.85) and adapt it to the others (default: off)"
+    )
+    parser.add_argument(
+        "--max-code-tokens",
+        type=int,
+        default=None,
+        help="Compact function code longer than this many tokens before it is sent; "
+             "0 sends code as is (default: per-model limit)"
+    )
+    parser.add_argument(
+        "--selection",
+        choices=SELECTION_STRATEGIES,
+        default=DEFAULT_SELECTION_STRATEGY,
+        help="How important functions are ranked: score (fan-in/fan-out, entry points, docstrings) "
+             "or pagerank over the call graph of source tree inputs "
+             f"(default: {DEFAULT_SELECTION_STRATEGY})"
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Pre-summarize the top functions while LLM triage is in flight"
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=DEFAULT_MAX_CONNECTIONS,
+        help=f"Size of the shared HTTP connection pool (default: {DEFAULT_MAX_CONNECTIONS})"
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 for OpenAI requests (needs the h2 package)"
+    )
+    parser.add_argument(
+        "--base-url",
+        type=str,
+        default=None,
+        help="Send OpenAI requests to this server instead, e.g. a local stand-in"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for the persistent summary cache (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the persistent summary cache"
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help="Compile --input into a binary index file and exit"
+    )
+    parser.add_argument(
+        "--index-output",
+        type=str,
+        default=None,
+        help="Path for the index written by --build-index (default: input path with .fidx)"
+    )
+    parser.add_argument(
+        "--extract",
+        action="store_true",
+        help="Extract functions from the --input source tree into a JSON Lines inventory and exit"
+    )
+    parser.add_argument(
+        "--extract-output",
+        type=str,
+        default=None,
+        help="Path for the inventory written by --extract (default: outputs/<tree name>.jsonl)"
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=None,
+        help="Processes parsing source files (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--batch",
+        type=str,
+        default=None,
+        help="Document many inputs: a directory, a glob pattern or a .txt file listing paths"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="outputs/batch",
+        help="Directory for per-file markdown written by --batch (default: outputs/batch)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for loading and formatting in --batch (default: CPU count)"
+    )
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        default=None,
+        help="With --batch, document only each file's N most important functions"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="With --batch, ignore the checkpoint and redo every input"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Re-document only functions added or changed since the previous run and exit"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=None,
+        help="Manifest or previous JSON output to diff against with --incremental "
+             "(default: output path with .manifest.json, which is always rewritten)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print summaries and analysis as they are generated"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve queries over a local JSON/HTTP API, keeping inputs and caches warm"
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_SERVER_HOST,
+        help=f"Address for --serve to listen on (default: {DEFAULT_SERVER_HOST})"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_SERVER_PORT,
+        help=f"Port for --serve to listen on (default: {DEFAULT_SERVER_PORT})"
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Serve on this Unix socket instead of --host/--port"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f"With --serve, queries processed at once (default: {DEFAULT_MAX_IN_FLIGHT})"
+    )
+    parser.add_argument(
+        "--max-queued",
+        type=int,
+        default=DEFAULT_MAX_QUEUED,
+        help="With --serve, queries waiting for a slot before new ones get 503 "
+             f"(default: {DEFAULT_MAX_QUEUED})"
     )
     parser.add_argument(
         "--interactive",
@@ -54,14 +303,60 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.analysis_tokens < MIN_ANALYSIS_TOKEN_BUDGET:
+        parser.error(f"--analysis-tokens must be at least {MIN_ANALYSIS_TOKEN_BUDGET}")
+
+    # Set up logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.build_index:
+        from core.index_file import build_index, default_index_path
 
-    # Ensure OPENAI_API_KEY is set
-    if not os.getenv("OPENAI_API_KEY"):
-        console.print("[bold red]Error: OPENAI_API_KEY environment variable not set[/bold red]")
+        try:
+            index_path = build_index(
+                args.input, args.index_output or default_index_path(args.input)
+            )
+        except ValueError as e:
+            get_console().print(f"[bold red]Error: {e}[/bold red]")
+            return
+        get_console().print(f"[bold]Index written to:[/bold] {index_path}")
+        return
+
+    if args.extract:
+        from core.extractor import write_inventory
+
+        if not os.path.isdir(args.input):
+            get_console().print("[bold red]Error: --extract needs a source directory as --input[/bold red]")
+            return
+        extractor = make_extractor(args)
+        output_path = args.extract_output or os.path.join(
+            "outputs", os.path.basename(os.path.abspath(args.input)) + ".jsonl"
+        )
+        try:
+            count = write_inventory(output_path, args.input, extractor)
+        finally:
+            extractor.close()
+        logger.info(
+            "Source files: "
+            + ", ".join(f"{name} {extractor.stats[name]}" for name in ("parsed", "unchanged", "reused"))
+        )
+        get_console().print(f"[bold]{count} functions written to:[/bold] {output_path}")
+        return
+
+    # Ensure OPENAI_API_KEY is set when requests go to OpenAI
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if args.backend == "openai" and not os.getenv("OPENAI_API_KEY"):
+        get_console().print("[bold red]Error: OPENAI_API_KEY environment variable not set[/bold red]")
         return
 
     # Display welcome message
-    console.print(
+    get_console().print(
         "[bold blue]🧠 Code Explainer Agent[/bold blue]"
         "\n[bold]This agent analyzes code and explains what it does.[/bold]"
     )
@@ -69,13 +364,63 @@ def main():
     # Create output directory if it doesn't exist
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
 
+    from agents.chain import CodeExplainerAgent
+    from core.backends import create_backend
+    from core.cache import SummaryCache
+    from core.clients import clients
+    from core.compaction import compactor, set_model_limits
+    from core.scheduler import scheduler
+
+    # Open the summary cache unless disabled
+    cache = None if args.no_cache else SummaryCache(args.cache_dir)
+
+    # Every OpenAI call site shares one request budget and connection pool
+    scheduler.configure(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    clients.configure(
+        max_connections=args.max_connections, http2=args.http2, base_url=args.base_url
+    )
+
+    if args.max_code_tokens is not None:
+        set_model_limits(args.model, max_code_tokens=args.max_code_tokens)
+
+    backend_options = {}
+    if args.backend == "fake":
+        backend_options = {
+            "latency": args.fake_latency,
+            "jitter": args.fake_jitter,
+            "error_rate": args.fake_error_rate,
+            "rate_limit_rate": args.fake_rate_limit_rate,
+        }
+
     # Initialize agent
-    agent = CodeExplainerAgent(model=args.model)
+    agent = CodeExplainerAgent(
+        model=args.model,
+        backend=create_backend(args.backend, **backend_options),
+        concurrency=args.concurrency,
+        cache=cache,
+        batch_token_budget=args.batch_tokens,
+        speculative=args.speculative,
+        analysis_token_budget=args.analysis_tokens,
+        dedup_threshold=args.dedup_threshold,
+        extractor=make_extractor(args),
+        selection=args.selection,
+    )
     
     try:
-        if args.interactive:
+        if args.batch:
+            run_batch(agent, args)
+
+        elif args.incremental:
+            update_documentation(agent, args)
+
+        elif args.serve:
+            run_server(agent, args)
+
+        elif args.interactive:
             # Interactive mode
-            console.print("\n[bold]Interactive mode:[/bold] Type 'exit' to quit")
+            from rich.prompt import Prompt
+
+            get_console().print("\n[bold]Interactive mode:[/bold] Type 'exit' to quit")
             
             while True:
                 query = Prompt.ask("\n[bold green]What would you like to know about the code?[/bold green]")
@@ -84,14 +429,14 @@ def main():
                     break
                     
                 # Process query
-                console.print(f"[bold]Processing query:[/bold] {query}")
-                result = agent.process_query(query, args.input)
+                get_console().print(f"[bold]Processing query:[/bold] {query}")
+                if args.stream:
+                    stream_results(agent, query, args.input, args.output)
+                    continue
+                result = agent.process_query(query, args.input, with_markdown=False)
                 
-                # Save to file if markdown is available
-                if "markdown" in result:
-                    with open(args.output, "w") as f:
-                        f.write(result["markdown"])
-                    console.print(f"[bold]Results saved to:[/bold] {args.output}")
+                # Save to file if functions were documented
+                save_results(result, args.output)
                 
                 # Display results
                 display_results(result)
@@ -99,56 +444,258 @@ def main():
         else:
             # Single query mode
             if not args.query:
-                console.print("[bold yellow]No query provided. Use --query or --interactive[/bold yellow]")
+                get_console().print("[bold yellow]No query provided. Use --query or --interactive[/bold yellow]")
                 return
                 
-            console.print(f"[bold]Processing query:[/bold] {args.query}")
-            result = agent.process_query(args.query, args.input)
+            get_console().print(f"[bold]Processing query:[/bold] {args.query}")
+            if args.stream:
+                stream_results(agent, args.query, args.input, args.output)
+                return
+            result = agent.process_query(args.query, args.input, with_markdown=False)
             
-            # Save to file if markdown is available
-            if "markdown" in result:
-                with open(args.output, "w") as f:
-                    f.write(result["markdown"])
-                console.print(f"[bold]Results saved to:[/bold] {args.output}")
+            # Save to file if functions were documented
+            save_results(result, args.output)
             
             # Display results
             display_results(result)
             
     except Exception as e:
-        console.print(f"[bold red]Error: {str(e)}[/bold red]")
+        get_console().print(f"[bold red]Error: {str(e)}[/bold red]")
         logger.exception("An error occurred during execution")
 
+    finally:
+        triage_stats = agent.local_triage.stats
+        triage_total = sum(triage_stats.values())
+        if triage_total:
+            logger.info(
+                f"Triage resolved locally: {triage_total - triage_stats['llm']}/{triage_total} "
+                f"({agent.local_triage.local_fraction:.0%})"
+            )
+        logger.info(
+            "Model requests: "
+            + ", ".join(
+                f"{name} {scheduler.stats[name]}"
+                for name in ("requests", "retries", "rate_limited", "coalesced")
+            )
+        )
+        if agent.clones is not None and agent.clones.stats["functions"]:
+            clone_stats = agent.clones.stats
+            logger.info(
+                f"Near-duplicates: {clone_stats['reused']} summary requests avoided, "
+                f"{clone_stats['functions']} functions in {clone_stats['clusters']} clusters"
+            )
+        if compactor.stats["functions"]:
+            logger.info(
+                f"Prompt compaction: {compactor.stats['functions']} functions, "
+                f"{compactor.stats['tokens_before']} -> {compactor.stats['tokens_after']} "
+                f"code tokens ({compactor.saved_fraction():.0%} saved)"
+            )
+        session_stats = agent.session.stats()
+        logger.info(
+            "Session cache hits/misses: "
+            + ", ".join(f"{name} {hits}/{misses}" for name, (hits, misses) in session_stats.items())
+        )
+        if cache is not None:
+            stats = cache.stats()
+            logger.info(
+                f"Cache hits: {stats['hits']}, misses: {stats['misses']}, "
+                f"evictions: {stats['evictions']}, entries: {stats['entries']}"
+            )
+            cache.close()
+        agent.session.close()
+        agent.extractor.close()
+        clients.close()
+
+
+def make_extractor(args):
+    """Source tree extractor for --input directories, caching parses with the summaries"""
+    from core.extractor import EXTRACT_CACHE_FILE_NAME, SourceExtractor
+
+    cache_path = None if args.no_cache else os.path.join(args.cache_dir, EXTRACT_CACHE_FILE_NAME)
+    return SourceExtractor(workers=args.extract_workers, cache_path=cache_path)
+
+
+def run_batch(agent, args):
+    """Document every input matched by --batch into --output-dir"""
+    from agents.batch_runner import BatchRunner, resolve_inputs
+
+    inputs = resolve_inputs(args.batch, args.output_dir)
+    get_console().print(f"[bold]Documenting {len(inputs)} input files[/bold]")
+
+    # The agent's engine carries the shared client pool, concurrency limit and cache
+    runner = BatchRunner(
+        agent.engine,
+        args.output_dir,
+        workers=args.workers,
+        top_n=args.top_n,
+        selection=args.selection,
+        resume=not args.restart,
+    )
+    try:
+        report = runner.run(inputs)
+    except ValueError as e:
+        get_console().print(f"[bold red]Error: {e}[/bold red]")
+        return
+
+    get_console().print(
+        f"[bold]Documented:[/bold] {report['files']} files, {report['functions']} functions "
+        f"({report['skipped']} up to date, {report['failed']} failed) "
+        f"in {report['elapsed_seconds']:.1f}s"
+    )
+    get_console().print(
+        f"[bold]Throughput:[/bold] {report['files_per_minute']} files/min, "
+        f"{report['requests_per_minute']} requests/min"
+    )
+
+
+def run_server(agent, args):
+    """Serve queries over HTTP until interrupted"""
+    from agents.server import ExplainerServer
+
+    server = ExplainerServer(
+        agent,
+        host=args.host,
+        port=args.port,
+        unix_socket=args.socket,
+        default_input=args.input,
+        max_in_flight=args.max_in_flight,
+        max_queued=args.max_queued,
+    )
+    get_console().print("[bold]Serving queries[/bold] (Ctrl+C to stop)")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        get_console().print("[bold]Server stopped[/bold]")
+
+
+def update_documentation(agent, args):
+    """Incrementally refresh the output file and its manifest"""
+    from core.formatter import output_format, write_document
+    from core.incremental import default_manifest_path, load_previous_run, save_manifest
+
+    manifest_path = args.manifest or default_manifest_path(args.output)
+    result = agent.update_documentation(args.input, load_previous_run(manifest_path))
+
+    diff = result["diff"]
+    get_console().print(
+        f"[bold]Changes:[/bold] {diff['added']} added, {diff['changed']} changed, "
+        f"{diff['removed']} removed, {diff['unchanged']} unchanged"
+    )
+
+    with open(args.output, "w") as f:
+        write_document(
+            f, result["file"], result["summarized_functions"], output_format(args.output)
+        )
+    save_manifest(default_manifest_path(args.output), result["manifest"])
+    get_console().print(f"[bold]Results saved to:[/bold] {args.output}")
+
+
+def save_results(result, output_path):
+    """Stream the documented functions to the output file, in the format its name asks for"""
+    from core.formatter import output_format, write_document
+
+    rows = next((result[key] for key in RESULT_ROW_KEYS if key in result), None)
+    if rows is None:
+        return
+    with open(output_path, "w") as f:
+        write_document(f, result["file"], rows, output_format(output_path))
+    get_console().print(f"[bold]Results saved to:[/bold] {output_path}")
+
+
+def stream_results(agent, query, input_path, output_path):
+    """Render a query's results live as text arrives, saving the output progressively"""
+    from rich.live import Live
+    from rich.markdown import Markdown
+    from core.formatter import DocumentWriter, output_format
+
+    output = None
+    writer = None
+    # Summaries still being written, by function name; several stream at once
+    drafts = {}
+    text = ""
+
+    def show_drafts(live):
+        live.update(Markdown("\n\n".join(f"**{name}**\n\n{draft}" for name, draft in drafts.items())))
+
+    try:
+        with Live(console=get_console(), refresh_per_second=8, vertical_overflow="visible") as live:
+            for event in agent.stream_query(query, input_path):
+                kind = event["type"]
+
+                if kind == "start" and event["result_key"] is not None:
+                    # Written whenever save_results would write, markdown or not
+                    output = open(output_path, "w")
+                    writer = DocumentWriter(output, event["file"], output_format(output_path))
+                    output.flush()
+
+                elif kind == "error":
+                    live.console.print(f"[bold red]Error:[/bold red] {event['error']}")
+
+                elif kind == "function_start":
+                    drafts[event["name"]] = ""
+
+                elif kind == "summary_delta":
+                    drafts[event["name"]] = drafts.get(event["name"], "") + event["text"]
+                    show_drafts(live)
+
+                elif kind == "analysis_delta":
+                    text += event["text"]
+                    live.update(Markdown(text))
+
+                elif kind == "function_end":
+                    # Move the finished summary out of the live region, in input order
+                    function = event["function"]
+                    drafts.pop(function["name"], None)
+                    live.console.print(f"\n[bold cyan]{function['name']}[/bold cyan]")
+                    live.console.print(Markdown(function["explanation"]))
+                    show_drafts(live)
+                    if writer is not None:
+                        writer.write(function)
+                        output.flush()
+
+                elif kind == "done":
+                    if "overall_analysis" in event["result"]:
+                        live.update("")
+                        live.console.print("\n[bold]Overall Analysis:[/bold]")
+                        live.console.print(Markdown(event["result"]["overall_analysis"]))
+    finally:
+        if output is not None:
+            writer.close()
+            output.close()
+            get_console().print(f"[bold]Results saved to:[/bold] {output_path}")
+
 
 def display_results(result):
     """Display results to the console"""
+    from rich.markdown import Markdown
     
     if "error" in result:
-        console.print(f"[bold red]Error:[/bold red] {result['error']}")
+        get_console().print(f"[bold red]Error:[/bold red] {result['error']}")
         return
         
     # Display overall analysis if available
     if "overall_analysis" in result:
-        console.print("\n[bold]Overall Analysis:[/bold]")
-        console.print(Markdown(result["overall_analysis"]))
+        get_console().print("\n[bold]Overall Analysis:[/bold]")
+        get_console().print(Markdown(result["overall_analysis"]))
     
     # Display function summaries
     if "summarized_functions" in result:
-        console.print("\n[bold]Function Summaries:[/bold]")
+        get_console().print("\n[bold]Function Summaries:[/bold]")
         for func in result["summarized_functions"]:
-            console.print(f"\n[bold cyan]{func['name']}[/bold cyan]")
-            console.print(Markdown(func["explanation"]))
+            get_console().print(f"\n[bold cyan]{func['name']}[/bold cyan]")
+            get_console().print(Markdown(func["explanation"]))
             
     elif "important_functions" in result:
-        console.print("\n[bold]Important Functions:[/bold]")
+        get_console().print("\n[bold]Important Functions:[/bold]")
         for func in result["important_functions"]:
-            console.print(f"\n[bold cyan]{func['name']}[/bold cyan]")
-            console.print(Markdown(func["explanation"]))
+            get_console().print(f"\n[bold cyan]{func['name']}[/bold cyan]")
+            get_console().print(Markdown(func["explanation"]))
             
     elif "function_summary" in result:
-        console.print("\n[bold]Function Summary:[/bold]")
+        get_console().print("\n[bold]Function Summary:[/bold]")
         for func in result["function_summary"]:
-            console.print(f"\n[bold cyan]{func['name']}[/bold cyan]")
-            console.print(Markdown(func["explanation"]))
+            get_console().print(f"\n[bold cyan]{func['name']}[/bold cyan]")
+            get_console().print(Markdown(func["explanation"]))
 
 
 if __name__ == "__main__":
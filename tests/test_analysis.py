@@ -0,0 +1,96 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents.chain import CodeExplainerAgent
+from core.clients import ClientProvider
+from core.analysis import module_of, pack_groups, truncate_to_tokens
+from core.summarizer import estimate_prompt_tokens
+
+BUDGET = 1000
+
+
+def test_module_of():
+    assert module_of("pkg.mod.func") == "pkg.mod"
+    assert module_of("func") == ""
+
+
+def test_truncate_to_tokens():
+    assert truncate_to_tokens("short", 10) == "short"
+    assert len(truncate_to_tokens("x" * 1000, 10)) <= 42
+
+
+def test_pack_groups_keeps_modules_apart():
+    costs = [100, 100, 100, 100, 100]
+    keys = ["a", "b", "a", "a", "b"]
+    groups = pack_groups(costs, 300 + 250, keys)
+
+    # Modüller karışmamalı ve bütçe aşılmamalı
+    assert groups == [[0, 2], [3], [1, 4]]
+
+
+def make_agent():
+    client = MagicMock()
+    agent = CodeExplainerAgent(
+        analysis_token_budget=BUDGET, clients=ClientProvider(client=client)
+    )
+    agent.prompts = []
+
+    def create(model, messages):
+        prompt = messages[0]["content"]
+        agent.prompts.append(prompt)
+        response = MagicMock()
+        response.choices[0].message.content = f"notes {len(agent.prompts)} " + "n" * 200
+        return response
+
+    client.chat.completions.create.side_effect = create
+    return agent
+
+
+def summaries(count, changed=None):
+    return [
+        {
+            "name": f"mod{i % 7}.func{i}",
+            "code": "",
+            "explanation": ("changed " if i == changed else "") + f"does thing {i} " * 10,
+        }
+        for i in range(count)
+    ]
+
+
+def test_small_inputs_use_a_single_prompt():
+    agent = make_agent()
+    agent.generate_overall_analysis([], summaries(3))
+    assert len(agent.prompts) == 1
+
+
+def test_large_inputs_keep_every_prompt_within_budget():
+    agent = make_agent()
+    analysis = agent.generate_overall_analysis([], summaries(500))
+
+    assert analysis.startswith("notes")
+    assert len(agent.prompts) > 1
+    assert all(estimate_prompt_tokens(prompt) <= BUDGET for prompt in agent.prompts)
+
+
+def test_only_changed_groups_are_reanalyzed():
+    agent = make_agent()
+    agent.generate_overall_analysis([], summaries(500))
+    first_run = len(agent.prompts)
+
+    agent.prompts.clear()
+    agent.generate_overall_analysis([], summaries(500, changed=3))
+
+    # Yalnızca değişen grup ve onu içeren birleştirme adımları yeniden çalışmalı
+    assert 0 < len(agent.prompts) < first_run / 2
+
+
+def test_tiny_budgets_are_rejected():
+    with pytest.raises(ValueError):
+        CodeExplainerAgent(analysis_token_budget=200, clients=ClientProvider(client=MagicMock()))
+
+    # Sınırın altına inilse bile birleştirme turu sonsuza dek dönmemeli
+    agent = make_agent()
+    agent.analysis_token_budget = 200
+    with pytest.raises(RuntimeError):
+        agent.generate_overall_analysis([], summaries(40))
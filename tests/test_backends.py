@@ -0,0 +1,95 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents.chain import CodeExplainerAgent
+from core.backends import FakeBackend, OpenAIBackend, create_backend
+from core.cache import SummaryCache
+from core.engine import run_sync
+from core.scheduler import RequestScheduler, TransientBackendError
+from core.summarizer import summarize_batch_async, summarize_function
+
+INPUT = "examples/dummy_input.json"
+MESSAGES = [{"role": "user", "content": "explain"}]
+
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(sleep=lambda seconds: None, jitter=lambda: 0.0)
+
+
+def fake(scheduler, **options):
+    return FakeBackend(latency=0.0, scheduler=scheduler, sleep=lambda seconds: None, **options)
+
+
+def test_fake_backend_is_deterministic(scheduler):
+    first = fake(scheduler, seed=1)
+    second = fake(scheduler, seed=1)
+    assert first.complete(MESSAGES, "m") == second.complete(MESSAGES, "m")
+    assert first.complete(MESSAGES, "m") != first.complete([{"role": "user", "content": "x"}], "m")
+    assert "".join(first.stream(MESSAGES, "m")) == first.complete(MESSAGES, "m")
+
+
+def test_fake_backend_latency_and_jitter(scheduler):
+    sleeps = []
+    backend = FakeBackend(latency=0.1, jitter=0.05, scheduler=scheduler, sleep=sleeps.append)
+    for i in range(20):
+        backend.complete([{"role": "user", "content": str(i)}], "m")
+    assert all(0.05 <= delay <= 0.15 for delay in sleeps)
+    assert len(set(sleeps)) > 1
+
+
+def test_fake_errors_are_retried_by_the_scheduler(scheduler):
+    backend = fake(scheduler, error_rate=0.2, rate_limit_rate=0.1)
+    replies = [backend.complete([{"role": "user", "content": str(i)}], "m") for i in range(30)]
+
+    # Hatalar tekrar denemeyle kapanmalı; her istek sonunda yanıt almalı
+    assert all(reply.startswith("Stand-in reply") for reply in replies)
+    assert backend.stats["errors"] > 0 and backend.stats["rate_limited"] > 0
+    assert scheduler.stats["retries"] == backend.stats["errors"] + backend.stats["rate_limited"]
+    assert scheduler.stats["rate_limited"] == backend.stats["rate_limited"]
+
+    failing = fake(RequestScheduler(max_retries=0), error_rate=1.0)
+    with pytest.raises(TransientBackendError):
+        failing.complete(MESSAGES, "m")
+
+
+def test_fake_batch_reply_names_every_function(scheduler):
+    functions = [{"name": name, "code": f"def {name}(): pass"} for name in ("a", "b")]
+    replies = run_sync(summarize_batch_async(functions, backend=fake(scheduler)))
+    assert replies == {"a": "Stand-in summary of a.", "b": "Stand-in summary of b."}
+
+
+def test_model_is_passed_to_openai():
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices[0].message.content = " ok "
+    fn = {"name": "f", "code": "def f(): pass"}
+
+    assert summarize_function(fn, client=client, model="gpt-4.1") == "ok"
+    assert client.chat.completions.create.call_args.kwargs["model"] == "gpt-4.1"
+
+
+def test_agent_runs_offline_with_fake_backend(scheduler, tmp_path):
+    cache = SummaryCache(str(tmp_path))
+    backend = fake(scheduler)
+    agent = CodeExplainerAgent(backend=backend, cache=cache)
+
+    result = agent.process_query("hmm, what is going on here?", INPUT)
+    assert backend.stats["requests"] == len(result["summarized_functions"]) + 1
+
+    # Sahte yanıtlar gerçek model anahtarıyla önbelleğe yazılmamalı
+    assert agent.model_key == "fake:gpt-4o-mini"
+    openai_agent = CodeExplainerAgent(cache=cache, clients=MagicMock())
+    assert openai_agent._remembered_triage(
+        openai_agent._triage_key("hmm, what is going on here?", INPUT)
+    ) is None
+    assert json.loads(agent.cache.get(agent._triage_key("hmm, what is going on here?", INPUT)))
+    cache.close()
+
+
+def test_create_backend():
+    assert isinstance(create_backend("openai"), OpenAIBackend)
+    assert create_backend("fake", latency=0.5).latency == 0.5
+    with pytest.raises(ValueError):
+        create_backend("nope")
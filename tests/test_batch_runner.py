@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from agents.batch_runner import BatchRunner, output_path_for, output_paths_for, resolve_inputs
+from core.engine import SummarizationEngine
+
+
+def write_input(path, names):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "file": path.stem + ".py",
+        "functions": [{"name": name, "code": f"def {name}(): pass", "fan_in": i}
+                      for i, name in enumerate(names)],
+    }))
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    write_input(tmp_path / "in" / "a.json", ["f1", "f2"])
+    write_input(tmp_path / "in" / "sub" / "b.json", ["g1", "g2", "g3"])
+    (tmp_path / "in" / "notes.md").write_text("not an input")
+    return tmp_path / "in"
+
+
+@pytest.fixture
+def engine():
+    async def fake_summarize(fn):
+        return f"summary of {fn['name']}"
+
+    return SummarizationEngine(concurrency=4, summarize=fake_summarize)
+
+
+def test_resolve_inputs(inputs, tmp_path):
+    paths = resolve_inputs(str(inputs))
+    assert [os.path.relpath(p, inputs) for p in paths] == ["a.json", os.path.join("sub", "b.json")]
+    assert resolve_inputs(str(inputs / "**" / "b.json")) == [str(inputs / "sub" / "b.json")]
+
+    listing = tmp_path / "inputs.txt"
+    listing.write_text("\n".join(paths) + "\n")
+    assert resolve_inputs(str(listing)) == paths
+
+
+def test_resolve_inputs_skips_run_outputs(inputs):
+    (inputs / ".checkpoint.jsonl").write_text("")
+    (inputs / "a.manifest.json").write_text("{}")
+    write_input(inputs / "out" / "old.json", ["h1"])
+
+    # Önceki çalıştırmaların ürettiği dosyalar girdi sayılmamalı
+    paths = resolve_inputs(str(inputs), str(inputs / "out"))
+    assert [os.path.relpath(p, inputs) for p in paths] == ["a.json", os.path.join("sub", "b.json")]
+    assert resolve_inputs(str(inputs / "**" / "*.json*"), str(inputs / "out")) == paths
+
+
+def test_output_path_mirrors_input_tree():
+    assert output_path_for("/data/in/sub/b.json", "/data/in", "out") == os.path.join("out", "sub", "b.md")
+
+
+def test_inputs_sharing_an_output_are_rejected(inputs, engine, tmp_path):
+    (inputs / "a.fidx").write_bytes(b"")
+    write_input(inputs / "sub" / "b.jsonl", ["g1"])
+
+    # Dizini yanında olan envanter yalnızca dizinden okunmalı
+    paths = resolve_inputs(str(inputs))
+    assert [os.path.relpath(p, inputs) for p in paths] == [
+        "a.fidx", os.path.join("sub", "b.json"), os.path.join("sub", "b.jsonl")
+    ]
+    with pytest.raises(ValueError):
+        output_paths_for(paths, str(inputs), "out")
+    with pytest.raises(ValueError):
+        BatchRunner(engine, str(tmp_path / "out")).run(paths)
+    assert not (tmp_path / "out").exists()
+
+
+def test_batch_writes_per_file_outputs_and_resumes(inputs, engine, tmp_path):
+    output_dir = tmp_path / "out"
+    runner = BatchRunner(engine, str(output_dir), workers=2)
+
+    report = runner.run(resolve_inputs(str(inputs)))
+    assert report["files"] == 2 and report["functions"] == 5
+    assert report["requests"] == 5 and report["failed"] == 0
+    assert "summary of g3" in (output_dir / "sub" / "b.md").read_text()
+
+    # Kontrol noktasından devam: değişmeyen dosyalar atlanmalı
+    write_input(inputs / "a.json", ["f1", "f2", "f3"])
+    report = runner.run(resolve_inputs(str(inputs)))
+    assert report["files"] == 1 and report["skipped"] == 1
+    assert "summary of f3" in (output_dir / "a.md").read_text()
+
+
+def test_top_n_and_failures_are_reported(inputs, engine, tmp_path):
+    (inputs / "broken.json").write_text("{not json")
+    runner = BatchRunner(engine, str(tmp_path / "out"), workers=1, top_n=1)
+
+    report = runner.run(resolve_inputs(str(inputs)))
+    assert report["failed"] == 1
+    assert report["files"] == 2 and report["functions"] == 2
+    assert "g3" in (tmp_path / "out" / "sub" / "b.md").read_text()
@@ -0,0 +1,95 @@
+import json
+import pytest
+from core.batching import pack_batches, parse_batch_reply
+from core.engine import SummarizationEngine
+
+
+def make_function(name, size=10):
+    return {
+        "name": name,
+        "code": "x" * size,
+        "docstring": "",
+        "fan_in": 0,
+        "fan_out": 0,
+        "is_entry_point": False,
+    }
+
+
+def test_pack_batches_respects_token_budget():
+    functions = [make_function(f"fn_{i}") for i in range(5)]
+
+    # Her fonksiyon 40 token: bütçe 100 ise ikişerli paketlenmeli
+    batches = pack_batches(functions, lambda fn: 40, token_budget=100)
+
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_pack_batches_splits_duplicate_names_and_oversized():
+    functions = [make_function("a"), make_function("a"), make_function("big", 500)]
+
+    batches = pack_batches(functions, lambda fn: len(fn["code"]), token_budget=100)
+
+    assert batches == [[0], [1], [2]]
+
+
+def test_parse_batch_reply_filters_unknown_and_empty():
+    arguments = json.dumps(
+        {
+            "summaries": [
+                {"name": "a", "explanation": "does a"},
+                {"name": "b", "explanation": "  "},
+                {"name": "zzz", "explanation": "not requested"},
+            ]
+        }
+    )
+
+    assert parse_batch_reply(arguments, ["a", "b"]) == {"a": "does a"}
+
+
+def test_parse_batch_reply_rejects_malformed_json():
+    with pytest.raises(ValueError):
+        parse_batch_reply("not json", ["a"])
+
+
+def test_engine_batches_and_falls_back_for_missing_names():
+    functions = [make_function(f"fn_{i}") for i in range(6)]
+    single_calls = []
+
+    async def fake_summarize(fn):
+        single_calls.append(fn["name"])
+        return f"single {fn['name']}"
+
+    async def fake_summarize_batch(batch):
+        # fn_3 yanıtta eksik: tekli çağrıya düşmeli
+        return {fn["name"]: f"batched {fn['name']}" for fn in batch if fn["name"] != "fn_3"}
+
+    engine = SummarizationEngine(
+        summarize=fake_summarize,
+        summarize_batch=fake_summarize_batch,
+        batch_token_budget=10_000,
+    )
+    results = engine.run(functions)
+
+    assert results[3] == "single fn_3"
+    assert results[0] == "batched fn_0"
+    assert single_calls == ["fn_3"]
+    # Bir toplu istek + bir tekli istek
+    assert engine.requests_sent == 2
+
+
+def test_engine_falls_back_on_malformed_batch_reply():
+    functions = [make_function(f"fn_{i}") for i in range(3)]
+
+    async def fake_summarize(fn):
+        return f"single {fn['name']}"
+
+    async def fake_summarize_batch(batch):
+        raise ValueError("bad reply")
+
+    engine = SummarizationEngine(
+        summarize=fake_summarize,
+        summarize_batch=fake_summarize_batch,
+        batch_token_budget=10_000,
+    )
+
+    assert engine.run(functions) == ["single fn_0", "single fn_1", "single fn_2"]
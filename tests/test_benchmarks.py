@@ -0,0 +1,34 @@
+import statistics
+
+from benchmarks.bench_suite import METRICS, compare, run_size
+from benchmarks.inventory import generate_inventory, write_inventory
+from core.input_loader import iter_functions, read_file_name
+
+
+def test_inventory_is_deterministic_and_realistic(tmp_path):
+    functions = list(generate_inventory(2000, seed=3))
+    assert functions == list(generate_inventory(2000, seed=3))
+    assert functions != list(generate_inventory(2000, seed=4))
+
+    lines = [fn["code"].count("\n") + 1 for fn in functions]
+    assert 8 <= statistics.median(lines) <= 16 and max(lines) > 60
+    # Az sayıda fonksiyon çok sayıda yerden çağrılmalı (kuvvet yasası)
+    fan_in = sorted(fn["fan_in"] for fn in functions)
+    assert fan_in[len(fan_in) // 2] <= 1 and fan_in[-1] > 50
+
+    path = write_inventory(str(tmp_path / "inventory.jsonl"), 50)
+    assert read_file_name(path) == "synthetic_50.py"
+    assert list(iter_functions(path)) == list(generate_inventory(50))
+
+
+def test_run_size_reports_every_metric(tmp_path):
+    result = run_size(200, top_n=3, latency=0.0, workdir=str(tmp_path), repeat=1)
+    assert all(metric in result for metric in METRICS)
+    # Sıcak sorgu model isteği göndermemeli
+    assert result["model_requests"] == 3 + 1 + 1
+
+
+def test_compare_flags_regressions_above_noise():
+    baseline = {"results": [{"size": 10, "load_seconds": 1.0, "query_specific_function_ms": 2.0}]}
+    current = {"results": [{"size": 10, "load_seconds": 1.5, "query_specific_function_ms": 4.0}]}
+    assert compare(current, baseline, threshold=1.2) == ["10:load_seconds"]
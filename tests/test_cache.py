@@ -0,0 +1,103 @@
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from core.cache import SummaryCache, summary_key
+from core.summarizer import summarize_function
+
+
+@pytest.fixture
+def example_function_info():
+    return {
+        "name": "test_function",
+        "code": "def test_function():\n    return True",
+        "fan_in": 2,
+        "fan_out": 1,
+        "is_entry_point": False,
+        "docstring": ""
+    }
+
+
+def test_summary_key_depends_on_prompt_inputs(example_function_info):
+    key = summary_key(example_function_info, "gpt-4o-mini", 0.2)
+
+    # Aynı girdiler aynı anahtarı üretmeli
+    assert key == summary_key(dict(example_function_info), "gpt-4o-mini", 0.2)
+
+    # Kod, model veya sıcaklık değişirse anahtar da değişmeli
+    changed = dict(example_function_info, code="def test_function():\n    return False")
+    assert key != summary_key(changed, "gpt-4o-mini", 0.2)
+    assert key != summary_key(example_function_info, "gpt-4o", 0.2)
+    assert key != summary_key(example_function_info, "gpt-4o-mini", 0.7)
+
+
+def test_cache_hit_and_miss_counters(tmp_path):
+    cache = SummaryCache(str(tmp_path))
+
+    assert cache.get("missing") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_cache_persists_across_instances(tmp_path):
+    SummaryCache(str(tmp_path)).set("key", "value")
+    assert SummaryCache(str(tmp_path)).get("key") == "value"
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = SummaryCache(str(tmp_path), max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    # "b" en uzun süredir kullanılmayan kayıt olduğu için silinmeli
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_hits_defer_access_times(tmp_path):
+    cache = SummaryCache(str(tmp_path), max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    changes = cache._conn.total_changes
+    for _ in range(100):
+        cache.get("a")
+
+    # İsabetler diske yazmamalı; erişim zamanları kapanışta kaydedilmeli
+    assert cache._conn.total_changes == changes
+    cache.close()
+
+    cache = SummaryCache(str(tmp_path), max_entries=2)
+    cache.set("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1"
+
+
+def test_cache_expires_entries(tmp_path):
+    cache = SummaryCache(str(tmp_path), ttl_seconds=0)
+    cache.set("key", "value")
+
+    with patch("core.cache.time.time", return_value=time.time() + 1):
+        assert cache.get("key") is None
+
+
+def test_summarize_function_uses_cache(example_function_info, tmp_path):
+    mock_client = MagicMock()
+    mock_create = mock_client.chat.completions.create
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Bu bir test fonksiyonudur."
+    mock_create.return_value = mock_response
+    cache = SummaryCache(str(tmp_path))
+
+    first = summarize_function(example_function_info, cache=cache, client=mock_client)
+    second = summarize_function(example_function_info, cache=cache, client=mock_client)
+
+    # İkinci çağrı API'ye gitmemeli
+    mock_create.assert_called_once()
+    assert first == second == "Bu bir test fonksiyonudur."
@@ -0,0 +1,147 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agents.chain import CodeExplainerAgent
+from core.centrality import CallGraph, CallGraphIndex, pagerank
+from core.function_selector import select_key_functions
+from core.function_store import FunctionStore
+from core.index_file import MappedFunctionStore, build_index, open_index
+from core.input_loader import FunctionStream
+
+
+def fn(name, calls=(), **fields):
+    return {
+        "name": name, "code": "", "docstring": "", "fan_in": 0, "fan_out": len(calls),
+        "is_entry_point": False, "calls": list(calls), **fields,
+    }
+
+
+# Çok çağrılan `helper`, tek çağırdığı `core`u da önemli kılar
+FUNCTIONS = [
+    fn("view_a", ["helper"]), fn("view_b", ["helper"]), fn("view_c", ["helper"]),
+    fn("view_d", ["helper"]), fn("helper", ["core"], fan_in=4), fn("core", fan_in=1),
+    fn("cli", ["parse", "run"], is_entry_point=True, docstring="doc"),
+    fn("parse", fan_in=1), fn("run", fan_in=1),
+]
+
+
+def dense_pagerank(rows, damping=0.85, iterations=200):
+    size = len(rows)
+    ranks = [1.0 / size] * size
+    for _ in range(iterations):
+        dangling = sum(ranks[u] for u in range(size) if not rows[u])
+        updated = [(1 - damping + damping * dangling) / size] * size
+        for u, callees in enumerate(rows):
+            for v in callees:
+                updated[v] += damping * ranks[u] / len(callees)
+        ranks = updated
+    return ranks
+
+
+def random_rows(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, size, rng.integers(0, 5)).tolist() for _ in range(size)]
+
+
+def test_pagerank_matches_dense_iteration():
+    rows = random_rows(200)
+    result = pagerank(CallGraph.from_rows(rows), tolerance=1e-12)
+    assert np.allclose(result.ranks, dense_pagerank(rows))
+    assert result.ranks.sum() == pytest.approx(1.0)
+
+
+def test_graph_update_replaces_rows():
+    rows = random_rows(50, seed=1)
+    graph = CallGraph.from_rows(rows)
+    rows[3], rows[20], rows[49] = [1, 2], [], [0, 0, 7]
+    rows += [[], [4]]
+    graph.update({3: [1, 2], 20: [], 49: [0, 0, 7], 51: [4]}, 52)
+
+    expected = CallGraph.from_rows(rows)
+    assert graph.indptr.tolist() == expected.indptr.tolist()
+    assert graph.callees.tolist() == expected.callees.tolist()
+
+
+def test_index_updates_incrementally():
+    index = CallGraphIndex(tolerance=1e-10)
+    functions = [fn(f"fn_{u}", [f"fn_{v}" for v in row]) for u, row in enumerate(random_rows(300))]
+    first = index.rank(functions).copy()
+    assert index.rank(functions) is index.ranks and index.stats["builds"] == 1
+
+    # Birkaç kenar değişince graf yeniden kurulmamalı, önceki puanlardan başlanmalı
+    functions[10] = fn("fn_10", ["fn_0", "fn_1"])
+    functions.append(fn("fn_300", ["fn_10"]))
+    iterations = index.stats["iterations"]
+    ranks = index.rank(functions)
+    assert index.stats["builds"] == 1 and index.stats["updates"] == 1
+    assert index.stats["iterations"] - iterations < iterations
+    assert np.allclose(ranks, CallGraphIndex(tolerance=1e-10).rank(functions))
+    assert not np.allclose(ranks[:300], first)
+
+    # Silinen fonksiyon için graf yeniden kurulmalı
+    del functions[5]
+    assert np.allclose(index.rank(functions), CallGraphIndex(tolerance=1e-10).rank(functions))
+    assert index.stats["builds"] == 2
+
+
+def test_pagerank_selection_ranks_transitively():
+    by_score = [f["name"] for f in select_key_functions(FUNCTIONS, 3)]
+    assert by_score == ["helper", "cli", "core"]
+    by_rank = [f["name"] for f in select_key_functions(iter(FUNCTIONS), 3, "pagerank")]
+    assert by_rank == ["core", "helper", "parse"]
+
+    store = FunctionStore.from_records(FUNCTIONS)
+    assert [f["name"] for f in select_key_functions(store, 3, "pagerank")] == by_rank
+
+    # Çağrı bilgisi olmayan girdilerde puan sıralamasına dönülmeli
+    plain = [{k: v for k, v in f.items() if k != "calls"} for f in FUNCTIONS]
+    assert select_key_functions(plain, 3, "pagerank") == select_key_functions(plain, 3)
+    with pytest.raises(ValueError):
+        select_key_functions(FUNCTIONS, 3, "betweenness")
+
+
+def write_inventory(tmp_path):
+    path = tmp_path / "inventory.jsonl"
+    path.write_text("\n".join(json.dumps(f) for f in FUNCTIONS) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_index_files_rank_from_their_call_graph(tmp_path):
+    path = write_inventory(tmp_path)
+    by_rank = ["core", "helper", "parse"]
+
+    graph = CallGraphIndex()
+    with open_index(build_index(path)) as store:
+        # Dizindeki çağrı grafiği kullanılmalı; satır ekleri çözülmemeli
+        with patch.object(MappedFunctionStore, "_extra_fields", side_effect=AssertionError):
+            assert [f["name"] for f in select_key_functions(store, 3, "pagerank", graph)] == by_rank
+            iterations = graph.stats["iterations"]
+            select_key_functions(store, 3, "pagerank", graph)
+    assert graph.stats["builds"] == 1 and graph.stats["iterations"] == iterations
+
+
+def test_streams_are_ranked_without_loading_them(tmp_path):
+    stream = FunctionStream(write_inventory(tmp_path))
+    passes = []
+    original = FunctionStream.__iter__
+
+    def counting_iter(self):
+        passes.append(1)
+        return original(self)
+
+    # Akış listeye çevrilmeden iki geçişte sıralanıp seçilmeli
+    with patch.object(FunctionStream, "__iter__", counting_iter):
+        selected = select_key_functions(stream, 3, "pagerank")
+    assert [f["name"] for f in selected] == ["core", "helper", "parse"]
+    assert len(passes) == 2
+
+
+def test_agent_keeps_one_index():
+    agent = CodeExplainerAgent(clients=object(), selection="pagerank")
+    assert [f["name"] for f in agent.find_important_functions(FUNCTIONS, 1)] == ["core"]
+    agent.find_important_functions(FUNCTIONS + [fn("view_e", ["core"])], 1)
+    assert agent.call_graph.stats["builds"] == 1 and agent.call_graph.stats["updates"] == 1
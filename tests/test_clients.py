@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.clients import ClientProvider
+
+
+def test_injected_clients_are_shared():
+    client, async_client = MagicMock(), MagicMock()
+    provider = ClientProvider(client=client, async_client=async_client)
+
+    assert provider.client is client
+    assert provider.async_client is async_client
+
+
+def test_configure_rejects_unknown_settings():
+    provider = ClientProvider()
+    provider.configure(max_connections=5, http2=True)
+    assert provider.max_connections == 5 and provider.http2
+
+    with pytest.raises(TypeError):
+        provider.configure(pool_size=5)
+
+
+def test_importing_the_agent_builds_no_client():
+    # Modül içe aktarımı istemci oluşturmamalı (API anahtarı olmadan da çalışmalı)
+    code = (
+        "import agents.chain, core.clients; "
+        "assert core.clients.clients._client is None; "
+        "assert core.clients.clients._async_client is None"
+    )
+    env = {"PATH": "", "PYTHONPATH": "."}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
@@ -0,0 +1,107 @@
+import ast
+
+import pytest
+
+from agents.prompt_templates import function_summary_prompt_template
+from benchmarks.inventory import generate_inventory
+from core import compaction
+from core.cache import summary_key
+from core.compaction import (
+    MODEL_LIMITS,
+    PromptCompactor,
+    code_token_limit,
+    collapse_literals,
+    compact_code,
+    set_model_limits,
+    strip_comments_and_blank_lines,
+)
+from core.tokens import count_tokens
+
+CODE = '''def load(path, retries=3):
+    """Load a record."""
+    # Read the file first
+    TABLE = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
+    query = "SELECT id, name, email, created_at FROM users WHERE active = 1 ORDER BY created_at DESC"
+    text = """first # not a comment
+
+last"""
+
+    for attempt in range(retries):  # retry loop
+        data = read(path)
+        data = data.strip()
+        if data:
+            return parse(data)
+    raise IOError(path)'''
+
+
+@pytest.fixture
+def limits():
+    saved = dict(MODEL_LIMITS)
+    yield
+    MODEL_LIMITS.clear()
+    MODEL_LIMITS.update(saved)
+
+
+def test_strip_comments_keeps_strings():
+    stripped = strip_comments_and_blank_lines(CODE)
+    assert "# Read" not in stripped and "retry loop" not in stripped
+    # Çok satırlı dizenin içindeki boş satır ve '#' korunmalı
+    assert '"""first # not a comment\n\nlast"""' in stripped
+    assert "\n\n    for" not in stripped
+
+
+def test_collapse_literals():
+    collapsed = collapse_literals(CODE)
+    assert "TABLE = [1, 2, 3, ...]" in collapsed
+    assert "query = 'SELECT id, name, email, created_...'" in collapsed
+    assert ast.parse(collapsed)
+
+
+def test_compact_code_keeps_signature_and_control_flow():
+    assert compact_code(CODE, 1000) == CODE
+
+    compacted = compact_code(CODE, 60)
+    assert count_tokens(compacted) <= 60
+    for line in ("def load(path, retries=3):", "for attempt in range(retries):",
+                 "return parse(data)", "raise IOError(path)"):
+        assert line in compacted
+    assert "lines elided" in compacted and ast.parse(compacted)
+
+    # Bütçe iyice küçülünce yalnızca imza kalmalı
+    assert compact_code(CODE, 20).startswith("def load(path, retries=3):\n    ...  #")
+
+
+def test_long_functions_fit_the_budget():
+    functions = sorted(generate_inventory(500), key=lambda fn: len(fn["code"]))[-20:]
+    for fn in functions:
+        compacted = compact_code(fn["code"], 300)
+        assert count_tokens(compacted) <= 300
+        assert compacted.startswith(fn["code"].split("\n", 1)[0])
+        ast.parse(compacted)
+
+
+def test_compactor_counts_each_function_once():
+    compactor = PromptCompactor()
+    assert compactor.compact(CODE, 0) == CODE
+    compacted = compactor.compact(CODE, 60)
+    assert compactor.compact(CODE, 60) is compacted
+    assert compactor.stats["functions"] == 1
+    assert compactor.stats["tokens_before"] == count_tokens(CODE)
+    assert compactor.stats["tokens_after"] == count_tokens(compacted)
+    assert 0 < compactor.saved_fraction() < 1
+
+
+def test_limits_are_per_model(limits):
+    assert code_token_limit("gpt-4o-mini-2024-07-18") == MODEL_LIMITS["gpt-4o-mini"].max_code_tokens
+    assert code_token_limit("fake:gpt-4o") == MODEL_LIMITS["gpt-4o"].max_code_tokens
+
+    fn = {"name": "load", "code": CODE, "docstring": "", "fan_in": 1, "fan_out": 2}
+    key = summary_key(fn, "gpt-4o-mini", 0.2)
+    assert CODE in function_summary_prompt_template(fn, "gpt-4o-mini")
+
+    set_model_limits("gpt-4o-mini", max_code_tokens=60)
+    prompt = function_summary_prompt_template(fn, "fake:gpt-4o-mini")
+    assert CODE not in prompt and "lines elided" in prompt
+    # Sınır değişince önbellek anahtarı da değişmeli
+    assert summary_key(fn, "gpt-4o-mini", 0.2) != key
+    assert compaction.compactor.stats["functions"] >= 1
@@ -0,0 +1,74 @@
+from agents.chain import CodeExplainerAgent
+from core.dedup import CloneIndex, adapt_summary, lsh_shape, normalized_tokens
+
+TEMPLATE = '''def {verb}_{noun}({noun}_id):
+    """{verb} one {noun}."""
+    # Look the record up first
+    {noun} = db.query({model}).get({noun}_id)
+    if {noun} is None:
+        raise NotFound("missing record")
+    audit.log("{verb}", {noun}_id)
+    return {noun}.to_dict()'''
+
+
+def handler(verb, noun):
+    code = TEMPLATE.format(verb=verb, noun=noun, model=noun.capitalize())
+    return {"name": f"{verb}_{noun}", "code": code}
+
+
+OTHER = {
+    "name": "render_report",
+    "code": "def render_report(rows):\n    html = ''.join(map(str, rows))\n    return '<table>' + html",
+}
+
+
+def test_clones_share_a_cluster():
+    index = CloneIndex(threshold=0.8)
+    user = index.add(handler("get", "user"))
+    assert index.add(handler("get", "order")) is user
+    assert index.add(handler("get", "invoice")) is user
+    assert index.add(OTHER) is not user
+    assert index.stats == {"functions": 4, "clusters": 2}
+
+    # Yorumlar ve isim parçaları normalleştirilmeli
+    assert normalized_tokens(handler("get", "user")) == normalized_tokens(handler("get", "order"))
+
+
+def test_lsh_shape_candidates_below_threshold():
+    for threshold in (0.5, 0.8, 0.95):
+        bands, rows = lsh_shape(threshold, 64)
+        assert bands * rows == 64 and (1 / bands) ** (1 / rows) <= threshold
+
+
+def test_adapt_summary_substitutes_names():
+    summary = "`get_user` loads a User by id and returns the user's fields; Users are cached."
+    assert adapt_summary(summary, "get_user", "get_order") == (
+        "`get_order` loads a Order by id and returns the order's fields; Orders are cached."
+    )
+    assert adapt_summary("getUser reads users.", "getUser", "getOrder") == "getOrder reads orders."
+
+
+def test_agent_summarizes_one_function_per_cluster():
+    agent = CodeExplainerAgent(backend=None, clients=object(), dedup_threshold=0.8)
+    requested = []
+
+    async def summarize_all(functions):
+        requested.extend(fn["name"] for fn in functions)
+        return [f"{fn['name']} returns one {fn['name'].split('_')[1]}." for fn in functions]
+
+    agent.engine.summarize_all = summarize_all
+    functions = [handler("get", "user"), OTHER, handler("get", "order"), handler("get", "invoice")]
+    rows = agent.explain_all_functions(functions)
+
+    assert requested == ["get_user", "render_report"]
+    assert [row["explanation"] for row in rows] == [
+        "get_user returns one user.",
+        "render_report returns one report.",
+        "get_order returns one order.",
+        "get_invoice returns one invoice.",
+    ]
+    assert agent.clones.stats["reused"] == 2
+
+    # Sonraki pencerelerde de aynı küme kullanılmalı
+    agent.explain_all_functions([handler("get", "account")])
+    assert requested == ["get_user", "render_report"]
@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from core import engine as engine_module
+from core.cache import SummaryCache, summary_key
+from core.engine import SummarizationEngine
+from core.summarizer import SUMMARY_TEMPERATURE
+
+
+@pytest.fixture
+def functions():
+    return [
+        {
+            "name": f"fn_{i}",
+            "code": f"def fn_{i}():\n    return {i}",
+            "docstring": "",
+            "fan_in": 0,
+            "fan_out": 0,
+            "is_entry_point": False,
+        }
+        for i in range(10)
+    ]
+
+
+def test_summarize_all_keeps_input_order(functions):
+    async def fake_summarize(fn):
+        # Sonraki fonksiyonlar daha önce bitsin
+        await asyncio.sleep(0.01 * (10 - int(fn["name"].split("_")[1])))
+        return f"summary of {fn['name']}"
+
+    engine = SummarizationEngine(concurrency=10, summarize=fake_summarize)
+    results = engine.run(functions)
+
+    assert results == [f"summary of fn_{i}" for i in range(10)]
+
+
+def test_concurrency_limit_is_respected(functions):
+    in_flight = 0
+    peak = 0
+
+    async def fake_summarize(fn):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "ok"
+
+    engine = SummarizationEngine(concurrency=3, summarize=fake_summarize)
+    engine.run(functions)
+
+    assert peak == 3
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        SummarizationEngine(concurrency=0)
+
+
+def test_failure_keeps_finished_summaries_and_cancels_the_rest(functions, tmp_path):
+    cache = SummaryCache(str(tmp_path))
+    started = []
+
+    async def fake_summarize(fn):
+        index = int(fn["name"].split("_")[1])
+        started.append(index)
+        if index == 5:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("request failed")
+        await asyncio.sleep(0 if index < 5 else 1)
+        return f"summary of {fn['name']}"
+
+    engine = SummarizationEngine(concurrency=10, summarize=fake_summarize, cache=cache)
+    with pytest.raises(RuntimeError):
+        engine.run(functions)
+
+    # Biten özetler önbellekte kalmalı, bekleyen istekler iptal edilmeli
+    assert [cache.get(summary_key(fn, engine.model, SUMMARY_TEMPERATURE)) for fn in functions[:5]] == [
+        f"summary of fn_{i}" for i in range(5)
+    ]
+    assert [task for task in asyncio.all_tasks(engine_module._loop) if not task.done()] == []
@@ -0,0 +1,148 @@
+import os
+
+import pytest
+
+from agents.chain import CodeExplainerAgent
+from core import extractor as extractor_module
+from core.extractor import SourceExtractor, iter_source_files, tree_fingerprint, write_inventory
+from core.input_loader import iter_functions, read_file_name
+
+SOURCES = {
+    "pkg/__init__.py": "from .service import create_user\n",
+    "pkg/service.py": '''from pkg.store import db as database
+from .store.db import save
+
+
+class UserService:
+    def __init__(self):
+        self.users = {}
+
+    def create(self, data):
+        user = self._build(data)
+        save(user)
+        return user
+
+    def _build(self, data):
+        return dict(data)
+
+
+def create_user(data):
+    """Create a user."""
+    return UserService().create(data)
+
+
+@app.route("/users")
+def users_view():
+    database.connect()
+    return create_user({})
+''',
+    "pkg/store/__init__.py": "",
+    "pkg/store/db.py": '''def connect():
+    pass
+
+
+def save(obj):
+    conn = connect()
+    conn.write(obj)
+''',
+    "run.py": '''from pkg import create_user
+
+
+def start():
+    create_user({"name": "a"})
+
+
+if __name__ == "__main__":
+    start()
+''',
+    "broken.py": "def oops(:\n",
+    ".venv/lib.py": "def hidden():\n    pass\n",
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for path, source in SOURCES.items():
+        os.makedirs(os.path.dirname(tmp_path / path), exist_ok=True)
+        (tmp_path / path).write_text(source)
+    return str(tmp_path)
+
+
+def by_name(functions):
+    return {fn["name"]: fn for fn in functions}
+
+
+def test_extracts_call_edges_and_entry_points(tree):
+    functions = by_name(SourceExtractor(workers=1).extract(tree))
+
+    assert set(functions) == {
+        "UserService.__init__", "UserService.create", "UserService._build",
+        "create_user", "users_view", "connect", "save", "start",
+    }
+    assert functions["create_user"]["docstring"] == "Create a user."
+    assert functions["create_user"]["code"].startswith("def create_user(data):")
+    assert functions["UserService.create"]["code"].startswith("def create(self, data):")
+    assert functions["users_view"]["code"].startswith('@app.route("/users")')
+
+    assert functions["UserService.create"]["calls"] == ["UserService._build", "save"]
+    assert functions["create_user"]["calls"] == ["UserService.__init__", "UserService.create"]
+    assert functions["users_view"]["calls"] == ["connect", "create_user"]
+    assert functions["connect"]["fan_in"] == 2 and functions["connect"]["fan_out"] == 0
+    assert functions["create_user"]["fan_in"] == 2
+
+    # Dekoratörle kaydedilen ve __main__ bloğundan çağrılan fonksiyonlar giriş noktasıdır
+    entry_points = {name for name, fn in functions.items() if fn["is_entry_point"]}
+    assert entry_points == {"users_view", "start"}
+    assert functions["save"]["file"] == "pkg/store/db.py" and functions["save"]["line"] == 5
+
+
+def test_parallel_extraction_matches_serial(tree, monkeypatch):
+    monkeypatch.setattr(extractor_module, "MIN_PARALLEL_FILES", 1)
+    monkeypatch.setattr(extractor_module, "FILES_PER_TASK", 2)
+    serial = list(SourceExtractor(workers=1).extract(tree))
+    assert list(SourceExtractor(workers=2).extract(tree)) == serial
+
+
+def test_cache_skips_unchanged_files(tree, tmp_path_factory):
+    cache_path = str(tmp_path_factory.mktemp("cache") / "extract.sqlite3")
+    first = SourceExtractor(workers=1, cache_path=cache_path)
+    expected = list(first.extract(tree))
+    assert first.stats["parsed"] == 6
+    first.close()
+
+    # Dokunulan ama değişmeyen dosya yeniden ayrıştırılmamalı
+    os.utime(os.path.join(tree, "run.py"), ns=(1, 1))
+    with open(os.path.join(tree, "pkg/store/db.py"), "a") as f:
+        f.write("\n\ndef close():\n    connect()\n")
+    second = SourceExtractor(workers=1, cache_path=cache_path)
+    functions = list(second.extract(tree))
+    assert second.stats == {"parsed": 1, "unchanged": 1, "reused": 4}
+    assert {fn["name"] for fn in functions} == {fn["name"] for fn in expected} | {"close"}
+    assert by_name(functions)["connect"]["fan_in"] == 3
+    second.close()
+
+
+def test_tree_fingerprint_tracks_source_files(tree):
+    assert [source.path for source in iter_source_files(tree)][0] == "broken.py"
+    before = tree_fingerprint(tree)
+    with open(os.path.join(tree, "notes.txt"), "w") as f:
+        f.write("not source")
+    assert tree_fingerprint(tree) == before
+    with open(os.path.join(tree, "run.py"), "a") as f:
+        f.write("# edited\n")
+    assert tree_fingerprint(tree) != before
+
+
+def test_inventory_and_agent_input(tree, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("out") / "tree.jsonl")
+    assert write_inventory(path, tree) == 8
+    assert read_file_name(path) == os.path.basename(tree)
+    assert list(iter_functions(path)) == list(SourceExtractor(workers=1).extract(tree))
+
+    agent = CodeExplainerAgent(clients=object(), extractor=SourceExtractor(workers=1))
+    store = agent.get_function_store(tree)
+    assert store.get("create_user")["fan_in"] == 2
+    assert agent.get_function_store(tree) is store
+    with open(os.path.join(tree, "run.py"), "a") as f:
+        f.write("\n\ndef stop():\n    pass\n")
+    assert "stop" in agent.get_function_store(tree)
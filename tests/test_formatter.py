@@ -1,5 +1,20 @@
+import io
 import json
-from core.formatter import format_as_json, format_as_markdown
+import os
+import tracemalloc
+
+import pytest
+
+from core.formatter import (
+    DocumentWriter,
+    format_as_json,
+    format_as_jsonl,
+    format_as_markdown,
+    markdown_header,
+    output_format,
+    write_document,
+)
+from core.input_loader import iter_functions, read_file_name
 
 
 def test_format_as_json():
@@ -44,4 +59,56 @@ def test_format_as_markdown():
     assert "## 🔹 Function: `test_function`" in result
     assert "```python\ndef test_function():\n    return True\n```" in result
     assert "**Explanation:**" in result
-    assert "Bu bir test fonksiyonudur" in result 
\ No newline at end of file
+    assert "Bu bir test fonksiyonudur" in result 
+
+def functions(count):
+    return [
+        {"name": f"f{i}", "code": f"def f{i}():\n    return 'ü'", "explanation": f"Açıklama {i}"}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_format_as_json_matches_json_dumps(count):
+    # Akışlı yazıcı, önceki json.dumps(indent=2) çıktısıyla birebir aynı olmalı
+    expected = json.dumps({"file": "a.py", "summarized_functions": functions(count)}, indent=2)
+    assert format_as_json("a.py", functions(count)) == expected
+
+    out = io.StringIO()
+    assert write_document(out, "a.py", iter(functions(count)), "json") == count
+    assert out.getvalue() == expected
+
+
+def test_jsonl_output_reads_back_as_input(tmp_path):
+    path = tmp_path / "out.jsonl"
+    with open(path, "w") as f:
+        write_document(f, "a.py", functions(3), output_format(str(path)))
+
+    assert path.read_text() == format_as_jsonl("a.py", functions(3))
+    assert read_file_name(str(path)) == "a.py"
+    assert list(iter_functions(str(path))) == functions(3)
+
+
+def test_document_writer_streams_sections():
+    out = io.StringIO()
+    writer = DocumentWriter(out, "a.py")
+    assert out.getvalue() == markdown_header("a.py")
+
+    for fn in functions(2):
+        writer.write(fn)
+    writer.close()
+    assert out.getvalue() == format_as_markdown("a.py", functions(2))
+
+
+def test_write_document_memory_stays_flat(tmp_path):
+    rows = ({"name": f"f{i}", "code": "x = 1\n" * 50, "explanation": "e" * 200} for i in range(20_000))
+
+    tracemalloc.start()
+    with open(tmp_path / "out.md", "w") as f:
+        write_document(f, "a.py", rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Belge ~10 MB; bellek kullanımı belge boyutuyla büyümemeli
+    assert os.path.getsize(tmp_path / "out.md") > 10 * 1024 * 1024
+    assert peak < 1024 * 1024
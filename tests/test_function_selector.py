@@ -1,4 +1,12 @@
-from core.function_selector import select_key_functions, score_function
+import random
+
+import pytest
+
+from core.function_selector import (
+    score_function,
+    select_key_functions,
+    select_key_functions_vectorized,
+)
 
 
 def test_score_function():
@@ -91,4 +99,35 @@ def test_select_key_functions():
     
     # Top_n fonksiyon sayısından büyükse, tüm fonksiyonlar dönmeli
     too_many = select_key_functions(functions, top_n=5)
-    assert len(too_many) == 3 
\ No newline at end of file
+    assert len(too_many) == 3 
+
+
+def _random_functions(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"fn_{i}",
+            "fan_in": rng.randint(0, 3),
+            "fan_out": rng.randint(0, 3),
+            "is_entry_point": rng.random() < 0.2,
+            "docstring": "doc" if rng.random() < 0.5 else ""
+        }
+        for i in range(count)
+    ]
+
+
+def test_select_key_functions_matches_sorted_with_ties():
+    # Çok sayıda eşit puan: sıralama eski sort tabanlı uygulamayla aynı olmalı
+    functions = _random_functions(500)
+    for top_n in (0, 1, 7, 50, 500, 600):
+        expected = sorted(functions, key=score_function, reverse=True)[:top_n]
+        assert select_key_functions(iter(functions), top_n=top_n) == expected
+
+
+def test_select_key_functions_vectorized_matches_heap():
+    pytest.importorskip("numpy")
+
+    functions = _random_functions(500, seed=1)
+    for top_n in (0, 1, 7, 50, 500, 600):
+        expected = select_key_functions(functions, top_n=top_n)
+        assert select_key_functions_vectorized(functions, top_n=top_n) == expected
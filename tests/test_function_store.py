@@ -0,0 +1,72 @@
+import json
+import pytest
+from agents.prompt_templates import function_summary_prompt_template
+from core.cache import summary_key
+from core.function_store import FunctionStore
+from core.function_selector import select_key_functions
+
+
+@pytest.fixture
+def functions():
+    with open("examples/dummy_input.json", "r", encoding="utf-8") as f:
+        return json.load(f)["functions"]
+
+
+def test_records_behave_like_dicts(functions):
+    store = FunctionStore.from_records(functions, file="user_service.py")
+
+    assert len(store) == len(functions)
+    assert store.file == "user_service.py"
+    # Her kayıt orijinal sözlükle eşit olmalı
+    for record, original in zip(store, functions):
+        assert record == original
+        assert record.to_dict() == original
+        assert record["code"] == original["code"]
+        assert record.get("missing", "default") == "default"
+
+
+def test_name_lookup(functions):
+    store = FunctionStore.from_records(functions)
+
+    assert store.get("load_env")["code"] == functions[3]["code"]
+    assert store.index_of("initialize_app") == 1
+    assert store.get("nope") is None
+    assert "create_user" in store
+
+
+def test_duplicate_names_return_first_match():
+    store = FunctionStore.from_records(
+        [{"name": "a", "code": "first"}, {"name": "a", "code": "second"}]
+    )
+
+    assert store.get("a")["code"] == "first"
+    assert store[1]["code"] == "second"
+
+
+def test_extra_fields_and_unicode_code():
+    store = FunctionStore.from_records(
+        [{"name": "ü", "code": "def ü():\n    return '📄'", "calls": ["x"]}]
+    )
+
+    assert store[0]["code"] == "def ü():\n    return '📄'"
+    assert store[0]["calls"] == ["x"]
+    assert "calls" in store[0]
+
+
+def test_select_key_functions_on_store_matches_list(functions):
+    pytest.importorskip("numpy")
+    store = FunctionStore.from_records(functions)
+
+    for top_n in range(6):
+        expected = [fn["name"] for fn in select_key_functions(functions, top_n)]
+        assert [fn["name"] for fn in select_key_functions(store, top_n)] == expected
+
+
+def test_missing_fields_read_the_same_in_dicts_and_stores():
+    sparse = {"name": "f", "code": "def f():\n    pass", "fan_out": None}
+    record = FunctionStore.from_records([sparse])[0]
+
+    # Eksik alanlar her iki yolda da aynı istemi ve önbellek anahtarını vermeli
+    assert function_summary_prompt_template(record) == function_summary_prompt_template(sparse)
+    assert summary_key(record, "gpt-4o-mini", 0.2) == summary_key(sparse, "gpt-4o-mini", 0.2)
+    assert "Docstring: N/A\nFan-in: 0" in function_summary_prompt_template(sparse)
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from agents.chain import CodeExplainerAgent
+from core.formatter import format_as_json
+from core.incremental import diff_functions, load_previous_run, save_manifest
+
+
+def write_input(path, functions):
+    path.write_text(json.dumps({"file": "app.py", "functions": functions}))
+    return str(path)
+
+
+def functions(**codes):
+    return [{"name": name, "code": code, "docstring": "", "fan_in": 0, "fan_out": 0,
+             "is_entry_point": False} for name, code in codes.items()]
+
+
+@pytest.fixture
+def agent():
+    agent = CodeExplainerAgent()
+    agent.summarized = []
+
+    async def fake_summarize(fn):
+        agent.summarized.append(fn["name"])
+        return f"summary of {fn['code']}"
+
+    agent.engine._summarize = fake_summarize
+    return agent
+
+
+def test_diff_functions_classifies_rows():
+    previous = {"version": 1, "file": "app.py", "functions": []}
+    diff, hashes = diff_functions(None, functions(a="1", b="2"))
+    previous["functions"] = [
+        {"name": "a", "hash": hashes[0], "explanation": "A"},
+        {"name": "b", "hash": hashes[1], "explanation": "B"},
+        {"name": "gone", "hash": "x", "explanation": "G"},
+    ]
+
+    diff, _ = diff_functions(previous, functions(a="1", b="changed", c="3"))
+    assert diff.unchanged == [0] and diff.reused == {0: "A"}
+    assert diff.changed == [1]
+    assert diff.added == [2]
+    assert diff.removed == ["gone"]
+
+
+def test_only_changed_functions_are_resummarized(agent, tmp_path):
+    first = agent.update_documentation(write_input(tmp_path / "v1.json", functions(a="1", b="2")), None)
+    save_manifest(str(tmp_path / "m.json"), first["manifest"])
+    agent.summarized.clear()
+    agent.session.summaries.clear()
+
+    second = agent.update_documentation(
+        write_input(tmp_path / "v2.json", functions(a="1", b="22", c="3")),
+        load_previous_run(str(tmp_path / "m.json")),
+    )
+
+    assert agent.summarized == ["b", "c"]
+    assert second["diff"] == {"added": 1, "changed": 1, "removed": 0, "unchanged": 1}
+    assert [fn["explanation"] for fn in second["summarized_functions"]] == [
+        "summary of 1", "summary of 22", "summary of 3"
+    ]
+
+
+def test_other_model_resummarizes_everything(agent, tmp_path):
+    path = write_input(tmp_path / "v1.json", functions(a="1", b="2"))
+    manifest = agent.update_documentation(path, None)["manifest"]
+
+    other = CodeExplainerAgent(model="gpt-4o")
+    other.summarized = []
+
+    async def fake_summarize(fn):
+        other.summarized.append(fn["name"])
+        return f"gpt-4o summary of {fn['code']}"
+
+    other.engine._summarize = fake_summarize
+    result = other.update_documentation(path, manifest)
+
+    # Model değişince eski açıklamalar yeniden kullanılmamalı
+    assert other.summarized == ["a", "b"]
+    assert result["diff"]["changed"] == 2
+
+
+def test_previous_json_output_is_accepted(agent, tmp_path):
+    output = tmp_path / "out.json"
+    output.write_text(format_as_json("app.py", [{"name": "a", "code": "1", "explanation": "old"}]))
+
+    result = agent.update_documentation(
+        write_input(tmp_path / "v2.json", functions(a="1")), load_previous_run(str(output))
+    )
+
+    # JSON çıktısında hash yok; kod aynıysa açıklama yeniden kullanılmalı
+    assert agent.summarized == []
+    assert result["summarized_functions"][0]["explanation"] == "old"
+
+
+def test_missing_manifest_means_full_run(tmp_path):
+    assert load_previous_run(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,68 @@
+import json
+import pytest
+from core.index_file import build_index, open_index, is_index_file, default_index_path
+from core.function_store import FunctionStore
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    data = {
+        "file": "module.py",
+        "functions": [
+            {"name": "a", "code": "def a():\n    return '📄'", "docstring": "doc",
+             "fan_in": 3, "fan_out": 1, "is_entry_point": False},
+            {"name": "b", "code": "def b(): pass", "docstring": "",
+             "fan_in": 0, "fan_out": 2, "is_entry_point": True, "calls": ["a"]},
+            {"name": "a", "code": "def a(): return 2", "docstring": "",
+             "fan_in": 0, "fan_out": 0, "is_entry_point": False},
+        ],
+    }
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path), data
+
+
+def test_index_round_trip(inventory, tmp_path):
+    path, data = inventory
+    index_path = build_index(path, str(tmp_path / "inventory.fidx"))
+
+    assert is_index_file(index_path)
+    assert not is_index_file(path)
+
+    with open_index(index_path) as store:
+        # Tüm kayıtlar aynen geri okunmalı
+        assert isinstance(store, FunctionStore)
+        assert store.file == "module.py"
+        assert len(store) == 3
+        assert [dict(record) for record in store] == data["functions"]
+
+
+def test_index_name_lookup(inventory, tmp_path):
+    path, _ = inventory
+    index_path = build_index(path, str(tmp_path / "inventory.fidx"))
+
+    with open_index(index_path) as store:
+        # Aynı isimde birden fazla fonksiyon varsa ilki dönmeli
+        assert store.index_of("a") == 0
+        assert store.get("b")["calls"] == ["a"]
+        assert store.get("missing") is None
+        assert "b" in store
+
+
+def test_default_index_path():
+    assert default_index_path("examples/dummy_input.json") == "examples/dummy_input.fidx"
+
+
+def test_rebuild_leaves_open_index_intact(inventory, tmp_path):
+    path, data = inventory
+    index_path = build_index(path, str(tmp_path / "inventory.fidx"))
+
+    with open_index(index_path) as store:
+        build_index(path, index_path)
+        # Eski eşleme yeni dosya yazılırken bozulmamalı
+        assert [dict(record) for record in store] == data["functions"]
+    assert not (tmp_path / "inventory.fidx.tmp").exists()
+
+    with pytest.raises(ValueError):
+        build_index(index_path, index_path)
+    assert is_index_file(index_path)
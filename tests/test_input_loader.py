@@ -1,7 +1,8 @@
+import io
 import json
 import pytest
 from unittest.mock import patch, mock_open
-from core.input_loader import load_dummy_input
+from core.input_loader import _JsonStream, iter_functions, load_dummy_input, read_file_name
 
 
 @patch("builtins.open", new_callable=mock_open, read_data='{"test": "data"}')
@@ -26,4 +27,44 @@ def test_load_dummy_input_custom_path(mock_file):
     mock_file.assert_called_once_with("custom/path.json", "r", encoding="utf-8")
     
     # Sonuçlar doğru mu?
-    assert result == {"custom": "value"} 
\ No newline at end of file
+    assert result == {"custom": "value"} 
+
+
+def test_iter_functions_streams_json(tmp_path):
+    data = {
+        "functions": [
+            {"name": "a", "code": "def a():\n    return [1, {'x': 2}]"},
+            {"name": "b", "code": "def b():\n    pass"},
+        ],
+        "count": 12345,
+        "file": "module.py",
+    }
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    # Fonksiyonlar sırayla ve eksiksiz okunmalı
+    assert list(iter_functions(str(path))) == data["functions"]
+    # "file" alanı fonksiyonlardan sonra gelse bile bulunmalı
+    assert read_file_name(str(path)) == "module.py"
+
+    # Çok küçük parçalarla okuma da aynı sonucu vermeli
+    stream = _JsonStream(io.StringIO(json.dumps(data)), chunk_size=3)
+    parsed = {}
+    for key in stream.members():
+        parsed[key] = list(stream.array_items()) if key == "functions" else stream.value()
+    assert parsed == data
+
+
+def test_iter_functions_reads_json_lines(tmp_path):
+    path = tmp_path / "inventory.jsonl"
+    path.write_text(
+        '{"file": "module.py"}\n'
+        '{"name": "a", "code": "def a(): pass"}\n'
+        "\n"
+        '{"name": "b", "code": "def b(): pass"}\n',
+        encoding="utf-8",
+    )
+
+    assert [fn["name"] for fn in iter_functions(str(path))] == ["a", "b"]
+    assert read_file_name(str(path)) == "module.py"
+    assert load_dummy_input(str(path))["file"] == "module.py"
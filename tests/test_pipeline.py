@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import patch
+from agents.chain import CodeExplainerAgent
+from agents.types import ActionType
+from core import engine
+from core.input_loader import FunctionStream
+
+INPUT = "examples/dummy_input.json"
+
+
+@pytest.fixture
+def agent():
+    agent = CodeExplainerAgent(speculative=True)
+    agent.summarized_at = {}
+
+    async def fake_summarize(fn):
+        agent.summarized_at[fn["name"]] = time.monotonic()
+        return f"summary of {fn['name']}"
+
+    agent.engine._summarize = fake_summarize
+    return agent
+
+
+def test_speculation_overlaps_llm_triage(agent):
+    triage_finished = []
+
+    def slow_llm_triage(query, file_path, cache_key):
+        time.sleep(0.2)
+        triage_finished.append(time.monotonic())
+        return ActionType(find_important_functions=True, top_n=3)
+
+    # "hmm" yerel kurallarla çözülemez: LLM triyajına düşer
+    with patch.object(agent, "_llm_triage", side_effect=slow_llm_triage):
+        result = agent.process_query("hmm", INPUT)
+
+    # Spekülatif özetler triyaj bitmeden başlamış olmalı
+    assert min(agent.summarized_at.values()) < triage_finished[0]
+    assert [fn["name"] for fn in result["important_functions"]] == [
+        "create_user", "initialize_app", "app_main"
+    ]
+
+
+def test_analysis_stage_receives_streamed_summaries(agent):
+    seen = []
+
+    def fake_analysis(functions, summarized, ready):
+        seen.extend(fn["name"] for fn in summarized)
+        return "analysis"
+
+    with patch.object(agent, "generate_overall_analysis", side_effect=fake_analysis):
+        result = agent.process_query("explain all functions and give an overall analysis", INPUT)
+
+    assert result["overall_analysis"] == "analysis"
+    assert seen == ["create_user", "initialize_app", "app_main", "load_env"]
+
+
+def test_group_analyses_start_before_summaries_finish(agent, tmp_path):
+    path = tmp_path / "inventory.json"
+    functions = [
+        {"name": f"pkg.fn_{i}", "code": f"def fn_{i}(): pass", "docstring": "", "fan_in": i}
+        for i in range(12)
+    ]
+    path.write_text(json.dumps({"functions": functions}), encoding="utf-8")
+    started = []
+
+    async def slow_summarize(fn):
+        await asyncio.sleep(0.01)
+        agent.summarized_at[fn["name"]] = time.monotonic()
+        return "x" * 3000
+
+    def fake_complete(messages, model):
+        started.append(time.monotonic())
+        return "analysis"
+
+    agent.engine._summarize = slow_summarize
+    agent.analysis_token_budget = 1000
+    with patch("agents.chain.SUMMARY_WINDOW", 1), \
+            patch.object(agent.backend, "complete", side_effect=fake_complete):
+        result = agent.process_query("explain all functions and give an overall analysis", str(path))
+
+    # Uzun özetlerde ilk grup analizi son pencere özetlenmeden başlamalı
+    assert result["overall_analysis"] == "analysis"
+    assert min(started) < max(agent.summarized_at.values())
+
+
+def test_overall_only_summarizes_important_functions(agent):
+    with patch.object(agent, "generate_overall_analysis", return_value="analysis"):
+        result = agent.process_query("overall analysis please", INPUT)
+
+    assert result["overall_analysis"] == "analysis"
+    assert len(result["important_functions"]) == 3
+
+
+def test_failed_query_cancels_pending_stages(agent):
+    async def failing_summarize(fn):
+        raise RuntimeError("summaries failed")
+
+    agent.engine._summarize = failing_summarize
+    with pytest.raises(RuntimeError):
+        agent.process_query("explain all functions and give an overall analysis", INPUT)
+
+    # Analiz aşaması ve spekülasyon paylaşılan döngüde askıda kalmamalı
+    assert [task for task in asyncio.all_tasks(engine._loop) if not task.done()] == []
+
+
+def test_large_inputs_are_streamed(agent, tmp_path):
+    path = tmp_path / "inventory.jsonl"
+    with open(INPUT, "r", encoding="utf-8") as f:
+        functions = json.load(f)["functions"]
+    path.write_text("\n".join(json.dumps(fn) for fn in functions) + "\n", encoding="utf-8")
+
+    # Sınırı aşan girdi oturumda tutulmadan her sorguda akıtılmalı
+    agent.max_stored_input_bytes = 0
+    assert isinstance(agent.open_functions(str(path)), FunctionStream)
+    result = agent.process_query("explain all functions", str(path))
+    important = agent.process_query("what are the 2 most important functions", str(path))
+
+    assert [fn["name"] for fn in result["summarized_functions"]] == [fn["name"] for fn in functions]
+    assert [fn["name"] for fn in important["important_functions"]] == ["create_user", "initialize_app"]
+    assert agent.session._inputs == {}
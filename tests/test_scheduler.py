@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+
+from unittest.mock import MagicMock
+
+import pytest
+from openai import BadRequestError, RateLimitError
+
+from core.scheduler import RequestScheduler, parse_duration, retry_after_seconds
+
+
+def response(status_code, headers):
+    mock = MagicMock(status_code=status_code)
+    mock.headers = headers
+    return mock
+
+
+def rate_limit_error(**headers):
+    return RateLimitError("rate limited", response=response(429, headers), body=None)
+
+
+def bad_request_error():
+    return BadRequestError("bad request", response=response(400, {}), body=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return RequestScheduler(clock=clock, sleep=clock.sleep, jitter=lambda: 0.5)
+
+
+def test_parse_duration():
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("soon") is None
+    assert retry_after_seconds({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "3s"}) == 3
+
+
+def test_rate_limited_requests_are_retried_after_header_delay(scheduler, clock):
+    attempts = []
+
+    def request():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise rate_limit_error(**{"retry-after": "2", "x-ratelimit-limit-requests": "500"})
+        return "ok"
+
+    assert scheduler.call(request) == "ok"
+    assert len(attempts) == 3
+    # Sunucunun istediği gecikmeye küçük bir jitter eklenir
+    assert clock.sleeps[0] == pytest.approx(2.1)
+    assert scheduler.stats["rate_limited"] == 2
+    # Eşzamanlılık sınırı yarıya iner ve dakika limiti başlıklardan öğrenilir
+    assert scheduler.concurrency_limit == 16
+    assert scheduler.requests_per_minute == 500
+
+
+def test_retries_give_up_and_other_errors_are_not_retried(clock):
+    scheduler = RequestScheduler(
+        max_retries=2, clock=clock, sleep=clock.sleep, jitter=lambda: 1.0
+    )
+
+    def always_limited():
+        raise rate_limit_error()
+
+    with pytest.raises(RateLimitError):
+        scheduler.call(always_limited)
+    # Başlık yoksa üstel geri çekilme kullanılır
+    assert clock.sleeps[0] == 0.5 and clock.sleeps[1] == 1.0
+
+    calls = []
+
+    def invalid():
+        calls.append(1)
+        raise bad_request_error()
+
+    with pytest.raises(BadRequestError):
+        scheduler.call(invalid)
+    assert len(calls) == 1
+
+
+def test_request_budget_is_enforced(clock):
+    scheduler = RequestScheduler(requests_per_minute=2, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        scheduler.call(lambda: None)
+    # Üçüncü istek pencerenin boşalmasını beklemeli
+    assert clock.now >= 60
+
+
+def test_identical_inflight_requests_are_coalesced():
+    scheduler = RequestScheduler()
+    started = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "shared"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(scheduler.call(slow, key="k")))
+    first.start()
+    started.wait()
+    results.append(scheduler.call(slow, key="k"))
+    first.join()
+
+    assert results == ["shared", "shared"]
+    assert len(calls) == 1 and scheduler.stats["coalesced"] == 1
+
+
+def test_async_requests_are_coalesced_and_retried():
+    scheduler = RequestScheduler(jitter=lambda: 0.0)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise rate_limit_error(**{"retry-after-ms": "10"})
+        return "done"
+
+    async def run():
+        return await asyncio.gather(
+            scheduler.acall(request, key="k"), scheduler.acall(request, key="k")
+        )
+
+    assert asyncio.run(run()) == ["done", "done"]
+    assert len(calls) == 2
+    assert scheduler.stats["coalesced"] == 1 and scheduler.stats["retries"] == 1
+
+
+def test_cancelled_requests_release_their_slots():
+    scheduler = RequestScheduler(max_concurrency=2)
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def quick():
+        return "done"
+
+    async def run():
+        pending = [asyncio.ensure_future(scheduler.acall(hang)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        # İptal edilen istekler yuvalarını geri vermeli
+        return await asyncio.wait_for(scheduler.acall(quick), timeout=2)
+
+    assert asyncio.run(run()) == "done"
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents.chain import CodeExplainerAgent
+from agents.server import ExplainerServer
+from core.clients import ClientProvider
+from core.engine import run_sync
+
+INPUT = "examples/dummy_input.json"
+
+
+@pytest.fixture
+def agent():
+    agent = CodeExplainerAgent(clients=ClientProvider(client=MagicMock()))
+    agent.calls = []
+
+    async def fake_summarize(fn):
+        agent.calls.append(fn["name"])
+        return f"summary of {fn['name']}"
+
+    agent.engine._summarize = fake_summarize
+    return agent
+
+
+async def request(port, method, path, payload=None, reader_writer=None):
+    """Send one HTTP request; returns (status, headers, JSON body)"""
+    reader, writer = reader_writer or await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode()
+        if line == "\r\n":
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    data = json.loads(await reader.readexactly(int(headers["content-length"])))
+    if reader_writer is None:
+        writer.close()
+    return status, headers, data
+
+
+def serve(server, scenario):
+    async def run():
+        await server.start()
+        port = server._server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            server._server.close()
+            await server._server.wait_closed()
+
+    return run_sync(run())
+
+
+def test_query_and_health(agent):
+    server = ExplainerServer(agent, port=0, default_input=INPUT)
+
+    async def scenario(port):
+        status, _, health = await request(port, "GET", "/health")
+        assert status == 200 and health["status"] == "ok" and health["in_flight"] == 0
+
+        # Aynı bağlantı üzerinden iki sorgu (keep-alive); ikincisi önbellekten gelmeli
+        connection = await asyncio.open_connection("127.0.0.1", port)
+        status, _, result = await request(
+            port, "POST", "/query", {"query": "explain all functions"}, connection
+        )
+        assert status == 200
+        assert len(result["summarized_functions"]) == len(agent.calls) > 0
+
+        started = time.monotonic()
+        status, _, again = await request(
+            port, "POST", "/query", {"query": "explain all functions", "input": INPUT}, connection
+        )
+        assert time.monotonic() - started < 0.1
+        assert again == result and len(agent.calls) == len(result["summarized_functions"])
+        connection[1].close()
+
+        _, _, health = await request(port, "GET", "/health")
+        assert health["requests"]["queries"] == 2
+
+    serve(server, scenario)
+
+
+def test_bad_requests(agent):
+    server = ExplainerServer(agent, port=0)
+
+    async def scenario(port):
+        assert (await request(port, "GET", "/nope"))[0] == 404
+        assert (await request(port, "GET", "/query"))[0] == 405
+        # Varsayılan girdi yoksa input zorunlu
+        assert (await request(port, "POST", "/query", {"query": "explain"}))[0] == 400
+        status, _, body = await request(
+            port, "POST", "/query", {"query": "explain", "input": "missing.json"}
+        )
+        assert status == 400 and "missing.json" in body["error"]
+
+    serve(server, scenario)
+
+
+def test_backpressure_rejects_when_saturated(agent):
+    server = ExplainerServer(agent, port=0, default_input=INPUT, max_in_flight=1, max_queued=1)
+    release = None
+
+    async def slow_query(query, file_path):
+        await release.wait()
+        return {"file": file_path}
+
+    agent.aprocess_query = slow_query
+
+    async def scenario(port):
+        nonlocal release
+        release = asyncio.Event()
+        running = asyncio.ensure_future(request(port, "POST", "/query", {"query": "a"}))
+        waiting = asyncio.ensure_future(request(port, "POST", "/query", {"query": "b"}))
+        while server._in_flight + server._queued < 2:
+            await asyncio.sleep(0.01)
+
+        # Bir çalışan ve bir bekleyen varken üçüncü istek reddedilmeli
+        status, headers, _ = await request(port, "POST", "/query", {"query": "c"})
+        assert status == 503 and headers["retry-after"] == "1"
+
+        release.set()
+        assert [(await task)[0] for task in (running, waiting)] == [200, 200]
+        _, _, health = await request(port, "GET", "/health")
+        assert health["requests"]["rejected"] == 1
+
+    serve(server, scenario)
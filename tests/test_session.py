@@ -0,0 +1,112 @@
+import json
+import os
+import pytest
+from unittest.mock import MagicMock
+from agents.session import AgentSession
+from agents.chain import CodeExplainerAgent
+from core.clients import ClientProvider
+from core.function_store import FunctionStore
+from core.input_loader import iter_functions
+
+
+def load(path):
+    return FunctionStore.from_records(iter_functions(path))
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    path = tmp_path / "inventory.json"
+    with open("examples/dummy_input.json", "r", encoding="utf-8") as f:
+        path.write_text(f.read(), encoding="utf-8")
+    return str(path)
+
+
+def test_store_is_reused_until_file_changes(inventory):
+    session = AgentSession()
+    loads = []
+
+    def loader(path):
+        loads.append(path)
+        return load(path)
+
+    first = session.get_store(inventory, loader)
+    assert session.get_store(inventory, loader) is first
+
+    # Sadece zaman damgası değişirse (içerik aynı) yeniden yüklenmemeli
+    stat = os.stat(inventory)
+    os.utime(inventory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert session.get_store(inventory, loader) is first
+
+    # İçerik değişirse yeniden yüklenmeli
+    data = json.loads(open(inventory, encoding="utf-8").read())
+    data["functions"] = data["functions"][:1]
+    with open(inventory, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert len(session.get_store(inventory, loader)) == 1
+    assert len(loads) == 2
+
+
+def test_replaced_and_evicted_inputs_are_closed(inventory, tmp_path):
+    session = AgentSession(max_inputs=2)
+    closed = []
+
+    def loader(path):
+        store = load(path)
+        store.close = lambda: closed.append(path)
+        return store
+
+    session.get_store(inventory, loader)
+    with open(inventory, "a", encoding="utf-8") as f:
+        f.write("\n")
+    # Değişen girdinin eski deposu kapatılmalı
+    session.get_store(inventory, loader)
+    assert closed == [inventory]
+
+    others = []
+    for name in ("a.json", "b.json"):
+        others.append(str(tmp_path / name))
+        with open(others[-1], "w", encoding="utf-8") as f:
+            f.write(open(inventory, encoding="utf-8").read())
+        session.get_store(others[-1], loader)
+    # En eski girdi çıkarılırken kapatılmalı, kalanlar close ile kapanmalı
+    assert closed == [inventory, inventory]
+    session.close()
+    assert sorted(closed[2:]) == sorted(others)
+
+
+def test_overlapping_queries_reuse_session_results(inventory):
+    agent = CodeExplainerAgent()
+    calls = []
+
+    async def fake_summarize(fn):
+        calls.append(fn["name"])
+        return f"summary of {fn['name']}"
+
+    agent.engine._summarize = fake_summarize
+
+    # Bu sorguların hepsi yerel triyajla çözülür
+    agent.process_query("explain all functions", inventory)
+    assert len(calls) == 4
+
+    # Alt kümeler önceki özetlerden, API çağrısı olmadan gelmeli
+    important = agent.process_query("top 2 functions", inventory)
+    single = agent.process_query("summarize load_env", inventory)
+
+    assert len(calls) == 4
+    assert [fn["name"] for fn in important["important_functions"]] == ["create_user", "initialize_app"]
+    assert single["function_summary"][0]["explanation"] == "summary of load_env"
+
+
+def test_repeated_triage_is_remembered(inventory):
+    mock_client = MagicMock()
+    mock_create = mock_client.chat.completions.create
+    agent = CodeExplainerAgent(clients=ClientProvider(client=mock_client))
+    mock_create.return_value.choices[0].message.tool_calls[0].function.arguments = (
+        '{"explain_code": true}'
+    )
+
+    first = agent.triage_query("explain", inventory)
+    second = agent.triage_query("explain", inventory)
+
+    mock_create.assert_called_once()
+    assert first == second
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import pytest
+
+# Toplam içe aktarma süresi bütçesi (mikrosaniye); yavaş CI makineleri için cömert
+HELP_IMPORT_BUDGET_US = 100_000
+HEAVY_MODULES = {"openai", "pydantic", "rich", "numpy", "dotenv", "httpx"}
+
+
+def imported_modules(*args):
+    """Run Python with -X importtime and return {module: (cumulative µs, nesting depth)}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            modules[name.strip()] = (int(cumulative), depth)
+    return modules
+
+
+def packages(modules):
+    return {name.split(".")[0] for name in modules}
+
+
+def test_help_imports_nothing_heavy():
+    modules = imported_modules("main.py", "--help")
+
+    assert packages(modules) & HEAVY_MODULES == set()
+    assert "agents.chain" not in modules
+    # Yalnızca en üst düzey içe aktarmalar toplanır; alt modüller onların içinde sayılır
+    total = sum(us for us, depth in modules.values() if depth == 0)
+    assert total < HELP_IMPORT_BUDGET_US
+
+
+def test_build_index_skips_the_agent(tmp_path):
+    modules = imported_modules(
+        "main.py", "--build-index",
+        "--input", "examples/dummy_input.json",
+        "--index-output", str(tmp_path / "dummy.fidx"),
+    )
+
+    assert packages(modules) & HEAVY_MODULES <= {"rich"}
+    assert "agents.types" not in modules
+
+
+@pytest.mark.parametrize("module", ["agents.chain", "agents.batch_runner"])
+def test_importing_the_agent_defers_clients_and_numpy(module):
+    modules = imported_modules("-c", f"import {module}")
+
+    assert packages(modules) & {"openai", "numpy", "rich", "httpx"} == set()
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from agents.chain import CodeExplainerAgent
+from core.clients import ClientProvider
+from core.formatter import format_as_markdown, markdown_header, markdown_section
+
+INPUT = "examples/dummy_input.json"
+
+
+def chunks(*parts):
+    return [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+        for part in parts
+    ]
+
+
+def fake_stream(**kwargs):
+    return iter(chunks("  Does ", "things", None, "."))
+
+
+def make_agent():
+    client = MagicMock()
+    client.chat.completions.create.side_effect = fake_stream
+    return CodeExplainerAgent(clients=ClientProvider(client=client)), client.chat.completions.create
+
+
+def test_markdown_sections_match_formatter():
+    functions = [
+        {"name": "a", "code": "def a(): pass", "explanation": "A."},
+        {"name": "b", "code": "def b(): pass", "explanation": "B."},
+    ]
+    streamed = markdown_header("app.py") + "".join(markdown_section(fn) for fn in functions)
+    assert streamed == format_as_markdown("app.py", functions)
+
+
+def test_stream_query_yields_events_in_order():
+    agent, _ = make_agent()
+    events = list(agent.stream_query("summarize load_env", INPUT))
+
+    kinds = [event["type"] for event in events]
+    assert kinds[0] == "start" and events[0]["markdown"]
+    assert kinds[1:] == [
+        "function_start", "summary_delta", "summary_delta", "summary_delta",
+        "function_end", "done",
+    ]
+    # Baştaki boşluk akışta da kırpılmalı
+    assert events[2]["text"] == "Does "
+
+    result = events[-1]["result"]
+    assert result["function_summary"][0]["explanation"] == "Does things."
+    assert result["markdown"] == format_as_markdown(result["file"], result["function_summary"])
+
+
+def test_stream_query_reuses_session_summaries():
+    agent, mock_create = make_agent()
+    list(agent.stream_query("summarize load_env", INPUT))
+    events = list(agent.stream_query("summarize load_env", INPUT))
+
+    assert mock_create.call_count == 1
+    assert events[-1]["result"]["function_summary"][0]["explanation"] == "Does things."
+
+
+def test_stream_query_streams_overall_analysis():
+    agent, mock_create = make_agent()
+
+    def create(**kwargs):
+        # Özetler ve genel analiz aynı istemciyi paylaşır
+        if kwargs["messages"][0]["content"] == "You are a helpful code summarizer.":
+            return fake_stream()
+        return iter(chunks("Overall ", "fine."))
+
+    mock_create.side_effect = create
+    events = list(agent.stream_query("give me an overall analysis", INPUT))
+
+    assert not events[0]["markdown"] and events[0]["result_key"] == "important_functions"
+    deltas = [event["text"] for event in events if event["type"] == "analysis_delta"]
+    assert deltas == ["Overall ", "fine."]
+    result = events[-1]["result"]
+    assert result["overall_analysis"] == "Overall fine."
+    assert "markdown" not in result
+
+
+def test_stream_query_summarizes_functions_concurrently():
+    agent, mock_create = make_agent()
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def slow_stream(**kwargs):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return fake_stream()
+
+    mock_create.side_effect = slow_stream
+    events = list(agent.stream_query("explain all functions", INPUT))
+
+    # Özetler aynı anda akmalı, ama function_end sırası girdiyle aynı kalmalı
+    assert active[1] > 1
+    ended = [event["function"]["name"] for event in events if event["type"] == "function_end"]
+    assert ended == ["create_user", "initialize_app", "app_main", "load_env"]
+    assert [fn["name"] for fn in events[-1]["result"]["summarized_functions"]] == ended
+
+
+def test_stream_query_requests_duplicates_once(tmp_path):
+    agent, mock_create = make_agent()
+    path = tmp_path / "inventory.json"
+    function = {"name": "f", "code": "def f(): pass", "docstring": "", "fan_in": 1}
+    path.write_text(json.dumps({"functions": [function, function, function]}), encoding="utf-8")
+
+    events = list(agent.stream_query("explain all functions", str(path)))
+
+    assert mock_create.call_count == 1
+    explanations = [fn["explanation"] for fn in events[-1]["result"]["summarized_functions"]]
+    assert explanations == ["Does things."] * 3
+
+
+def test_stream_query_batches_through_the_engine():
+    agent, mock_create = make_agent()
+    agent.engine.batch_token_budget = 10000
+
+    async def fake_batch(batch):
+        return {fn["name"]: f"summary of {fn['name']}" for fn in batch}
+
+    agent.engine._summarize_batch = fake_batch
+    events = list(agent.stream_query("explain all functions", INPUT))
+
+    # Toplu özetler tek parça halinde gelmeli, istemci akışı kullanılmamalı
+    assert mock_create.call_count == 0
+    deltas = [event["text"] for event in events if event["type"] == "summary_delta"]
+    assert deltas[0] == "summary of create_user" and len(deltas) == 4
+
+
+def test_stream_query_reads_functions_a_window_ahead():
+    agent, _ = make_agent()
+    functions = [
+        {"name": f"fn_{i}", "code": f"def fn_{i}(): pass", "docstring": "", "fan_in": 1}
+        for i in range(10)
+    ]
+    read = []
+
+    class Stream:
+        file = "big.py"
+
+        def __iter__(self):
+            for function in functions:
+                read.append(function["name"])
+                yield function
+
+    agent.open_functions = lambda file_path: Stream()
+    with patch("agents.chain.SUMMARY_WINDOW", 3):
+        events = agent.stream_query("explain all functions", "big.jsonl")
+        ahead = []
+        for event in events:
+            if event["type"] == "function_end":
+                ahead.append(len(read) - len(ahead))
+
+    # Akış girdiyi baştan listelememeli, çıktının en fazla bir pencere önünde okumalı
+    assert max(ahead) <= 3
+    assert [fn["name"] for fn in event["result"]["summarized_functions"]] == read
+    assert len(read) == 10
@@ -16,15 +16,16 @@ def example_function_info():
     }
 
 
-@patch("core.summarizer.client.chat.completions.create")
-def test_summarize_function(mock_create, example_function_info):
+def test_summarize_function(example_function_info):
     # API yanıtını mock'lama
+    mock_client = MagicMock()
+    mock_create = mock_client.chat.completions.create
     mock_response = MagicMock()
     mock_response.choices[0].message.content = "Bu bir test fonksiyonudur."
     mock_create.return_value = mock_response
     
     # Fonksiyonu çağır
-    summary = summarize_function(example_function_info)
+    summary = summarize_function(example_function_info, client=mock_client)
     
     # Doğru parametrelerle çağrıldığını kontrol et
     mock_create.assert_called_once()
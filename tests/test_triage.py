@@ -0,0 +1,69 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from agents.chain import CodeExplainerAgent
+from agents.triage import LocalTriage, normalize_query
+from core.clients import ClientProvider
+from core.function_store import FunctionStore
+
+
+@pytest.fixture
+def store():
+    with open("examples/dummy_input.json", "r", encoding="utf-8") as f:
+        return FunctionStore.from_records(json.load(f)["functions"])
+
+
+def test_normalize_query():
+    assert normalize_query("  Top 5   Functions?? ") == "top 5 functions"
+
+
+def test_specific_function_queries(store):
+    triage = LocalTriage()
+
+    action = triage.resolve("summarize create_user", store)
+    assert action.summarize_specific_function
+    assert action.function_name == "create_user"
+
+    action = triage.resolve("What does the initialize_app function do?", store)
+    assert action.function_name == "initialize_app"
+
+    # Küçük yazım hataları bulanık eşleşmeyle düzeltilmeli
+    action = triage.resolve("explain the create_usr function", store)
+    assert action.function_name == "create_user"
+
+
+def test_important_and_overall_queries(store):
+    triage = LocalTriage()
+
+    action = triage.resolve("top 5 functions", store)
+    assert action.find_important_functions and action.top_n == 5
+
+    action = triage.resolve("What are the two most important functions?", store)
+    assert action.top_n == 2
+
+    action = triage.resolve("Explain what this code does", store)
+    assert action.explain_code
+
+    action = triage.resolve("Give me an overall analysis of this codebase", store)
+    assert action.overall_analysis and not action.explain_code
+
+
+def test_ambiguous_queries_fall_back(store):
+    triage = LocalTriage()
+
+    # İki farklı fonksiyon adı geçiyor: LLM'e bırakılmalı
+    assert triage.resolve("compare create_user and load_env", store) is None
+    assert triage.resolve("hmm", store) is None
+
+
+def test_agent_skips_llm_for_obvious_queries():
+    mock_client = MagicMock()
+    mock_create = mock_client.chat.completions.create
+    agent = CodeExplainerAgent(clients=ClientProvider(client=mock_client))
+    action = agent.triage_query("summarize   create_user", "examples/dummy_input.json")
+    again = agent.triage_query("Summarize create_user?", "examples/dummy_input.json")
+
+    mock_create.assert_not_called()
+    assert action == again
+    assert agent.local_triage.stats == {"rules": 1, "memo": 1}
+    assert agent.local_triage.local_fraction == 1.0